@@ -8,6 +8,12 @@ namespace BankAPI.Services
         private readonly HttpClient _httpClient;
         private readonly ILogger<PythonFAQService> _logger;
         private const string PYTHON_API_URL = "http://localhost:5001/api/process-question";
+        // Matching budget sent with every request; the service answers within it,
+        // with a cheaper "degraded" match if it has to. The call is abandoned once
+        // the budget plus a margin for the network has passed.
+        private const string DEADLINE_HEADER = "X-Deadline-Ms";
+        private const int DEADLINE_MS = 2000;
+        private const int TIMEOUT_MARGIN_MS = 1000;
 
         public PythonFAQService(ILogger<PythonFAQService> logger)
         {
@@ -28,7 +34,9 @@ namespace BankAPI.Services
                 var jsonContent = JsonSerializer.Serialize(requestBody);
                 var content = new StringContent(jsonContent, Encoding.UTF8, "application/json");
 
-                var response = await _httpClient.PostAsync(PYTHON_API_URL, content);
+                using var timeout = new CancellationTokenSource(DEADLINE_MS + TIMEOUT_MARGIN_MS);
+                using var request = DeadlineRequest(PYTHON_API_URL, content, DEADLINE_MS);
+                var response = await _httpClient.SendAsync(request, timeout.Token);
                 
                 if (!response.IsSuccessStatusCode)
                 {
@@ -43,7 +51,7 @@ namespace BankAPI.Services
                     };
                 }
 
-                var responseContent = await response.Content.ReadAsStringAsync();
+                var responseContent = await response.Content.ReadAsStringAsync(timeout.Token);
                 var result = JsonSerializer.Deserialize<PythonApiResponse>(responseContent);
 
                 if (result == null || !result.success)
@@ -60,6 +68,10 @@ namespace BankAPI.Services
                 }
 
                 _logger.LogInformation($"Python API processed question successfully. Category: {result.category}, Confidence: {result.confidence}");
+                if (result.degraded)
+                {
+                    _logger.LogWarning("Python API was short on time and answered with a cheaper match");
+                }
 
                 return new FAQResult
                 {
@@ -67,7 +79,8 @@ namespace BankAPI.Services
                     Category = result.category,
                     Answer = result.answer,
                     MatchType = result.match_type,
-                    Confidence = result.confidence
+                    Confidence = result.confidence,
+                    Degraded = result.degraded
                 };
             }
             catch (HttpRequestException ex)
@@ -82,6 +95,11 @@ namespace BankAPI.Services
                     Confidence = 0.0
                 };
             }
+            catch (OperationCanceledException ex)
+            {
+                _logger.LogError(ex, $"Python API did not answer within {DEADLINE_MS + TIMEOUT_MARGIN_MS} ms");
+                return ErrorResult("AI service did not answer in time. Please try again later.");
+            }
             catch (Exception ex)
             {
                 _logger.LogError(ex, "Error processing question with Python API");
@@ -96,6 +114,25 @@ namespace BankAPI.Services
             }
         }
 
+        private static HttpRequestMessage DeadlineRequest(string url, HttpContent content, int deadlineMs)
+        {
+            var request = new HttpRequestMessage(HttpMethod.Post, url) { Content = content };
+            request.Headers.Add(DEADLINE_HEADER, deadlineMs.ToString());
+            return request;
+        }
+
+        private static FAQResult ErrorResult(string answer)
+        {
+            return new FAQResult
+            {
+                Success = false,
+                Category = "Unknown",
+                Answer = answer,
+                MatchType = "error",
+                Confidence = 0.0
+            };
+        }
+
         private class PythonApiResponse
         {
             public bool success { get; set; }
@@ -103,6 +140,7 @@ namespace BankAPI.Services
             public string answer { get; set; } = string.Empty;
             public string match_type { get; set; } = string.Empty;
             public double confidence { get; set; }
+            public bool degraded { get; set; }
         }
     }
 
@@ -113,5 +151,7 @@ namespace BankAPI.Services
         public string Answer { get; set; } = string.Empty;
         public string MatchType { get; set; } = string.Empty;
         public double Confidence { get; set; }
+        // Answered by a cheaper matching tier because the service was short on time
+        public bool Degraded { get; set; }
     }
 }
\ No newline at end of file
@@ -0,0 +1,355 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from faq_index import BASE_DIR, DATA_PATH, INDEX_PATH, load_matcher, matcher_options
+from faq_matcher import FAQMatcher
+from keyword_automaton import fold_diacritics
+from metrics import MatcherMetrics
+from similarity import BACKENDS
+from text_pipeline import parse_steps
+
+# small hand-made synonym table for paraphrased queries
+SYNONYMS = {
+    "kredit": "zajam",
+    "kredita": "zajma",
+    "kreditu": "zajmu",
+    "mogu": "smijem",
+    "dobiti": "ostvariti",
+    "potrebna": "neophodna",
+    "potrebno": "neophodno",
+    "koliki": "kolika",
+    "koliko": "kolko",
+    "rata": "mjesečna rata",
+    "otplate": "vraćanja",
+    "šta": "sta",
+    "kako": "na koji način",
+    "da li": "je li",
+}
+FILLERS = {"li", "mi", "da", "je", "se"}
+
+
+# ============================================
+# SYNTHETIC DATA
+# ============================================
+def labelled_questions(data):
+    """(question, category, answer) for every stored non-"Basic" question."""
+    return [
+        (q, c["category"], item["answer"])
+        for c in data["categories"]
+        for item in c["items"]
+        for q in item["questions"]
+        if q != "Basic"
+    ]
+
+
+def typo(question, rng):
+    chars = list(question)
+    letters = [i for i, ch in enumerate(chars) if ch.isalpha()]
+    if len(letters) < 2:
+        return question
+    i = rng.choice(letters[:-1])
+    op = rng.choice(("swap", "drop", "double", "replace"))
+    if op == "swap":
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    elif op == "drop":
+        del chars[i]
+    elif op == "double":
+        chars.insert(i, chars[i])
+    else:
+        chars[i] = rng.choice("aeiourstnkl")
+    return "".join(chars)
+
+
+def paraphrase(question, rng):
+    text = question.lower()
+    for word, synonym in SYNONYMS.items():
+        if f" {word} " in f" {text} " and rng.random() < 0.7:
+            text = f" {text} ".replace(f" {word} ", f" {synonym} ", 1).strip()
+    words = [w for w in text.split() if not (w in FILLERS and rng.random() < 0.5)]
+    if len(words) > 3 and rng.random() < 0.5:
+        i = rng.randrange(len(words) - 2)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    return " ".join(words)
+
+
+VARIANTS = {
+    "exact": lambda q, rng: q,
+    "paraphrase": paraphrase,
+    "typo": typo,
+    "diacritics": lambda q, rng: fold_diacritics(q),
+}
+
+
+def make_queries(data, count, rng):
+    """Labelled queries: every variant kind applied to randomly picked stored questions."""
+    pool = labelled_questions(data)
+    queries = []
+    for i in range(count):
+        question, category, answer = rng.choice(pool)
+        kind = list(VARIANTS)[i % len(VARIANTS)]
+        queries.append({
+            "question": VARIANTS[kind](question, rng),
+            "variant": kind,
+            "category": category,
+            "answer": answer,
+        })
+    return queries
+
+
+def make_corpus(data, size, rng):
+    """The real FAQ plus (size - 1) copies of distractor categories.
+
+    Distractors have their own names and answers and questions stitched from
+    real question fragments, so they compete in similarity scoring without
+    being correct answers for any query."""
+    corpus = {"categories": list(data["categories"])}
+    questions = [q for q, _, _ in labelled_questions(data)]
+    for copy in range(1, size):
+        for c in data["categories"]:
+            items = []
+            for n, item in enumerate(c["items"]):
+                mixed = []
+                for _ in item["questions"]:
+                    a, b = rng.sample(questions, 2)
+                    wa, wb = a.split(), b.split()
+                    mixed.append(" ".join(wa[:len(wa) // 2] + wb[len(wb) // 2:]))
+                items.append({"answer": f"[{copy}.{n}] {item['answer']}", "questions": mixed})
+            corpus["categories"].append({"category": f"{c['category']} ({copy})", "items": items})
+    return corpus
+
+
+# ============================================
+# MEASUREMENT
+# ============================================
+def percentiles(samples_ns):
+    samples = sorted(samples_ns)
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+    def pick(p):
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))] / 1e6
+
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99)}
+
+
+def time_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter_ns()
+        fn(*args)
+        samples.append(time.perf_counter_ns() - start)
+    return percentiles(samples)
+
+
+def accuracy(matcher, queries):
+    by_variant = {}
+    for q in queries:
+        result = matcher.process_question(q["question"])
+        stats = by_variant.setdefault(q["variant"], {"n": 0, "category": 0, "answer": 0})
+        stats["n"] += 1
+        stats["category"] += result["category"] == q["category"]
+        stats["answer"] += result["answer"] == q["answer"]
+
+    total = sum(s["n"] for s in by_variant.values()) or 1
+    return {
+        "category": sum(s["category"] for s in by_variant.values()) / total,
+        "answer": sum(s["answer"] for s in by_variant.values()) / total,
+        "by_variant": {
+            kind: {"category": s["category"] / s["n"], "answer": s["answer"] / s["n"]}
+            for kind, s in by_variant.items()
+        },
+    }
+
+
+def run_one(matcher, queries):
+    texts = [(q["question"],) for q in queries]
+    normalized = [(matcher.normalize(q["question"]),) for q in queries]
+
+    latency = {
+        "exact": time_calls(matcher.find_exact_match, texts),
+        "keyword": time_calls(matcher.keyword_category, normalized),
+        "similarity": time_calls(matcher.categorize_by_similarity, texts),
+        "process": time_calls(matcher.process_question, texts),
+    }
+
+    start = time.perf_counter()
+    for (text,) in texts:
+        matcher.process_question(text)
+    single = len(texts) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matcher.process_questions([{"question": text} for (text,) in texts])
+    batch = len(texts) / (time.perf_counter() - start)
+
+    # candidates considered vs. skipped by the similarity upper bounds
+    metrics = MatcherMetrics()
+    matcher.metrics = metrics
+    for (text,) in texts:
+        matcher.categorize_by_similarity(text)
+    matcher.metrics = None
+    considered = sum(total for _, total, _ in metrics.candidates.series.values())
+    pruned = sum(metrics.pruned.values.values())
+
+    return {
+        "latency_ms": latency,
+        "throughput_qps": {"single": single, "batch": batch},
+        "accuracy": accuracy(matcher, queries),
+        "candidates": {"considered": considered, "pruned": pruned},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, backends, query_count, seed, shortlist=0, normalization=(), embedding_model=None, fusion=False):
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    category_keywords = load_matcher(INDEX_PATH).category_keywords
+
+    results = []
+    for size in sizes:
+        # same corpus and queries for every backend at a given size
+        rng = random.Random(seed + size)
+        corpus = make_corpus(data, size, rng)
+        queries = make_queries(data, query_count, rng)
+        for backend in backends:
+            matcher = FAQMatcher(corpus, category_keywords, similarity=backend,
+                                 shortlist_size=shortlist, normalization=normalization,
+                                 embedding_model=embedding_model, fusion=fusion)
+            if matcher.similarity_fallback or matcher.fusion_fallback:
+                print(f"{size:>5} {'':>9} {backend:>9}  skipped: {matcher.similarity_fallback or matcher.fusion_fallback}")
+                continue
+            row = {"size": size, "questions": len(matcher.corpus), "backend": backend}
+            row.update(run_one(matcher, queries))
+            results.append(row)
+            print_row(row)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "seed": seed,
+            "queries": query_count,
+            "shortlist": shortlist,
+            "normalization": list(parse_steps(normalization)),
+            "fusion": fusion,
+        },
+        "results": results,
+    }
+
+
+# ============================================
+# REPORTING
+# ============================================
+def print_header():
+    print(f"{'size':>5} {'questions':>9} {'backend':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>9} {'batch':>9} {'cat acc':>8} {'ans acc':>8}")
+
+
+def print_row(row):
+    p = row["latency_ms"]["process"]
+    t = row["throughput_qps"]
+    a = row["accuracy"]
+    print(f"{row['size']:>5} {row['questions']:>9} {row['backend']:>9} "
+          f"{p['p50']:>8.3f} {p['p95']:>8.3f} {p['p99']:>8.3f} {t['single']:>9.1f} {t['batch']:>9.1f} "
+          f"{a['category']:>8.3f} {a['answer']:>8.3f}")
+    stages = "  ".join(
+        f"{stage} {l['p50']:.3f}/{l['p95']:.3f}/{l['p99']:.3f}"
+        for stage, l in row["latency_ms"].items() if stage != "process"
+    )
+    c = row["candidates"]
+    pruned = c["pruned"] / c["considered"] if c["considered"] else 0.0
+    print(f"{'':>25} p50/p95/p99 ms: {stages}  pruned {pruned:.1%}")
+
+
+def print_tradeoffs(report, baseline="sequence"):
+    """Accuracy gained vs. latency paid by each backend relative to the baseline."""
+    rows = {(r["size"], r["backend"]): r for r in report["results"]}
+    lines = []
+    for (size, backend), row in rows.items():
+        base = rows.get((size, baseline))
+        if backend == baseline or base is None:
+            continue
+        p50 = row["latency_ms"]["process"]["p50"] / (base["latency_ms"]["process"]["p50"] or 1)
+        acc = row["accuracy"]["answer"] - base["accuracy"]["answer"]
+        para = (row["accuracy"]["by_variant"].get("paraphrase", {}).get("answer", 0)
+                - base["accuracy"]["by_variant"].get("paraphrase", {}).get("answer", 0))
+        lines.append(f"{size:>5} {backend:>9}  answer acc {acc:+.3f} (paraphrase {para:+.3f})  p50 latency x{p50:.2f}")
+    if lines:
+        print(f"\nVersus {baseline}:")
+        print("\n".join(lines))
+
+
+def compare(previous, current):
+    old = {(r["size"], r["backend"]): r for r in previous["results"]}
+    print(f"\nCompared with {previous['meta'].get('commit')} ({previous['meta'].get('timestamp')}):")
+    for row in current["results"]:
+        before = old.get((row["size"], row["backend"]))
+        if not before:
+            continue
+        p50 = row["latency_ms"]["process"]["p50"] / (before["latency_ms"]["process"]["p50"] or 1)
+        p99 = row["latency_ms"]["process"]["p99"] / (before["latency_ms"]["process"]["p99"] or 1)
+        acc = row["accuracy"]["answer"] - before["accuracy"]["answer"]
+        print(f"{row['size']:>5} {row['backend']:>9}  p50 x{p50:.2f}  p99 x{p99:.2f}  answer acc {acc:+.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FAQMatcher latency, throughput and accuracy")
+    parser.add_argument("--sizes", default="1,10", help="comma separated corpus multipliers")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="similarity backends to compare")
+    parser.add_argument("--queries", type=int, default=200, help="labelled queries per corpus size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shortlist", type=int, default=0,
+                        help="score only the N best trigram candidates (0 = exhaustive)")
+    parser.add_argument("--embedding-model", default=matcher_options()["embedding_model"],
+                        help="local sentence-embedding model for the embedding backend (default: FAQ_EMBEDDING_MODEL)")
+    parser.add_argument("--normalization", default="",
+                        help="similarity text steps, e.g. fold,punct,stopwords,stem")
+    parser.add_argument("--fusion", action="store_true",
+                        help="score with the calibrated signal fusion (fusion_weights.json) instead of the fallback chain")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        sizes = None
+    if not sizes or min(sizes) < 1:
+        parser.error("--sizes needs one or more positive integers, e.g. 1,10")
+
+    print_header()
+    report = run(
+        sizes,
+        args.backends.split(","),
+        args.queries,
+        args.seed,
+        args.shortlist,
+        args.normalization,
+        args.embedding_model,
+        args.fusion,
+    )
+    print_tradeoffs(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+from faq_changes import load_current
+from faq_index import INDEX_PATH, matcher_options
+
+
+# ============================================
+# INPUT
+# ============================================
+def read_records(path):
+    """Yield dict records from a CSV file (with a header row) or a JSONL file.
+
+    "-" reads JSONL from stdin. A JSONL line that is not an object, or not
+    valid JSON, becomes {"error": ...} so it still gets an output line."""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+        return
+
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in f:
+            if line.strip():
+                yield parse_record(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parse_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    return record if isinstance(record, dict) else {"error": "Expected a JSON object"}
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============================================
+# SCORING
+# ============================================
+# the matcher of this process: loaded once in the parent and inherited by
+# forked workers, or loaded by init_worker under the spawn start method
+_matcher = None
+
+
+def init_worker(index_path, options):
+    global _matcher
+    if _matcher is None:
+        # FAQ edits not yet compacted into the index are scored too
+        _matcher = load_current(index_path, **options)
+
+
+def output_line(record, result):
+    """The input record plus a "result" (or "error") field, as one JSON line."""
+    out = dict(record)
+    if "error" in result:
+        out["error"] = result["error"]
+    else:
+        out["result"] = result
+    return json.dumps(out, ensure_ascii=False)
+
+
+def score_chunk(records):
+    """Score a chunk with one batch call; returns serialized output lines."""
+    items = [
+        {"question": r.get("question"), "category": r.get("category") or None} if "error" not in r else None
+        for r in records
+    ]
+    results = _matcher.process_questions(items)
+    return [
+        output_line(record, {"error": record["error"]} if "error" in record else result)
+        for record, result in zip(records, results)
+    ]
+
+
+def score_file(input_path, output, workers, chunk_size, index_path=INDEX_PATH,
+               options=None, progress_interval=5.0, log=sys.stderr):
+    """Score every record of input_path and write output lines in input order.
+
+    At most a few chunks per worker are in flight, so memory stays bounded
+    however large the input is. Returns (questions scored, seconds)."""
+    options = matcher_options() if options is None else options
+    start = time.perf_counter()
+    count = 0
+    last_report = start
+
+    def write(lines):
+        nonlocal count, last_report
+        output.write("\n".join(lines) + "\n")
+        count += len(lines)
+        now = time.perf_counter()
+        if progress_interval and now - last_report >= progress_interval:
+            last_report = now
+            print(f"{count} questions, {count / (now - start):.0f} q/s", file=log, flush=True)
+
+    chunks = chunked(read_records(input_path), chunk_size)
+    if workers <= 1:
+        init_worker(index_path, options)
+        for chunk in chunks:
+            write(score_chunk(chunk))
+        return count, time.perf_counter() - start
+
+    context = multiprocessing.get_context()
+    if context.get_start_method() == "fork":
+        # load before forking: workers share the mmap'd index and, thanks to
+        # gc.freeze, mostly the matcher's Python objects too
+        init_worker(index_path, options)
+        gc.freeze()
+
+    with context.Pool(workers, initializer=init_worker, initargs=(index_path, options)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(score_chunk, (chunk,)))
+            if len(pending) >= workers * 4:
+                write(pending.popleft().get())
+        while pending:
+            write(pending.popleft().get())
+    return count, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score a JSONL/CSV file of questions in parallel and write JSONL results in input order")
+    parser.add_argument("input", help='JSONL or .csv file with a "question" (and optional "category") field; - for stdin')
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256, help="questions per batch sent to a worker")
+    parser.add_argument("--index", default=INDEX_PATH, help="compiled index to load")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines (0 = off)")
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count, seconds = score_file(args.input, output, args.workers, args.chunk_size,
+                                    args.index, progress_interval=args.progress)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Scored {count} questions in {seconds:.1f}s with {args.workers} worker(s): "
+          f"{count / seconds if seconds else 0:.0f} q/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
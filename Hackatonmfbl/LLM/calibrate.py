@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+from benchmark import VARIANTS, make_queries
+from faq_index import DATA_PATH, INDEX_PATH, load_matcher, matcher_options
+from fusion import FUSION_WEIGHTS_PATH, ScoreFusion, feature_set, fit_fusion, sigmoid
+
+# banking questions the FAQ has no answer for; the model has to learn to
+# keep their confidence low
+OUT_OF_SCOPE = [
+    "Kako da otvorim devizni račun?",
+    "Koje je radno vrijeme poslovnice?",
+    "Kako da promijenim PIN kartice?",
+    "Gdje je najbliži bankomat?",
+    "Kolika je kamata na oročenu štednju?",
+    "Kako da aktiviram mobilno bankarstvo?",
+    "Mogu li platiti račun za struju preko interneta?",
+    "Kako da prijavim izgubljenu karticu?",
+    "Da li izdajete kreditne kartice?",
+    "Kako da pošaljem novac u inostranstvo?",
+    "Koliki je kurs eura danas?",
+    "Kako da zakažem sastanak sa savjetnikom?",
+    "Da li radite subotom?",
+    "Kako da zatvorim tekući račun?",
+    "Koji je SWIFT kod banke?",
+    "Kakvo će vrijeme biti sutra?",
+]
+
+
+# ============================================
+# LABELLED SET
+# ============================================
+def labelled_set(data, matcher, count, rng, out_of_scope=0.15):
+    """Labelled queries that reach the fusion stage (exact hits are skipped).
+
+    In-scope queries are benchmark variants of stored questions; about
+    `out_of_scope` of them are variants of OUT_OF_SCOPE with answer None."""
+    queries = make_queries(data, count, rng)
+    for _ in range(int(count * out_of_scope)):
+        kind = rng.choice(list(VARIANTS))
+        queries.append({"question": VARIANTS[kind](rng.choice(OUT_OF_SCOPE), rng),
+                        "variant": "out_of_scope", "category": None, "answer": None})
+    rng.shuffle(queries)
+    return [q for q in queries if matcher.normalize(q["question"]) not in matcher.exact_index]
+
+
+def row_labels(matcher, queries):
+    """(queries x rows) 0/1 matrix: does the row's answer answer the query?"""
+    corpus = matcher.corpus
+    row_answer = np.asarray(corpus.item_answer)[np.asarray(corpus.row_item)]
+    labels = np.zeros((len(queries), len(corpus)), dtype=np.float64)
+    for j, q in enumerate(queries):
+        answer = corpus.answer_ids.get(q["answer"])
+        if answer is not None:
+            labels[j] = row_answer == answer
+    return labels
+
+
+def features(matcher, fusion, queries):
+    q_norms = [matcher.normalize(q["question"]) for q in queries]
+    texts = [matcher.text_pipeline(q) for q in q_norms]
+    return np.concatenate([fusion.signals(q_norms[b:b + fusion.chunk_size], texts[b:b + fusion.chunk_size])
+                           for b in range(0, len(queries), fusion.chunk_size)])
+
+
+# ============================================
+# EVALUATION
+# ============================================
+def calibration_error(confidence, correct, bins=10):
+    """Expected calibration error: mean |accuracy - confidence| over confidence bins."""
+    confidence, correct = np.asarray(confidence), np.asarray(correct, dtype=np.float64)
+    which = np.minimum((confidence * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        mask = which == b
+        if mask.any():
+            error += mask.mean() * abs(correct[mask].mean() - confidence[mask].mean())
+    return float(error)
+
+
+def evaluate(confidence, correct):
+    confidence, correct = np.asarray(confidence), np.asarray(correct, dtype=np.float64)
+    return {
+        "accuracy": float(correct.mean()) if len(correct) else 0.0,
+        "ece": calibration_error(confidence, correct),
+        "brier": float(np.mean((confidence - correct) ** 2)) if len(correct) else 0.0,
+    }
+
+
+def fused_top1(probs, labels):
+    """Top-1 confidence and correctness per query from (queries x rows) probabilities."""
+    top = probs.argmax(axis=1)
+    confidence = probs[np.arange(len(top)), top]
+    return confidence, labels[np.arange(len(top)), top] == 1
+
+
+def chain_top1(matcher, queries):
+    """The same for the sequential fallback chain (keyword answers count as wrong
+    unless they happen to be the expected answer)."""
+    results = [matcher.process_question(q["question"]) for q in queries]
+    return ([r["confidence"] for r in results],
+            [q["answer"] is not None and r["answer"] == q["answer"] for q, r in zip(queries, results)])
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fit the score fusion model (fusion.py) on labelled questions and write its weights")
+    parser.add_argument("--data", default=DATA_PATH, help="FAQ JSON to generate labelled questions from")
+    parser.add_argument("--index", default=INDEX_PATH, help="compiled index to load")
+    parser.add_argument("--queries", type=int, default=2000, help="in-scope labelled questions to generate")
+    parser.add_argument("--holdout", type=float, default=0.25, help="share of questions kept for evaluation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 penalty on the feature weights")
+    parser.add_argument("--embedding-model", default=matcher_options()["embedding_model"],
+                        help="also fit the semantic model with this local embedding model")
+    parser.add_argument("-o", "--output", default=FUSION_WEIGHTS_PATH, help="weights file (other models in it are kept)")
+    args = parser.parse_args(argv)
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    options = dict(matcher_options(), fusion=False)
+    if args.embedding_model:
+        options.update(similarity="embedding", embedding_model=args.embedding_model)
+    matcher = load_matcher(args.index, **options)
+    if matcher.similarity_fallback:
+        print(f"Semantic signal unavailable ({matcher.similarity_fallback}), fitting the lexical model only",
+              file=sys.stderr)
+    fusion = ScoreFusion.for_matcher(matcher, fitted=False)
+
+    rng = random.Random(args.seed)
+    queries = labelled_set(data, matcher, args.queries, rng)
+    split = int(len(queries) * (1 - args.holdout))
+    train, test = queries[:split], queries[split:]
+
+    weights, bias = fit_fusion(features(matcher, fusion, train), row_labels(matcher, train), l2=args.l2)
+
+    test_probs = sigmoid(features(matcher, fusion, test) @ weights + bias)
+    fused = evaluate(*fused_top1(test_probs, row_labels(matcher, test)))
+    chain = evaluate(*chain_top1(matcher, test))
+
+    name = feature_set(fusion.semantic is not None)
+    models = {}
+    if os.path.exists(args.output):
+        with open(args.output, "r", encoding="utf-8") as f:
+            models = json.load(f)
+    models[name] = {
+        "features": list(fusion.features),
+        "weights": [round(float(w), 6) for w in weights],
+        "bias": round(bias, 6),
+        "fitted_on": {
+            "dataset_version": matcher.dataset_version,
+            "normalization": list(matcher.normalization),
+            "embedding_model": args.embedding_model if fusion.semantic is not None else None,
+            "train_questions": len(train),
+            "holdout_questions": len(test),
+            "seed": args.seed,
+            "l2": args.l2,
+        },
+        "holdout": {"fusion": fused, "fallback_chain": chain},
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(models, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+    print(f"{name} model: " + ", ".join(f"{n} {w:+.3f}" for n, w in zip(fusion.features, weights))
+          + f", bias {bias:+.3f}")
+    print(f"{'holdout':>14} {'accuracy':>9} {'ECE':>7} {'Brier':>7}")
+    for label, stats in (("fusion", fused), ("fallback chain", chain)):
+        print(f"{label:>14} {stats['accuracy']:>9.3f} {stats['ece']:>7.3f} {stats['brier']:>7.3f}")
+    print(f"Weights written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
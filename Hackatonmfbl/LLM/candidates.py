@@ -0,0 +1,56 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+
+def trigrams(text: str):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ============================================
+# TRIGRAM CANDIDATE INDEX
+# ============================================
+class TrigramIndex:
+    """Inverted index from character trigrams to stored question rows.
+
+    shortlist() ranks rows by the Dice overlap of their trigram sets with
+    the query, touching only the postings of the query's trigrams, so the
+    expensive scorer only has to look at a handful of rows. Trigrams that
+    occur in more than max_df of all rows carry little signal and are
+    skipped (unless the query has nothing rarer); small corpora keep every
+    trigram up to min_postings rows."""
+
+    def __init__(self, questions, max_df=0.1, min_postings=100):
+        postings = {}
+        self.sizes = array("i")
+        for row, question in enumerate(questions):
+            grams = trigrams(question)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, array("i")).append(row)
+        # rows are appended in order, so every postings list is sorted
+        self.postings = postings
+        self.max_postings = max(min_postings, int(max_df * len(self.sizes)))
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def shortlist(self, query: str, start: int = 0, end: int = None, limit: int = 50):
+        """Up to `limit` best rows in [start, end), returned in row order."""
+        end = len(self.sizes) if end is None else end
+        grams = trigrams(query)
+        lists = [p for p in (self.postings.get(g) for g in grams) if p]
+        common = [p for p in lists if len(p) > self.max_postings]
+        lists = [p for p in lists if len(p) <= self.max_postings] or sorted(common, key=len)[:3]
+
+        shared = Counter()
+        for postings in lists:
+            lo = bisect_left(postings, start) if start else 0
+            hi = bisect_left(postings, end) if end < len(self.sizes) else len(postings)
+            shared.update(postings[lo:hi])
+
+        size, sizes = len(grams), self.sizes
+        best = heapq.nlargest(limit, shared.items(), key=lambda rc: (2 * rc[1] / (size + sizes[rc[0]]), -rc[0]))
+        return sorted(row for row, _ in best)
@@ -0,0 +1,63 @@
+"""Shared pytest fixtures for the FAQ service tests (run `python -m pytest` here)."""
+import asyncio
+import json
+import os
+import shutil
+import sys
+from functools import partial
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("FAQ_WATCH_INTERVAL", "0")
+os.environ.setdefault("FAQ_CACHE_SIZE", "0")
+
+
+@pytest.fixture
+def asgi_call():
+    """call(method, path, body=None, headers={}) -> (status, json) against faq_asgi.app."""
+    import faq_asgi
+
+    def call(method, path, body=None, headers=None):
+        messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b"",
+                     "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": method, "path": path, "query_string": b"",
+                 "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]}
+        asyncio.run(faq_asgi.app(scope, receive, send))
+        return sent[0]["status"], json.loads(sent[1]["body"])
+
+    return call
+
+
+@pytest.fixture
+def faq_edits(tmp_path, monkeypatch):
+    """faq_api with a fresh matcher and its change log on a copy of the FAQ JSON in tmp_path."""
+    import faq_api
+    from faq_changes import FAQChanges
+    from hot_reload import ModelReloader
+
+    data_path = str(tmp_path / "PitanjaOdgovoriJSON.json")
+    shutil.copy(faq_api.DATA_PATH, data_path)
+    index_path = str(tmp_path / "faq_matcher_index.bin")
+    shutil.copy(faq_api.INDEX_PATH, index_path)
+    changes = FAQChanges(str(tmp_path / "faq_changes.jsonl"), data_path, faq_api.CATEGORY_KEYWORDS)
+    monkeypatch.setattr(faq_api, "_faq_changes", changes)
+    # a watcher on the copies that never polls: checks only run when called
+    monkeypatch.setattr(faq_api, "_reloader", ModelReloader(
+        load=faq_api.reload_model, get_matcher=faq_api.get_matcher, index_path=index_path,
+        data_path=data_path, interval=0, changes_path=changes.path,
+        apply_changes=partial(faq_api.apply_changes, compact=True)))
+    monkeypatch.setattr(faq_api, "RESULT_STORE_PATH", None)
+    monkeypatch.setattr(faq_api, "_result_store", None)
+    monkeypatch.setattr(faq_api, "matcher", None)
+    faq_api.answer_cache.clear()
+    yield faq_api
+    faq_api.answer_cache.clear()
@@ -1,176 +1,370 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import pickle
-import json
-import re
-from difflib import SequenceMatcher
+import hmac
+import os
+import threading
+from functools import partial
+from time import monotonic, perf_counter
+from answer_cache import AnswerCache
+from faq_changes import CHANGES_PATH, FAQChanges, apply_to_matcher
+from faq_index import DATA_PATH, INDEX_PATH, load_matcher, matcher_options
+from faq_matcher import normalize
+from faqmodel import CATEGORY_KEYWORDS, EXPORT_PATH
+from hot_reload import ModelReloader
+from metrics import MatcherMetrics, SamplingProfiler
+from result_store import ResultStore
 
 app = Flask(__name__)
 CORS(app)
 
 # ============================================
-# FAQ MATCHER CLASS (needed for unpickling)
+# LOAD MODEL
 # ============================================
-class FAQMatcher:
-    def __init__(self, data, category_keywords):
-        self.data = data
-        self.category_keywords = category_keywords
-    
-    def normalize(self, text: str) -> str:
-        return re.sub(r"\s+", " ", text.strip().lower())
-    
-    def find_exact_match(self, question: str, category: str = None):
-        q_norm = self.normalize(question)
-
-        if not category:
-            for category_obj in self.data["categories"]:
-                category_name = category_obj["category"]
-                for item in category_obj["items"]:
-                    for q in item["questions"]:
-                        if self.normalize(q) == q_norm:
-                            return {
-                                "category": category_name,
-                                "answer": item["answer"],
-                                "match_type": "exact",
-                                "confidence": 1.0
-                            }
-            return None
-
-        category_obj = next(
-            (c for c in self.data["categories"] if self.normalize(c["category"]) == self.normalize(category)),
-            None
-        )
-
-        if not category_obj:
-            return {
-                "category": "Unknown",
-                "answer": "Category not found in dataset.",
-                "match_type": "manual",
-                "confidence": 0.0
-            }
-
-        category_name = category_obj["category"]
-        for item in category_obj["items"]:
-            for q in item["questions"]:
-                if self.normalize(q) == q_norm:
-                    return {
-                        "category": category_name,
-                        "answer": item["answer"],
-                        "match_type": "exact",
-                        "confidence": 1.0
-                    }
-
-        return {
-            "category": category_name,
-            "answer": "No quick answer found in this category.",
-            "match_type": "manual",
-            "confidence": 0.0
-        }
-
-    def categorize_by_similarity(self, question: str):
-        q_norm = self.normalize(question)
-        best_score = 0
-        best_category = None
-        best_answer = None
-        keywordFound = False
-
-        for cat_name, keywords in self.category_keywords.items():
-            if any(tok in q_norm for tok in keywords):
-                cat_obj = next((c for c in self.data["categories"] if c["category"] == cat_name), None)
-                if not cat_obj:
-                    continue
-                best_category = cat_name
-                keywordFound = True
-                break
-
-        if not keywordFound:
-            for category_obj in self.data["categories"]:
-                category_name = category_obj["category"]
-                for item in category_obj["items"]:
-                    for q in item["questions"]:
-                        if q != "Basic":
-                            score = SequenceMatcher(None, q_norm, self.normalize(q)).ratio()
-                            if score > best_score:
-                                best_score = score
-                                best_category = category_name
-                                best_answer = item["answer"]
-        else:
-            category_obj = next(
-                (c for c in self.data["categories"] if self.normalize(c["category"]) == self.normalize(best_category)),
-                None
-            )
-            if not category_obj:
-                return None
-
-            for item in category_obj["items"]:
-                for q in item["questions"]:
-                    if q != "Basic":
-                        score = SequenceMatcher(None, q_norm, self.normalize(q)).ratio()
-                        if score > best_score:
-                            best_score = score
-                            best_answer = item["answer"]
-
-        if best_score > 0.55:
-            return {
-                "category": best_category,
-                "answer": best_answer,
-                "match_type": "similar",
-                "confidence": round(best_score, 2)
-            }
-
-        if best_category:
-            basic_answer = None
-            category_obj = next((c for c in self.data["categories"] if c["category"] == best_category), None)
-            if category_obj:
-                basic_item = next((i for i in category_obj["items"] if i["questions"] == ["Basic"]), None)
-                if basic_item:
-                    basic_answer = basic_item["answer"]
-
-            return {
-                "category": best_category,
-                "answer": basic_answer or "No answer available.",
-                "match_type": "keyword",
-                "confidence": 0.5
-            }
+# Importing this module doesn't touch any file: the matcher, result store,
+# change log and file watcher are created by the first get_matcher(),
+# get_result_store(), get_faq_changes() and get_reloader() calls (serve.py
+# and the ASGI app call them at startup).
+# FAQ_CACHE_SIZE=0 disables the answer cache
+answer_cache = AnswerCache(
+    maxsize=int(os.environ.get("FAQ_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("FAQ_CACHE_TTL", "3600")),
+)
+# FAQ_RESULT_STORE=path keeps answers in SQLite across restarts (off by default);
+# FAQ_STORE_WARM of the most requested ones are put in the answer cache at load
+RESULT_STORE_PATH = os.environ.get("FAQ_RESULT_STORE")
+STORE_WARM = int(os.environ.get("FAQ_STORE_WARM", "256"))
+# FAQ edits from /admin/faq or `python faq_changes.py` are applied without a rebuild;
+# the watcher folds the log into the JSON once FAQ_COMPACT_EVERY records
+# have collected (0 = only on POST /admin/faq/compact)
+COMPACT_EVERY = int(os.environ.get("FAQ_COMPACT_EVERY", "100"))
+# FAQ_WATCH_INTERVAL=0 disables file watching (POST /admin/reload still works)
+WATCH_INTERVAL = float(os.environ.get("FAQ_WATCH_INTERVAL", "2"))
+matcher = None
+_result_store = None
+_faq_changes = None
+_reloader = None
+_load_lock = threading.Lock()
+_setup_lock = threading.Lock()
+_patch_lock = threading.Lock()
+# FAQ_METRICS=0 turns off per-stage timing in the matcher
+metrics = MatcherMetrics() if os.environ.get("FAQ_METRICS", "1") != "0" else None
+profiler = SamplingProfiler()
 
-        return None
 
-    def process_question(self, question: str, category: str = None):
-        question = question.strip()
-        
-        if category and category.strip():
-            exact_in_category = self.find_exact_match(question, category)
-            if exact_in_category:
-                return exact_in_category
-        else:
-            exact = self.find_exact_match(question)
-            if exact:
-                return exact
-            
-            sim = self.categorize_by_similarity(question)
-            if sim:
-                return sim
-
-        return {
-            "category": "Unknown",
-            "answer": "No quick answer found.",
-            "match_type": "none",
-            "confidence": 0.0
-        }
+def reload_model(path=INDEX_PATH):
+    """Load the compiled index, make it the active matcher and flush cached answers."""
+    global matcher
+    new_matcher = load_matcher(path, **matcher_options())
+    new_matcher.metrics = metrics
+    with _patch_lock:
+        # edits logged since the index was compiled
+        for record in get_faq_changes().records(new_matcher.base_version):
+            apply_to_matcher(new_matcher, record)
+        matcher = new_matcher
+    answer_cache.clear()
+    if get_result_store():
+        warm_from_store(new_matcher)
+    return matcher
+
+
+def apply_changes(compact=False):
+    """Apply change-log records the active matcher hasn't seen yet; returns how many.
+
+    The records are applied to a copy, which then replaces the active
+    matcher, so requests never see a half-applied edit. With compact=True
+    the log is also folded into the JSON once it holds COMPACT_EVERY
+    records."""
+    global matcher
+    get_matcher()
+    faq_changes = get_faq_changes()
+    with _patch_lock:
+        current = matcher
+        records = faq_changes.records(current.base_version)
+        new = [r for r in records if r["seq"] > current.patch_seq]
+        previous = current.dataset_version
+        if new:
+            current = current.patched_copy()
+            for record in new:
+                apply_to_matcher(current, record)
+            matcher = current
+    if new:
+        answer_cache.clear()
+        if get_result_store():
+            warm_from_store(current, previous, {r["category"] for r in new})
+    if compact and COMPACT_EVERY and len(records) >= COMPACT_EVERY:
+        faq_changes.compact()
+    return len(new)
+
+
+def sync_matcher(dataset_version):
+    """Catch this process's matcher up with dataset_version, the version
+    active in another process: pending change-log edits are applied, a new
+    base dataset means reloading the index.
+
+    Process-pool workers fork with a copy of the parent's matcher and call
+    this before each request, so reloads and edits reach them too."""
+    current = get_matcher()
+    if current.dataset_version == dataset_version:
+        return current
+    if current.base_version == dataset_version.partition("+")[0]:
+        apply_changes()
+    else:
+        reload_model()
+    return get_matcher()
+
+
+def warm_from_store(new_matcher, previous=None, changed=()):
+    """Drop stored results of other dataset versions and pre-warm the answer cache.
+
+    After FAQ edits (the matcher went from dataset version previous by
+    changing the `changed` categories) computed results that don't involve
+    those categories or their questions are kept."""
+    result_store = get_result_store()
+    changed = {normalize(name) for name in changed}
+    questions = set()
+    for cat_norm in changed:
+        questions.update(new_matcher.category_index.get(cat_norm, ()))
+
+    def unaffected(key, result):
+        return (key[0] not in questions and key[1] not in changed
+                and normalize(result.get("category") or "") not in changed)
+
+    try:
+        result_store.invalidate(new_matcher.dataset_version, new_matcher.answer_categories,
+                                previous, unaffected if previous is not None else None)
+    except Exception as e:
+        # a locked or broken store must not stop the matcher from loading
+        result_store.failed(e)
+    generation = answer_cache.generation
+    for key, result in result_store.most_frequent(new_matcher.dataset_version, STORE_WARM):
+        answer_cache.put(key, result, generation)
+
+
+def get_matcher():
+    """The active matcher, loading the compiled index on first use."""
+    if matcher is None:
+        with _load_lock:
+            if matcher is None:
+                reload_model()
+    return matcher
+
+
+def get_result_store():
+    """The persistent result store, opened on first use; None unless FAQ_RESULT_STORE is set."""
+    global _result_store
+    if _result_store is None and RESULT_STORE_PATH:
+        with _setup_lock:
+            if _result_store is None:
+                _result_store = ResultStore(RESULT_STORE_PATH)
+    return _result_store
+
+
+def get_faq_changes():
+    """The FAQ change log (see faq_changes.py), created on first use."""
+    global _faq_changes
+    if _faq_changes is None:
+        with _setup_lock:
+            if _faq_changes is None:
+                _faq_changes = FAQChanges(
+                    CHANGES_PATH, DATA_PATH, CATEGORY_KEYWORDS,
+                    export_path=EXPORT_PATH if os.path.isdir(os.path.dirname(EXPORT_PATH)) else None,
+                )
+    return _faq_changes
+
+
+def get_reloader():
+    """The file watcher, created (not started) on first use."""
+    global _reloader
+    if _reloader is None:
+        with _setup_lock:
+            if _reloader is None:
+                _reloader = ModelReloader(
+                    load=reload_model,
+                    get_matcher=get_matcher,
+                    index_path=INDEX_PATH,
+                    data_path=DATA_PATH,
+                    interval=WATCH_INTERVAL,
+                    changes_path=CHANGES_PATH,
+                    apply_changes=partial(apply_changes, compact=True),
+                )
+    return _reloader
+
+ADMIN_TOKEN = os.environ.get("FAQ_ADMIN_TOKEN")
+MAX_TOP_K = 10
+# requests may carry a time budget (X-Deadline-Ms header or deadline_ms
+# field); FAQ_DEADLINE_MS applies to those that don't (0 = no deadline).
+# With more than FAQ_DEGRADE_QUEUE requests being matched in this worker,
+# new ones only get the cheap matching tiers (0 = off)
+DEADLINE_HEADER = "X-Deadline-Ms"
+DEFAULT_DEADLINE_MS = float(os.environ.get("FAQ_DEADLINE_MS", "0"))
+DEGRADE_QUEUE = int(os.environ.get("FAQ_DEGRADE_QUEUE", "0"))
+MAX_DEADLINE_MS = 60000
+_matching = 0
+_matching_lock = threading.Lock()
 
 # ============================================
-# LOAD MODEL
+# CACHED MATCHING
 # ============================================
-with open("faq_matcher_model.pkl", "rb") as f:
-    matcher = pickle.load(f)
+def question_key(question, category=None):
+    """Cache key for a question, or None if the input can't be cached."""
+    if not isinstance(question, str) or (category is not None and not isinstance(category, str)):
+        return None
+    category = category if category and category.strip() else ""
+    return normalize(question), normalize(category)
+
+
+def matching(delta):
+    """Adjust and return the number of requests being matched in this worker."""
+    global _matching
+    with _matching_lock:
+        _matching += delta
+        return _matching
+
+
+def answer_question(question, category=None, top_k=None, deadline=None, busy=False):
+    """Result for one question; deadline (a time.monotonic() value) and busy
+    let the matcher take cheaper tiers, whose results are marked degraded."""
+    # one matcher per request, even if a reload swaps it meanwhile
+    current = get_matcher()
+    result_store = get_result_store()
+    key = question_key(question, category)
+    result = answer_cache.get(key)
+    if result is None:
+        generation = answer_cache.generation
+        result = stored_result(key, current)
+        if result is None:
+            depth = matching(1)
+            try:
+                result = current.process_question(question, category, deadline, busy or 0 < DEGRADE_QUEUE < depth)
+            finally:
+                matching(-1)
+            # a degraded answer is only good for this request
+            if result_store and not result.get("degraded"):
+                result_store.put(key, current.dataset_version, result)
+        if not result.get("degraded"):
+            answer_cache.put(key, result, generation)
+    elif result_store:
+        result_store.touch(key, current.dataset_version)
+
+    if top_k:
+        # ranked alternatives are not cached, only the best answer is;
+        # a degraded request has no time left to rank them
+        if result.get("degraded"):
+            matches = [] if result["match_type"] == "none" else [
+                {"category": result["category"], "answer": result["answer"], "confidence": result["confidence"]}]
+        else:
+            matches = current.top_matches(question, category, top_k)
+        result = dict(result, matches=matches)
+    return result
+
+
+def parse_top_k(value):
+    """Validate the optional top_k request field; raises ValueError."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= MAX_TOP_K:
+        raise ValueError(f"top_k must be an integer between 1 and {MAX_TOP_K}")
+    return value
+
+
+def request_deadline(field=None, header=None, arrived=None):
+    """Deadline (a time.monotonic() value) from the deadline_ms request field
+    and the X-Deadline-Ms header, whichever is tighter, else from
+    FAQ_DEADLINE_MS; None if there is none. Both count from arrived.
+    Raises ValueError."""
+    budgets = []
+    for value in (field, header):
+        if value is None:
+            continue
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                value = None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value <= MAX_DEADLINE_MS:
+            raise ValueError(f"deadline_ms must be a number of milliseconds between 0 and {MAX_DEADLINE_MS}")
+        budgets.append(value)
+    if not budgets and DEFAULT_DEADLINE_MS > 0:
+        budgets.append(DEFAULT_DEADLINE_MS)
+    if not budgets:
+        return None
+    return (monotonic() if arrived is None else arrived) + min(budgets) / 1000
+
+
+def answer_questions(items, deadline=None, busy=False):
+    current = get_matcher()
+    result_store = get_result_store()
+    results = [None] * len(items)
+    keys = [None] * len(items)
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            keys[i] = question_key(item.get("question"), item.get("category"))
+            results[i] = answer_cache.get(keys[i])
+            if results[i] is not None and result_store:
+                result_store.touch(keys[i], current.dataset_version)
+
+    generation = answer_cache.generation
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = stored_result(keys[i], current)
+            if results[i] is not None:
+                answer_cache.put(keys[i], results[i], generation)
+
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        depth = matching(1)
+        try:
+            found = current.process_questions([items[i] for i in misses], deadline, busy or 0 < DEGRADE_QUEUE < depth)
+        finally:
+            matching(-1)
+    else:
+        found = []
+    for i, result in zip(misses, found):
+        results[i] = result
+        if "error" not in result and not result.get("degraded"):
+            answer_cache.put(keys[i], result, generation)
+            if result_store:
+                result_store.put(keys[i], current.dataset_version, result)
+    return results
+
+
+def stored_result(key, current):
+    """Result from the persistent store for the matcher's dataset version, if any."""
+    result_store = get_result_store()
+    if not result_store:
+        return None
+    return result_store.get(key, current.dataset_version)
 
 # ============================================
 # API ENDPOINTS
 # ============================================
+def result_payload(result):
+    if "error" in result:
+        return {"success": False, "error": result["error"]}
+    payload = {
+        "success": True,
+        "category": result['category'],
+        "answer": result['answer'],
+        "match_type": result['match_type'],
+        "confidence": result['confidence'],
+        "degraded": result.get("degraded", False)
+    }
+    if "matches" in result:
+        payload["matches"] = result["matches"]
+    return payload
+
+def observe_request(endpoint, phase, start):
+    if metrics:
+        metrics.observe_request(endpoint, phase, perf_counter() - start)
+
+
 @app.route('/api/process-question', methods=['POST'])
 def process_question():
+    start = perf_counter()
+    arrived = monotonic()
     try:
         data = request.get_json()
+        observe_request("process-question", "parse", start)
         
         if not data or 'question' not in data:
             return jsonify({
@@ -180,17 +374,214 @@ def process_question():
         
         question = data['question']
         category = data.get('category', None)
+        try:
+            top_k = parse_top_k(data.get('top_k'))
+            deadline = request_deadline(data.get('deadline_ms'), request.headers.get(DEADLINE_HEADER), arrived)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
+        result = answer_question(question, category, top_k, deadline)
         
-        result = matcher.process_question(question, category)
+        return jsonify(result_payload(result))
         
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    finally:
+        observe_request("process-question", "total", start)
+
+@app.route('/api/process-questions', methods=['POST'])
+def process_questions():
+    start = perf_counter()
+    arrived = monotonic()
+    try:
+        data = request.get_json()
+        observe_request("process-questions", "parse", start)
+
+        if not data or not isinstance(data.get('questions'), list):
+            return jsonify({
+                "success": False,
+                "error": "A list of questions is required"
+            }), 400
+
+        try:
+            deadline = request_deadline(data.get('deadline_ms'), request.headers.get(DEADLINE_HEADER), arrived)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+
+        results = answer_questions(data['questions'], deadline)
+
         return jsonify({
             "success": True,
-            "category": result['category'],
-            "answer": result['answer'],
-            "match_type": result['match_type'],
-            "confidence": result['confidence']
+            "results": [result_payload(r) for r in results]
         })
-        
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    finally:
+        observe_request("process-questions", "total", start)
+
+def health_payload():
+    matcher = get_matcher()
+    return {
+        "status": "healthy",
+        "service": "FAQ Matcher API",
+        "dataset_version": matcher.dataset_version,
+        "similarity": {
+            "backend": matcher.backend.name,
+            "fallback": matcher.similarity_fallback,
+            "fusion": matcher.fusion_model is not None,
+            "fusion_fallback": matcher.fusion_fallback,
+        },
+        "cache": answer_cache.stats(),
+        "result_store": get_result_store().stats() if get_result_store() else None,
+        "changes": dict(get_faq_changes().status(), base_version=matcher.base_version, applied=matcher.patch_seq),
+        "deadlines": {
+            "default_ms": DEFAULT_DEADLINE_MS or None,
+            "degrade_queue": DEGRADE_QUEUE or None,
+            "matching": _matching,
+            "row_cost_us": round(matcher.row_cost * 1e6, 2) if matcher.row_cost is not None else None,
+        },
+        "reload": get_reloader().status()
+    }
+
+
+def admin_denied(headers):
+    """(status, error) if an admin request must be refused, else None.
+
+    Admin endpoints stay off until FAQ_ADMIN_TOKEN is set."""
+    if not ADMIN_TOKEN:
+        return 403, "Admin endpoints are disabled (set FAQ_ADMIN_TOKEN)"
+    token = headers.get("X-Admin-Token") or ""
+    if not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return 401, "Unauthorized"
+    return None
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    denied = admin_denied(request.headers)
+    if denied:
+        return jsonify({"success": False, "error": denied[1]}), denied[0]
+
+    get_reloader().reload_in_background()
+    return jsonify({
+        "success": True,
+        "status": "reloading",
+        "dataset_version": get_matcher().dataset_version
+    }), 202
+
+def confirm_answer(body, method="POST"):
+    """Record (POST) or remove (DELETE) an operator-confirmed answer for a question.
+
+    The answer must be one of the loaded FAQ answers; answer_category picks
+    the category when several share it. Raises ValueError on bad input and
+    LookupError without a result store."""
+    result_store = get_result_store()
+    if not result_store:
+        raise LookupError("No result store configured (set FAQ_RESULT_STORE)")
+    body = body if isinstance(body, dict) else {}
+    key = question_key(body.get("question"), body.get("category"))
+    if key is None or not key[0]:
+        raise ValueError("Question is required")
+
+    current = get_matcher()
+    if method == "DELETE":
+        removed = result_store.forget(key, current.dataset_version)
+        answer_cache.clear()
+        return {"removed": removed}
+
+    answer, answer_category = body.get("answer"), body.get("answer_category")
+    categories = list(dict.fromkeys(current.answer_categories.get(answer, ()))) if isinstance(answer, str) else []
+    if not categories:
+        raise ValueError("answer must be one of the FAQ answers")
+    if answer_category is not None and answer_category not in categories:
+        raise ValueError("answer_category does not contain this answer")
+
+    result = {
+        "category": answer_category or categories[0],
+        "answer": answer,
+        "match_type": "confirmed",
+        "confidence": 1.0,
+    }
+    result_store.confirm(key, current.dataset_version, result)
+    answer_cache.put(key, result)
+    return {"result": result}
+
+
+@app.route('/admin/confirmed-answers', methods=['POST', 'DELETE'])
+def admin_confirmed_answers():
+    denied = admin_denied(request.headers)
+    if denied:
+        return jsonify({"success": False, "error": denied[1]}), denied[0]
+    try:
+        return jsonify({"success": True, **confirm_answer(request.get_json(silent=True), request.method)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except LookupError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def edit_faq(body):
+    """Apply one FAQ edit, {"op": ..., "category": ..., ...} (see faq_changes.EDITS).
+
+    Raises ValueError on bad input."""
+    body = body if isinstance(body, dict) else {}
+    record = get_faq_changes().edit(body.get("op"), {k: v for k, v in body.items() if k != "op"})
+    if record["base"] != get_matcher().base_version:
+        # the log was compacted into a JSON this process hasn't compiled yet
+        get_reloader().check()
+    apply_changes()
+    return {"change": record, "dataset_version": get_matcher().dataset_version}
+
+
+def compact_faq():
+    """Fold the change log into the JSON, then recompile and load it right
+    away (the file watcher may be off)."""
+    folded = get_faq_changes().compact()
+    reloader = get_reloader()
+    if folded and not reloader.check():
+        raise RuntimeError(f"Compacted, but the reload failed: {reloader.status()['last_error']}")
+    return {"folded": folded, "dataset_version": get_matcher().dataset_version}
+
+
+@app.route('/admin/faq', methods=['POST'])
+def admin_faq():
+    denied = admin_denied(request.headers)
+    if denied:
+        return jsonify({"success": False, "error": denied[1]}), denied[0]
+    try:
+        return jsonify({"success": True, **edit_faq(request.get_json(silent=True))})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/admin/faq/compact', methods=['POST'])
+def admin_faq_compact():
+    denied = admin_denied(request.headers)
+    if denied:
+        return jsonify({"success": False, "error": denied[1]}), denied[0]
+    try:
+        return jsonify({"success": True, **compact_faq()})
     except Exception as e:
         return jsonify({
             "success": False,
@@ -199,10 +590,87 @@ def process_question():
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({
-        "status": "healthy",
-        "service": "FAQ Matcher API"
-    })
+    return jsonify(health_payload())
+
+# ============================================
+# METRICS / PROFILING
+# ============================================
+def metrics_text():
+    """Prometheus text exposition for this worker process."""
+    matcher = get_matcher()
+    cache = answer_cache.stats()
+    reload_status = get_reloader().status()
+    lines = [
+        "# HELP faq_dataset_info Loaded dataset version",
+        "# TYPE faq_dataset_info gauge",
+        f'faq_dataset_info{{version="{matcher.dataset_version}",similarity="{matcher.similarity}"}} 1',
+        "# HELP faq_cache_events_total Answer cache events",
+        "# TYPE faq_cache_events_total counter",
+    ]
+    for event in ("hits", "misses", "evictions", "expirations"):
+        lines.append(f'faq_cache_events_total{{event="{event}"}} {cache[event]}')
+    lines += [
+        "# HELP faq_cache_entries Answers currently cached",
+        "# TYPE faq_cache_entries gauge",
+        f"faq_cache_entries {cache['size']}",
+    ]
+    if get_result_store():
+        store = get_result_store().stats()
+        lines += [
+            "# HELP faq_result_store_events_total Persistent result store events",
+            "# TYPE faq_result_store_events_total counter",
+        ]
+        for event in ("hits", "misses", "writes", "errors"):
+            lines.append(f'faq_result_store_events_total{{event="{event}"}} {store[event]}')
+        if store["rows"] is not None:
+            lines += [
+                "# HELP faq_result_store_rows Stored results (all workers)",
+                "# TYPE faq_result_store_rows gauge",
+                f"faq_result_store_rows {store['rows']}",
+            ]
+    lines += [
+        "# HELP faq_reloads_total Successful model reloads",
+        "# TYPE faq_reloads_total counter",
+        f"faq_reloads_total {reload_status['reloads']}",
+        "# HELP faq_profiler_running Whether the sampling profiler is on",
+        "# TYPE faq_profiler_running gauge",
+        f"faq_profiler_running {int(profiler.running)}",
+    ]
+    if metrics is None:
+        return "\n".join(lines) + "\n"
+    return metrics.render(lines)
+
+
+def profiler_command(body):
+    """Apply {"enabled": bool, "interval_ms": float} and return the profiler report."""
+    body = body or {}
+    if "enabled" in body:
+        if body["enabled"]:
+            interval = body.get("interval_ms")
+            profiler.start(float(interval) / 1000 if interval else None)
+        else:
+            profiler.stop()
+    return profiler.report(int(body.get("limit", 50)))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics_text(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/admin/profiler', methods=['GET', 'POST'])
+def admin_profiler():
+    denied = admin_denied(request.headers)
+    if denied:
+        return jsonify({"success": False, "error": denied[1]}), denied[0]
+
+    try:
+        body = request.get_json(silent=True) if request.method == 'POST' else None
+        return jsonify({"success": True, **profiler_command(body)})
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -211,6 +679,16 @@ if __name__ == '__main__':
     print("Starting server on http://localhost:5001")
     print("Endpoints:")
     print("  POST /api/process-question - Process FAQ question")
+    print("  POST /api/process-questions - Process a batch of FAQ questions")
+    print("  POST /admin/reload - Rebuild and reload the FAQ index")
+    print("  POST|DELETE /admin/confirmed-answers - Operator-confirmed answers")
+    print("  POST /admin/faq - Edit a category, item, question or keyword")
+    print("  POST /admin/faq/compact - Fold the FAQ change log into the JSON")
     print("  GET  /health - Health check")
+    print("  GET  /metrics - Prometheus metrics")
+    print("  GET|POST /admin/profiler - Sampling profiler status / on-off")
     print("=" * 50)
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    print("Development server only - use `python serve.py` in production")
+    get_matcher()
+    get_reloader().start()
+    app.run(host='0.0.0.0', port=5001, debug=os.environ.get("FAQ_DEBUG", "0") == "1")
\ No newline at end of file
@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from time import monotonic, perf_counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import faq_api
+
+# ============================================
+# CONFIG
+# ============================================
+# FAQ_ASGI_EXECUTOR=process runs matching in a process pool (real CPU
+# parallelism); the default thread pool keeps everything in one process.
+EXECUTOR = os.environ.get("FAQ_ASGI_EXECUTOR", "thread")
+EXECUTOR_WORKERS = int(os.environ.get("FAQ_ASGI_WORKERS", os.cpu_count() or 1))
+# distinct computations allowed in flight before new ones get a 503
+MAX_PENDING = int(os.environ.get("FAQ_MAX_PENDING", "64"))
+RETRY_AFTER = os.environ.get("FAQ_RETRY_AFTER", "1")
+
+
+def _process_question(question, category, top_k=None, deadline=None, busy=False, version=None):
+    if version is not None:
+        faq_api.sync_matcher(version)
+    return faq_api.answer_question(question, category, top_k, deadline, busy)
+
+
+def _process_questions(items, deadline=None, busy=False, version=None):
+    if version is not None:
+        faq_api.sync_matcher(version)
+    return faq_api.answer_questions(items, deadline, busy)
+
+
+def deadline_class(deadline):
+    """Coalescing class of a deadline: requests share a computation only if
+    their remaining budgets are within about 20% of each other, so nobody
+    gets an answer degraded for a much tighter deadline, or waits for one
+    computed against a much looser one."""
+    if deadline is None:
+        return None
+    return math.floor(4 * math.log2(max((deadline - monotonic()) * 1000, 1)))
+
+
+def pool_version():
+    """Dataset version process-pool workers must serve (they keep the matcher
+    they forked with until told otherwise); None with the thread pool."""
+    return faq_api.get_matcher().dataset_version if EXECUTOR == "process" else None
+
+
+# ============================================
+# BOUNDED, COALESCING EXECUTOR
+# ============================================
+class Overloaded(Exception):
+    pass
+
+
+class Coalescer:
+    """Runs matcher calls on a bounded executor.
+
+    Identical in-flight requests share one computation; once max_pending
+    distinct computations are queued or running, new ones raise Overloaded
+    instead of growing the queue."""
+
+    def __init__(self, executor, max_pending):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.inflight = {}
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def run(self, key, fn, *args):
+        future = self.inflight.get(key)
+        if future is None:
+            if len(self.inflight) >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded()
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a disconnecting client must not cancel work other requests wait on
+        return await asyncio.shield(future)
+
+    def busy(self):
+        """Whether FAQ_DEGRADE_QUEUE computations are already queued or running."""
+        return 0 < faq_api.DEGRADE_QUEUE <= len(self.inflight)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_coalescer = None
+
+
+def get_coalescer():
+    global _coalescer
+    if _coalescer is None:
+        if EXECUTOR == "process":
+            executor = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS)
+        else:
+            executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS)
+        _coalescer = Coalescer(executor, MAX_PENDING)
+    return _coalescer
+
+
+# ============================================
+# ASGI PLUMBING
+# ============================================
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"Content-Type, X-Deadline-Ms"),
+]
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *CORS_HEADERS,
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def read_json(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        return json.loads(b"".join(chunks) or b"null")
+    except ValueError:
+        return None
+
+
+def request_headers(scope):
+    return {k.decode("latin-1").title(): v.decode("latin-1") for k, v in scope["headers"]}
+
+
+async def overloaded(send):
+    await send_json(send, 503, {
+        "success": False,
+        "error": "Service is busy, please retry"
+    }, [(b"retry-after", RETRY_AFTER.encode())])
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            faq_api.get_matcher()
+            get_coalescer()
+            faq_api.get_reloader().start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            faq_api.get_reloader().stop()
+            if _coalescer is not None:
+                _coalescer.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# ============================================
+# API ENDPOINTS
+# ============================================
+async def process_question(scope, receive, send):
+    start = perf_counter()
+    arrived = monotonic()
+    data = await read_json(receive)
+    faq_api.observe_request("process-question", "parse", start)
+    if not isinstance(data, dict) or not isinstance(data.get("question"), str):
+        await send_json(send, 400, {"success": False, "error": "Question is required"})
+        return
+
+    question = data["question"]
+    category = data.get("category", None)
+    try:
+        top_k = faq_api.parse_top_k(data.get("top_k"))
+        deadline = faq_api.request_deadline(
+            data.get("deadline_ms"), request_headers(scope).get(faq_api.DEADLINE_HEADER), arrived)
+    except ValueError as e:
+        await send_json(send, 400, {"success": False, "error": str(e)})
+        return
+
+    try:
+        # uncacheable inputs get a unique key so they are never coalesced
+        coalescer = get_coalescer()
+        busy = coalescer.busy()
+        key = faq_api.question_key(question, category)
+        key = (key, top_k, deadline_class(deadline), busy) if key is not None else object()
+        result = await coalescer.run(
+            key, _process_question, question, category, top_k, deadline, busy, pool_version())
+    except Overloaded:
+        await overloaded(send)
+        return
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+
+    await send_json(send, 200, faq_api.result_payload(result))
+    faq_api.observe_request("process-question", "total", start)
+
+
+async def process_questions(scope, receive, send):
+    start = perf_counter()
+    arrived = monotonic()
+    data = await read_json(receive)
+    faq_api.observe_request("process-questions", "parse", start)
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list):
+        await send_json(send, 400, {"success": False, "error": "A list of questions is required"})
+        return
+    try:
+        deadline = faq_api.request_deadline(
+            data.get("deadline_ms"), request_headers(scope).get(faq_api.DEADLINE_HEADER), arrived)
+    except ValueError as e:
+        await send_json(send, 400, {"success": False, "error": str(e)})
+        return
+
+    try:
+        # a batch takes one executor slot and is never coalesced
+        coalescer = get_coalescer()
+        results = await coalescer.run(
+            object(), _process_questions, data["questions"], deadline, coalescer.busy(), pool_version())
+    except Overloaded:
+        await overloaded(send)
+        return
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+
+    await send_json(send, 200, {
+        "success": True,
+        "results": [faq_api.result_payload(r) for r in results]
+    })
+    faq_api.observe_request("process-questions", "total", start)
+
+
+async def admin_reload(scope, receive, send):
+    denied = faq_api.admin_denied(request_headers(scope))
+    if denied:
+        await send_json(send, denied[0], {"success": False, "error": denied[1]})
+        return
+
+    faq_api.get_reloader().reload_in_background()
+    await send_json(send, 202, {
+        "success": True,
+        "status": "reloading",
+        "dataset_version": faq_api.get_matcher().dataset_version
+    })
+
+
+async def admin_confirmed_answers(scope, receive, send):
+    denied = faq_api.admin_denied(request_headers(scope))
+    if denied:
+        await send_json(send, denied[0], {"success": False, "error": denied[1]})
+        return
+
+    body = await read_json(receive)
+    try:
+        # a SQLite write, which may wait on another worker's lock
+        payload = await asyncio.get_running_loop().run_in_executor(
+            None, faq_api.confirm_answer, body, scope["method"])
+    except ValueError as e:
+        await send_json(send, 400, {"success": False, "error": str(e)})
+        return
+    except LookupError as e:
+        await send_json(send, 404, {"success": False, "error": str(e)})
+        return
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+    await send_json(send, 200, {"success": True, **payload})
+
+
+async def admin_faq(scope, receive, send):
+    denied = faq_api.admin_denied(request_headers(scope))
+    if denied:
+        await send_json(send, denied[0], {"success": False, "error": denied[1]})
+        return
+
+    body = await read_json(receive)
+    try:
+        # file locking, fsync and patching the matcher must not stall the event loop
+        payload = await asyncio.get_running_loop().run_in_executor(None, faq_api.edit_faq, body)
+    except ValueError as e:
+        await send_json(send, 400, {"success": False, "error": str(e)})
+        return
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+    await send_json(send, 200, {"success": True, **payload})
+
+
+async def admin_faq_compact(scope, receive, send):
+    denied = faq_api.admin_denied(request_headers(scope))
+    if denied:
+        await send_json(send, denied[0], {"success": False, "error": denied[1]})
+        return
+
+    try:
+        payload = await asyncio.get_running_loop().run_in_executor(None, faq_api.compact_faq)
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+    await send_json(send, 200, {"success": True, **payload})
+
+
+async def health(scope, receive, send):
+    # counts rows of the result store, which may wait on another worker's lock
+    payload = await asyncio.get_running_loop().run_in_executor(None, faq_api.health_payload)
+    await send_json(send, 200, payload)
+
+
+async def metrics(scope, receive, send):
+    # the same store queries, plus reading the change log
+    text = await asyncio.get_running_loop().run_in_executor(None, faq_api.metrics_text)
+    coalescer = get_coalescer()
+    text += (
+        "# HELP faq_asgi_coalesced_total Requests that shared an in-flight computation\n"
+        "# TYPE faq_asgi_coalesced_total counter\n"
+        f"faq_asgi_coalesced_total {coalescer.coalesced}\n"
+        "# HELP faq_asgi_rejected_total Requests rejected with 503\n"
+        "# TYPE faq_asgi_rejected_total counter\n"
+        f"faq_asgi_rejected_total {coalescer.rejected}\n"
+        "# HELP faq_asgi_inflight Distinct computations queued or running\n"
+        "# TYPE faq_asgi_inflight gauge\n"
+        f"faq_asgi_inflight {len(coalescer.inflight)}\n"
+    )
+    body = text.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/plain; version=0.0.4"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def admin_profiler(scope, receive, send):
+    denied = faq_api.admin_denied(request_headers(scope))
+    if denied:
+        await send_json(send, denied[0], {"success": False, "error": denied[1]})
+        return
+
+    body = await read_json(receive) if scope["method"] == "POST" else None
+    try:
+        report = faq_api.profiler_command(body if isinstance(body, dict) else None)
+    except Exception as e:
+        await send_json(send, 500, {"success": False, "error": str(e)})
+        return
+    await send_json(send, 200, {"success": True, **report})
+
+
+ROUTES = {
+    ("POST", "/api/process-question"): process_question,
+    ("POST", "/api/process-questions"): process_questions,
+    ("POST", "/admin/reload"): admin_reload,
+    ("POST", "/admin/confirmed-answers"): admin_confirmed_answers,
+    ("DELETE", "/admin/confirmed-answers"): admin_confirmed_answers,
+    ("POST", "/admin/faq"): admin_faq,
+    ("POST", "/admin/faq/compact"): admin_faq_compact,
+    ("GET", "/health"): health,
+    ("GET", "/metrics"): metrics,
+    ("GET", "/admin/profiler"): admin_profiler,
+    ("POST", "/admin/profiler"): admin_profiler,
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["method"] == "OPTIONS":
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await send_json(send, 404, {"success": False, "error": "Not found"})
+        return
+    await handler(scope, receive, send)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the FAQ Matcher API over ASGI (uvicorn)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("The ASGI server needs uvicorn: pip install uvicorn", file=sys.stderr)
+        sys.exit(1)
+
+    print("=" * 50)
+    print("FAQ Matcher API Server (ASGI)")
+    print("=" * 50)
+    print(f"Listening on http://{args.host}:{args.port}")
+    print(f"Executor: {EXECUTOR} x {EXECUTOR_WORKERS}, max pending: {MAX_PENDING}")
+    print("=" * 50)
+    uvicorn.run(app, host=args.host, port=args.port)
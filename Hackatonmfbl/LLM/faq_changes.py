@@ -0,0 +1,390 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from faq_index import BASE_DIR, DATA_PATH, INDEX_PATH, data_keywords, dataset_version, load_matcher, write_export
+from faq_matcher import normalize
+
+try:
+    import fcntl
+except ImportError:  # Windows: edits are only serialized within one process
+    fcntl = None
+
+CHANGES_PATH = os.path.join(BASE_DIR, "faq_changes.jsonl")
+
+# ============================================
+# CHANGE LOG
+# ============================================
+# FAQ edits are appended to faq_changes.jsonl, one JSON record per line:
+#
+#   {"seq": 3, "base": "<dataset version>", "at": "...", "op": "put_category",
+#    "category": "...", "items": [{"answer": ..., "questions": [...]}, ...],
+#    "keywords": [...]}          (keywords only once the category has its own)
+#   {"seq": 4, "base": "...", "at": "...", "op": "delete_category", "category": "..."}
+#
+# Whatever the edit (one question, one keyword, a whole item), the record
+# holds the full category after it, so replaying a record touches exactly one
+# category and replaying it twice changes nothing. "base" is the dataset
+# version of the JSON the record applies to; compaction folds the records
+# into the JSON and starts a new, empty log.
+
+
+def find_category(data, name):
+    cat_norm = normalize(name)
+    for category_obj in data["categories"]:
+        if normalize(category_obj["category"]) == cat_norm:
+            return category_obj
+    return None
+
+
+def apply_to_data(data, record):
+    """Apply one record to the FAQ JSON in place."""
+    cat_norm = normalize(record["category"])
+    categories = data["categories"]
+    position = next((i for i, c in enumerate(categories) if normalize(c["category"]) == cat_norm), None)
+    if record["op"] == "delete_category":
+        if position is not None:
+            del categories[position]
+        return
+    category_obj = {"category": record["category"], "items": copy.deepcopy(record["items"])}
+    if "keywords" in record:
+        category_obj["keywords"] = list(record["keywords"])
+    if position is None:
+        categories.append(category_obj)
+    else:
+        categories[position] = category_obj
+
+
+def apply_to_matcher(matcher, record):
+    """Apply one record to a FAQMatcher in place (see FAQMatcher.put_category)."""
+    if record["op"] == "delete_category":
+        matcher.delete_category(record["category"])
+    else:
+        items = [(item["answer"], [(q, normalize(q)) for q in item["questions"]]) for item in record["items"]]
+        matcher.put_category(record["category"], items, record.get("keywords"))
+    matcher.patch_seq = record["seq"]
+    matcher.dataset_version = f"{matcher.base_version}+{record['seq']}"
+
+
+# ============================================
+# EDITS
+# ============================================
+# Each edit gets a copy of the category (None if it doesn't exist yet), its
+# current keywords and the request fields, and returns the category as it
+# should be afterwards (None deletes it). Bad input raises ValueError.
+
+def _text(fields, key):
+    value = fields.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{key} is required")
+    return value.strip()
+
+
+def _existing(category, fields):
+    if category is None:
+        raise ValueError(f"No category named {fields['category']!r}")
+    return category
+
+
+def _item(category, answer):
+    item = next((i for i in category["items"] if i["answer"] == answer), None)
+    if item is None:
+        raise ValueError(f"No item with this answer in {category['category']!r}")
+    return item
+
+
+def upsert_category(category, keywords, fields):
+    category = category or {"category": _text(fields, "category"), "items": []}
+    if "keywords" in fields:
+        words = fields["keywords"]
+        if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+            raise ValueError("keywords must be a list of strings")
+        category["keywords"] = sorted({normalize(w) for w in words if w.strip()})
+    return category
+
+
+def delete_category(category, keywords, fields):
+    _existing(category, fields)
+    return None
+
+
+def upsert_item(category, keywords, fields):
+    """Add an item, or replace the answer/questions of the one answering
+    previous_answer (default: answer)."""
+    category = _existing(category, fields)
+    answer = _text(fields, "answer")
+    questions = fields.get("questions")
+    if questions is not None and (not isinstance(questions, list) or not questions
+                                  or not all(isinstance(q, str) and q.strip() for q in questions)):
+        raise ValueError("questions must be a non-empty list of strings")
+
+    previous = fields.get("previous_answer") or answer
+    item = next((i for i in category["items"] if i["answer"] == previous), None)
+    if item is None:
+        if questions is None:
+            raise ValueError("questions are required for a new item")
+        category["items"].append({"answer": answer, "questions": [q.strip() for q in questions]})
+    else:
+        item["answer"] = answer
+        if questions is not None:
+            item["questions"] = [q.strip() for q in questions]
+    return category
+
+
+def delete_item(category, keywords, fields):
+    category = _existing(category, fields)
+    category["items"].remove(_item(category, _text(fields, "answer")))
+    return category
+
+
+def add_question(category, keywords, fields):
+    category = _existing(category, fields)
+    item = _item(category, _text(fields, "answer"))
+    question = _text(fields, "question")
+    if normalize(question) not in {normalize(q) for q in item["questions"]}:
+        item["questions"].append(question)
+    return category
+
+
+def delete_question(category, keywords, fields):
+    category = _existing(category, fields)
+    item = _item(category, _text(fields, "answer"))
+    q_norm = normalize(_text(fields, "question"))
+    remaining = [q for q in item["questions"] if normalize(q) != q_norm]
+    if len(remaining) == len(item["questions"]):
+        raise ValueError("The item has no such question")
+    if not remaining:
+        raise ValueError("An item needs at least one question (delete the item instead)")
+    item["questions"] = remaining
+    return category
+
+
+def add_keyword(category, keywords, fields):
+    category = _existing(category, fields)
+    category["keywords"] = sorted(set(keywords) | {normalize(_text(fields, "keyword"))})
+    return category
+
+
+def delete_keyword(category, keywords, fields):
+    category = _existing(category, fields)
+    keyword = normalize(_text(fields, "keyword"))
+    if keyword not in keywords:
+        raise ValueError("The category has no such keyword")
+    category["keywords"] = sorted(set(keywords) - {keyword})
+    return category
+
+
+EDITS = {
+    "upsert_category": upsert_category,
+    "delete_category": delete_category,
+    "upsert_item": upsert_item,
+    "delete_item": delete_item,
+    "add_question": add_question,
+    "delete_question": delete_question,
+    "add_keyword": add_keyword,
+    "delete_keyword": delete_keyword,
+}
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class FAQChanges:
+    """The FAQ JSON plus its change log.
+
+    edit() turns one edit into a category record and appends it to the log
+    under a lock file, so edits from every worker and the CLI are ordered.
+    The JSON with the log applied is kept in memory and caught up from the
+    log tail before each edit; loading the JSON only happens once per
+    process (and after compaction). compact() folds the log into the JSON,
+    which the reloaders then compile as usual."""
+
+    def __init__(self, path=CHANGES_PATH, data_path=DATA_PATH, default_keywords=None, export_path=None):
+        self.path = path
+        self.data_path = data_path
+        self.default_keywords = default_keywords or {}
+        self.export_path = export_path
+        self.lock = threading.Lock()
+        self.data = None
+        self.version = None
+        self.log_id = None
+        self.offset = 0
+        self.pending = 0
+        self.last_seq = 0
+        self.compactions = 0
+
+    @contextmanager
+    def locked(self):
+        with self.lock, open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def read(self, offset=0):
+        """(records, end offset) from offset on; a partly written last line waits."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return [], 0
+        end = chunk.rfind(b"\n") + 1
+        return [json.loads(line) for line in chunk[:end].splitlines() if line.strip()], offset + end
+
+    def records(self, base):
+        """Logged records that apply to a dataset version, in order."""
+        return [r for r in self.read()[0] if r["base"] == base]
+
+    def load(self):
+        with open(self.data_path, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+        self.version = dataset_version(self.data, data_keywords(self.data, self.default_keywords))
+        self.log_id = _file_id(self.path)
+        self.offset = self.pending = self.last_seq = 0
+
+    def sync(self):
+        """Catch the in-memory FAQ up with the log (reloading it after a compaction)."""
+        if self.data is None or _file_id(self.path) != self.log_id:
+            self.load()
+        records, self.offset = self.read(self.offset)
+        for record in records:
+            self.pending += 1
+            if record["base"] == self.version:
+                apply_to_data(self.data, record)
+                self.last_seq = record["seq"]
+
+    def keywords(self, name, category):
+        if category is not None and "keywords" in category:
+            return set(category["keywords"])
+        return set(self.default_keywords.get(name, ()))
+
+    def edit(self, op, fields):
+        """Apply one edit (see EDITS) and return its logged record. Raises ValueError."""
+        if op not in EDITS:
+            raise ValueError(f"Unknown edit {op!r}, expected one of {sorted(EDITS)}")
+        fields = dict(fields, category=_text(fields, "category"))
+        with self.locked():
+            self.sync()
+            current = find_category(self.data, fields["category"])
+            name = current["category"] if current is not None else fields["category"]
+            updated = EDITS[op](copy.deepcopy(current), self.keywords(name, current), fields)
+
+            record = {
+                "seq": self.last_seq + 1,
+                "base": self.version,
+                "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "category": name,
+            }
+            if updated is None:
+                record["op"] = "delete_category"
+            else:
+                record.update(op="put_category", items=updated["items"])
+                if "keywords" in updated:
+                    record["keywords"] = updated["keywords"]
+
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.log_id is None:
+                self.log_id = _file_id(self.path)
+            self.offset += len(line)
+            self.pending += 1
+            self.last_seq = record["seq"]
+            apply_to_data(self.data, record)
+        return record
+
+    def compact(self):
+        """Fold the log into the FAQ JSON and start an empty log; returns the records folded."""
+        with self.locked():
+            self.sync()
+            folded = self.pending
+            if not folded:
+                return 0
+            tmp = f"{self.data_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self.data, ensure_ascii=False, indent=2))
+            os.replace(tmp, self.data_path)
+            # a new file, so every process notices the log was restarted
+            with open(f"{self.path}.tmp", "wb"):
+                pass
+            os.replace(f"{self.path}.tmp", self.path)
+            if self.export_path:
+                write_export(self.data, self.export_path)
+            self.data = None
+            self.compactions += 1
+        return folded
+
+    def status(self):
+        return {
+            "path": self.path,
+            "pending": self.pending if self.data is not None else len(self.read()[0]),
+            "compactions": self.compactions,
+        }
+
+
+def load_current(index_path=INDEX_PATH, changes_path=CHANGES_PATH, **options):
+    """A matcher for the compiled index with the edits logged since it was compiled applied."""
+    matcher = load_matcher(index_path, **options)
+    for record in FAQChanges(changes_path).records(matcher.base_version):
+        apply_to_matcher(matcher, record)
+    return matcher
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from faqmodel import CATEGORY_KEYWORDS, EXPORT_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Edit the FAQ without recompiling it: changes go to the change log, which running "
+                    "API workers pick up within FAQ_WATCH_INTERVAL seconds")
+    parser.add_argument("op", choices=sorted(EDITS) + ["compact", "pending"],
+                        help="edit to apply; `compact` folds the log into the JSON, `pending` lists it")
+    parser.add_argument("--category")
+    parser.add_argument("--answer")
+    parser.add_argument("--previous-answer", help="upsert_item: answer text of the item to change")
+    parser.add_argument("--question")
+    parser.add_argument("--questions", nargs="+", help="upsert_item: all questions of the item")
+    parser.add_argument("--keyword")
+    parser.add_argument("--keywords", nargs="*", help="upsert_category: the category's keyword set")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--log", default=CHANGES_PATH)
+    parser.add_argument("--export", default=EXPORT_PATH, help="BankAPI export rewritten on compaction ('' to skip)")
+    args = parser.parse_args(argv)
+
+    changes = FAQChanges(args.log, args.data, CATEGORY_KEYWORDS, args.export or None)
+    if args.op == "pending":
+        for record in changes.read()[0]:
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+    if args.op == "compact":
+        print(f"Folded {changes.compact()} change(s) into {args.data}")
+        return 0
+
+    fields = {k: v for k, v in vars(args).items()
+              if k in ("category", "answer", "previous_answer", "question", "questions", "keyword", "keywords")
+              and v is not None}
+    try:
+        record = changes.edit(args.op, fields)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Logged change {record['seq']} ({record['op']} {record['category']!r})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
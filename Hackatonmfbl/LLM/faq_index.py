@@ -0,0 +1,385 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+
+from faq_matcher import FAQMatcher, iter_categories
+from lazy_import import LazyModule
+from similarity import BackendUnavailable, EmbeddingSimilarity, SequenceMatcherSimilarity, TfidfSimilarity
+
+np = LazyModule("numpy")
+
+# ============================================
+# COMPILED INDEX FORMAT
+# ============================================
+# A single little-endian file, opened with mmap:
+#
+#   header   magic "FAQINDEX", format version (u32), section count (u32)
+#   table    per section: name (16 bytes), typecode (1 byte), pad (7 bytes),
+#            offset (u64), length in bytes (u64)
+#   payload  sections, each aligned to 8 bytes
+#
+# Typecodes follow the array module: "B" raw bytes, "H" uint16, "I" uint32,
+# "i" int32, "q" int64, "f" float32, "d" float64. All strings (category names, answers, questions, keywords,
+# n-grams) live once in a shared table and sections refer to them by id.
+#
+# Every worker process maps the same file, so the page cache holds one copy
+# of the arrays and vectors however many workers there are; only the Python
+# objects built on top (lookup dicts, decoded questions) are per process.
+# A rebuilt index replaces the file atomically (os.replace) and each process
+# maps the new one on reload, while in-flight requests finish on the old one.
+
+MAGIC = b"FAQINDEX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sII")
+SECTION = struct.Struct("<16sc7xQQ")
+ALIGN = 8
+
+# data files live next to the code, whatever the working directory is
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "PitanjaOdgovoriJSON.json")
+INDEX_PATH = os.path.join(BASE_DIR, "faq_matcher_index.bin")
+
+
+class IndexFormatError(Exception):
+    pass
+
+
+def dataset_version(data, category_keywords):
+    """Content hash of the FAQ data and keyword tables."""
+    canonical = json.dumps(
+        {"data": data, "keywords": {k: sorted(v) for k, v in category_keywords.items()}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def data_keywords(data, defaults):
+    """Keyword tables for the categories of a dataset.
+
+    A category's own "keywords" list (written by faq_changes.py) wins over
+    the defaults; categories not in the data are left out."""
+    keywords = {}
+    for category_obj in data["categories"]:
+        name = category_obj["category"]
+        words = category_obj.get("keywords", defaults.get(name))
+        if words is not None:
+            keywords.setdefault(name, set(words))
+    return keywords
+
+
+class IndexWriter:
+    def __init__(self):
+        self.string_ids = {}
+        self.sections = []
+
+    def string(self, text: str) -> int:
+        sid = self.string_ids.get(text)
+        if sid is None:
+            sid = self.string_ids[text] = len(self.string_ids)
+        return sid
+
+    def add(self, name: str, typecode: str, values):
+        if isinstance(values, (bytes, bytearray)):
+            payload = values
+        else:
+            payload = array(typecode, values).tobytes()
+        self.sections.append((name, typecode, bytes(payload)))
+
+    def write(self, path: str):
+        # string table goes last so every string() call above is included
+        blob = bytearray()
+        offsets = [0]
+        for text in self.string_ids:
+            blob += text.encode("utf-8")
+            offsets.append(len(blob))
+        self.add("strings", "B", blob)
+        self.add("string_offsets", "q", offsets)
+
+        table_size = HEADER.size + SECTION.size * len(self.sections)
+        offset = _align(table_size)
+        table, payloads = [], []
+        for name, typecode, payload in self.sections:
+            table.append(SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), offset, len(payload)))
+            payloads.append((offset, payload))
+            offset = _align(offset + len(payload))
+
+        # write next to the target and rename, so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.sections)))
+            f.write(b"".join(table))
+            for offset, payload in payloads:
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(payload)
+        os.replace(tmp_path, path)
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class StringTable:
+    """The index's string table, decoded on access instead of all at load."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, sid: int):
+        """The UTF-8 bytes of a string, as a zero-copy memoryview."""
+        return self.blob[self.offsets[sid]:self.offsets[sid + 1]]
+
+    def __getitem__(self, sid: int) -> str:
+        return str(self.raw(sid), "utf-8")
+
+
+class CompiledIndex:
+    """Read-only view of a compiled index file backed by mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.buffer)
+
+        magic, version, count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise IndexFormatError(f"{path} is not a compiled FAQ index")
+        if version != FORMAT_VERSION:
+            raise IndexFormatError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+
+        self.sections = {}
+        for i in range(count):
+            name, typecode, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (typecode.decode("ascii"), offset, length)
+        self.view = view
+
+        self.strings = StringTable(self.array("strings"), self.array("string_offsets"))
+        self.meta = json.loads(self.strings[self.array("meta")[0]])
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def array(self, name: str):
+        """Zero-copy memoryview of a section, cast to its typecode."""
+        typecode, offset, length = self.sections[name]
+        return self.view[offset:offset + length].cast(typecode)
+
+    def numpy(self, name: str):
+        typecode, offset, length = self.sections[name]
+        dtype = {"B": np.uint8, "H": np.uint16, "I": np.uint32, "i": np.int32, "q": np.int64, "f": np.float32, "d": np.float64}[typecode]
+        return np.frombuffer(self.buffer, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    def text(self, name: str):
+        strings = self.strings
+        return [strings[sid] for sid in self.array(name)]
+
+
+# ============================================
+# BUILD
+# ============================================
+def build_index(data, category_keywords, path: str = INDEX_PATH, embedding_model=None):
+    """Compile the FAQ JSON and keyword tables into an index file; returns its meta.
+
+    Question embeddings are included when an embedding model is configured
+    (embedding_model or FAQ_EMBEDDING_MODEL) and can be loaded."""
+    categories = list(iter_categories(data))
+    writer = IndexWriter()
+    s = writer.string
+
+    cat_name, cat_norm = [], []
+    item_category, item_answer = [], []
+    q_item, q_text, q_norm = [], [], []
+    for category_name, category_norm, items in categories:
+        cat_name.append(s(category_name))
+        cat_norm.append(s(category_norm))
+        for answer, questions in items:
+            item_category.append(len(cat_name) - 1)
+            item_answer.append(s(answer))
+            for question, question_norm in questions:
+                q_item.append(len(item_answer) - 1)
+                q_text.append(s(question))
+                q_norm.append(s(question_norm))
+
+    writer.add("cat_name", "i", cat_name)
+    writer.add("cat_norm", "i", cat_norm)
+    writer.add("item_category", "i", item_category)
+    writer.add("item_answer", "i", item_answer)
+    writer.add("q_item", "i", q_item)
+    writer.add("q_text", "i", q_text)
+    writer.add("q_norm", "i", q_norm)
+
+    kw_category, kw_text = [], []
+    for category_name, keywords in category_keywords.items():
+        for keyword in sorted(keywords):
+            kw_category.append(s(category_name))
+            kw_text.append(s(keyword))
+    writer.add("kw_category", "i", kw_category)
+    writer.add("kw_text", "i", kw_text)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "dataset_version": dataset_version(data, category_keywords),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "categories": len(cat_name),
+        "questions": len(q_text),
+        "tfidf_ngram_range": None,
+        "embedding_model": None,
+    }
+
+    matcher = FAQMatcher.from_categories(categories, category_keywords)
+    lengths, alphabet, char_counts = SequenceMatcherSimilarity().fit(matcher.corpus.row_questions).to_arrays()
+    writer.add("seq_lengths", "i", lengths)
+    writer.add("seq_alphabet", "i", [s(alphabet)])
+    writer.add("seq_counts", char_counts.typecode, char_counts)
+
+    if np:
+        tfidf = TfidfSimilarity().fit(matcher.corpus.row_questions)
+        grams, idf, values, indices, indptr = tfidf.to_arrays()
+        writer.add("tfidf_grams", "i", [s(g) for g in grams])
+        writer.add("tfidf_idf", "d", idf.astype("<f8").tobytes())
+        writer.add("tfidf_data", "d", values.astype("<f8").tobytes())
+        writer.add("tfidf_indices", "i", indices.astype("<i4").tobytes())
+        writer.add("tfidf_indptr", "i", indptr.astype("<i4").tobytes())
+        meta["tfidf_ngram_range"] = list(tfidf.ngram_range)
+
+        embedding_model = embedding_model or matcher_options()["embedding_model"]
+        try:
+            embedding = EmbeddingSimilarity(embedding_model).fit(matcher.corpus.row_questions)
+        except BackendUnavailable:
+            embedding = None
+        if embedding is not None:
+            writer.add("emb_vectors", "f", embedding.matrix.astype("<f4").tobytes())
+            meta["embedding_model"] = embedding_model
+            meta["embedding_dim"] = int(embedding.matrix.shape[1])
+
+    writer.add("meta", "i", [s(json.dumps(meta, ensure_ascii=False))])
+    writer.write(path)
+    return meta
+
+
+def write_export(data, path: str):
+    """Write the flat question index BankAPI loads from Data/faq_export.json."""
+    index = [
+        {
+            "original_question": question,
+            "normalized_question": question_norm,
+            "category": category_name,
+            "answer": answer,
+        }
+        for category_name, _, items in iter_categories(data)
+        for answer, questions in items
+        for question, question_norm in questions
+        if question != "Basic"
+    ]
+    export = {
+        "index": index,
+        "categories": [c["category"] for c in data["categories"]],
+        "total_questions": len(index),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(export, ensure_ascii=False, indent=2))
+
+
+# ============================================
+# LOAD
+# ============================================
+def matcher_options(environ=None):
+    """FAQMatcher options from FAQ_* environment variables (see README)."""
+    env = os.environ if environ is None else environ
+    return {
+        # FAQ_SIMILARITY=tfidf switches to the vectorized backend (needs numpy/scipy)
+        "similarity": env.get("FAQ_SIMILARITY", "sequence"),
+        "similarity_threshold": float(env.get("FAQ_SIMILARITY_THRESHOLD", "0.55")),
+        "use_similar": env.get("FAQ_SIMILAR_MATCH", "1") != "0",
+        "use_keyword_fallback": env.get("FAQ_KEYWORD_FALLBACK", "1") != "0",
+        "keyword_word_boundary": env.get("FAQ_KEYWORD_WORD_BOUNDARY", "0") == "1",
+        "keyword_fold_diacritics": env.get("FAQ_KEYWORD_FOLD_DIACRITICS", "0") == "1",
+        # FAQ_SHORTLIST=N scores only the N best trigram candidates (0 = score every question)
+        "shortlist_size": int(env.get("FAQ_SHORTLIST", "0")),
+        # FAQ_NORMALIZATION=fold,punct,stopwords,stem cleans text for the similarity stage
+        "normalization": env.get("FAQ_NORMALIZATION", ""),
+        # FAQ_SIMILARITY=embedding uses this local sentence-embedding model directory
+        "embedding_model": env.get("FAQ_EMBEDDING_MODEL") or None,
+        # FAQ_FUSION=1 replaces the keyword/similarity chain with one calibrated fused score
+        "fusion": env.get("FAQ_FUSION", "0") == "1",
+        "fusion_weights": env.get("FAQ_FUSION_WEIGHTS") or None,
+        "fusion_threshold": float(env.get("FAQ_FUSION_THRESHOLD", "0.5")),
+        # FAQ_DEGRADED_SHORTLIST=N: trigram candidates scored when a deadline is short (0 = skip scoring)
+        "degraded_shortlist": int(env.get("FAQ_DEGRADED_SHORTLIST", "32")),
+    }
+
+
+def load_matcher(path: str = INDEX_PATH, **options):
+    """Open a compiled index and build a FAQMatcher from it without re-normalizing."""
+    index = CompiledIndex(path)
+    strings = index.strings
+
+    categories = [(strings[n], strings[nn], []) for n, nn in zip(index.array("cat_name"), index.array("cat_norm"))]
+    items = []
+    for cat, answer in zip(index.array("item_category"), index.array("item_answer")):
+        item = (strings[answer], [])
+        categories[cat][2].append(item)
+        items.append(item)
+    # matching only needs normalized questions; original texts stay in the
+    # file except for the "Basic" markers, which decide what is a row
+    row_questions = []
+    # one str object per distinct question, however many items repeat it
+    decoded = {}
+    for item, text, norm in zip(index.array("q_item"), index.array("q_text"), index.array("q_norm")):
+        question_norm = decoded.get(norm)
+        if question_norm is None:
+            question_norm = decoded[norm] = strings[norm]
+        if strings.raw(text) == b"Basic":
+            items[item][1].append(("Basic", question_norm))
+        else:
+            items[item][1].append((None, question_norm))
+            row_questions.append(question_norm)
+
+    category_keywords = {}
+    for category_name, keyword in zip(index.text("kw_category"), index.text("kw_text")):
+        category_keywords.setdefault(category_name, set()).add(keyword)
+
+    # only the backends these options use are attached (numpy stays unimported
+    # for the default difflib matcher)
+    backends = {}
+    if "seq_counts" in index:
+        backends["sequence"] = SequenceMatcherSimilarity.from_arrays(
+            row_questions,
+            index.array("seq_lengths"),
+            strings[index.array("seq_alphabet")[0]],
+            index.array("seq_counts"),
+        )
+    uses_tfidf = options.get("similarity") == "tfidf" or options.get("fusion")
+    if uses_tfidf and "tfidf_idf" in index and np:
+        backends["tfidf"] = TfidfSimilarity.from_arrays(
+            index.text("tfidf_grams"),
+            index.numpy("tfidf_idf"),
+            index.numpy("tfidf_data"),
+            index.numpy("tfidf_indices"),
+            index.numpy("tfidf_indptr"),
+            index.meta["tfidf_ngram_range"],
+        )
+
+    model = options.get("embedding_model")
+    if (options.get("similarity") == "embedding" and "emb_vectors" in index
+            and index.meta.get("embedding_model") == model and np):
+        vectors = index.numpy("emb_vectors").reshape(-1, index.meta["embedding_dim"])
+        try:
+            backends["embedding"] = EmbeddingSimilarity.from_vectors(vectors, model)
+        except BackendUnavailable:
+            pass  # configure() falls back to the string matcher
+
+    matcher = FAQMatcher.from_categories(categories, category_keywords, backends=backends, **options)
+    matcher.dataset_version = matcher.base_version = index.meta["dataset_version"]
+    # keep the mapping alive for the zero-copy arrays the backends hold
+    matcher.compiled_index = index
+    return matcher
@@ -0,0 +1,1008 @@
+import copy
+import re
+from array import array
+from time import monotonic, perf_counter
+
+from candidates import TrigramIndex
+from fusion import FUSION_WEIGHTS_PATH, ScoreFusion
+from keyword_automaton import KeywordAutomaton
+from similarity import BackendUnavailable, SequenceMatcherSimilarity, make_backend
+from text_pipeline import TextPipeline, parse_steps
+
+
+# ============================================
+# NORMALIZATION
+# ============================================
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def iter_categories(data):
+    """Yield (category, normalized category, items) from the FAQ JSON.
+
+    items is a list of (answer, [(question, normalized question), ...])."""
+    for category_obj in data["categories"]:
+        category_name = category_obj["category"]
+        yield category_name, normalize(category_name), [
+            (item["answer"], [(q, normalize(q)) for q in item["questions"]])
+            for item in category_obj["items"]
+        ]
+
+
+# ============================================
+# COMPACT CORPUS
+# ============================================
+class Corpus:
+    """Array-backed FAQ corpus.
+
+    Category names and answers are interned and referred to by integer id.
+    An item is a (category id, answer id) pair, and every stored non-"Basic"
+    question is a row: its normalized text and its item id, kept in
+    parallel arrays."""
+
+    __slots__ = ("categories", "answers", "category_ids", "answer_ids",
+                 "item_category", "item_answer", "row_questions", "row_item")
+
+    def __init__(self):
+        self.categories = []
+        self.answers = []
+        self.category_ids = {}
+        self.answer_ids = {}
+        self.item_category = array("i")
+        self.item_answer = array("i")
+        self.row_questions = []
+        self.row_item = array("i")
+
+    def __len__(self):
+        return len(self.row_questions)
+
+    @staticmethod
+    def intern(values, ids, value) -> int:
+        vid = ids.get(value)
+        if vid is None:
+            vid = ids[value] = len(values)
+            values.append(value)
+        return vid
+
+    def add_item(self, category_name: str, answer: str) -> int:
+        self.item_category.append(self.intern(self.categories, self.category_ids, category_name))
+        self.item_answer.append(self.intern(self.answers, self.answer_ids, answer))
+        return len(self.item_answer) - 1
+
+    def add_row(self, question_norm: str, item: int):
+        self.row_questions.append(question_norm)
+        self.row_item.append(item)
+
+    def copy(self):
+        corpus = Corpus()
+        corpus.categories = list(self.categories)
+        corpus.answers = list(self.answers)
+        corpus.category_ids = dict(self.category_ids)
+        corpus.answer_ids = dict(self.answer_ids)
+        corpus.item_category = array("i", self.item_category)
+        corpus.item_answer = array("i", self.item_answer)
+        corpus.row_questions = list(self.row_questions)
+        corpus.row_item = array("i", self.row_item)
+        return corpus
+
+    def item(self, item: int):
+        """(category name, answer) of an item."""
+        return self.categories[self.item_category[item]], self.answers[self.item_answer[item]]
+
+    def row(self, row: int):
+        return self.item(self.row_item[row])
+
+
+class Segment:
+    """Stored questions of a category changed since the index was compiled.
+
+    Their rows are appended to the corpus and scored by a backend derived
+    from the matcher's (same vocabulary and idf, or the same encoder), so
+    scores compare with those of the compiled rows."""
+
+    __slots__ = ("rows", "backend")
+
+    def __init__(self, rows, backend):
+        self.rows = rows
+        self.backend = backend
+
+    def __len__(self):
+        return len(self.rows)
+
+    def best(self, text: str, stats=None, deadline=None):
+        """(corpus row, score) of the best question, or (None, 0.0)."""
+        if not self.rows:
+            return None, 0.0
+        local, score = self.backend.best_match(text, 0, len(self.rows), stats, deadline)
+        return (None if local is None else self.rows[local]), score
+
+    def ranked(self, text: str):
+        if not self.rows:
+            return []
+        scores = self.backend.score_rows(text, range(len(self.rows)))
+        return [(self.rows[i], float(score)) for i, score in enumerate(scores) if score > 0]
+
+
+# ============================================
+# FAQ MATCHER CLASS
+# ============================================
+class FAQMatcher:
+    similarity = "sequence"
+    similarity_threshold = 0.55
+    use_similar = True
+    use_keyword_fallback = True
+    # confidence of a keyword-fallback answer (the category's Basic answer)
+    keyword_fallback_confidence = 0.5
+    keyword_word_boundary = False
+    keyword_fold_diacritics = False
+    # > 0: only the best N trigram candidates are scored by the similarity backend
+    shortlist_size = 0
+    # extra similarity-stage normalization steps, see text_pipeline.py
+    normalization = ()
+    # local sentence-embedding model directory for similarity="embedding"
+    embedding_model = None
+    # why the configured similarity backend couldn't be used, if it couldn't
+    similarity_fallback = None
+    # fuse keyword, lexical and semantic signals into one calibrated score
+    # (see fusion.py) instead of running the keyword/similarity fallback chain
+    fusion = False
+    fusion_weights = FUSION_WEIGHTS_PATH
+    fusion_threshold = 0.5
+    fusion_model = None
+    fusion_fallback = None
+    # set when loaded from a compiled index (see faq_index.py); once changes
+    # from the FAQ change log are applied it becomes "<base_version>+<patch_seq>"
+    dataset_version = None
+    base_version = None
+    patch_seq = 0
+    # optional MatcherMetrics (see metrics.py); None keeps the hot path untimed
+    metrics = None
+    # deadline-aware matching (see similarity_within): a question short on
+    # time scores only this many trigram candidates (0: skips the similarity
+    # stage instead); full scans check the clock every deadline_chunk rows
+    degraded_shortlist = 32
+    deadline_chunk = 256
+    # moving averages of the time to score one stored question and to fuse
+    # one question, measured on requests that carry a deadline
+    row_cost = None
+    fusion_cost = None
+
+    def __init__(self, data, category_keywords, **options):
+        self.category_keywords = category_keywords
+        self.prebuilt_backends = {}
+        self.build_index(iter_categories(data))
+        self.configure(**options)
+
+    @classmethod
+    def from_categories(cls, categories, category_keywords, backends=None, **options):
+        """Build from already normalized category tuples (see iter_categories).
+
+        Only the normalized question texts are used, so an original text other
+        than "Basic" may be None. backends maps similarity names to fitted backends, which configure()
+        then uses instead of refitting."""
+        matcher = cls.__new__(cls)
+        matcher.category_keywords = category_keywords
+        matcher.prebuilt_backends = dict(backends or {})
+        matcher.build_index(categories)
+        matcher.configure(**options)
+        return matcher
+
+    def configure(self, similarity=None, similarity_threshold=None,
+                  use_similar=None, use_keyword_fallback=None,
+                  keyword_word_boundary=None, keyword_fold_diacritics=None,
+                  shortlist_size=None, normalization=None, embedding_model=None,
+                  fusion=None, fusion_weights=None, fusion_threshold=None,
+                  degraded_shortlist=None):
+        """Select the similarity backend, text normalization, keyword matching,
+        shortlisting, score fusion, fallbacks and the degraded shortlist size."""
+        if similarity is not None:
+            self.similarity = similarity
+        if similarity_threshold is not None:
+            self.similarity_threshold = similarity_threshold
+        if use_similar is not None:
+            self.use_similar = use_similar
+        if use_keyword_fallback is not None:
+            self.use_keyword_fallback = use_keyword_fallback
+        if keyword_word_boundary is not None:
+            self.keyword_word_boundary = keyword_word_boundary
+        if keyword_fold_diacritics is not None:
+            self.keyword_fold_diacritics = keyword_fold_diacritics
+        if shortlist_size is not None:
+            self.shortlist_size = shortlist_size
+        if normalization is not None:
+            self.normalization = parse_steps(normalization)
+        if embedding_model is not None:
+            self.embedding_model = embedding_model
+        if fusion is not None:
+            self.fusion = fusion
+        if fusion_weights is not None:
+            self.fusion_weights = fusion_weights
+        if fusion_threshold is not None:
+            self.fusion_threshold = fusion_threshold
+        if degraded_shortlist is not None:
+            self.degraded_shortlist = degraded_shortlist
+
+        self.build_keyword_automaton()
+
+        # similarity-stage text of every stored question, computed once here;
+        # queries only run the pipeline on their own text
+        self.text_pipeline = TextPipeline(self.normalization)
+        questions = self.corpus.row_questions
+        self.match_texts = [self.text_pipeline(q) for q in questions] if self.text_pipeline else questions
+
+        # prebuilt backends were fitted on the plain normalized questions
+        self.backend = None if self.normalization else self.prebuilt_backends.get(self.similarity)
+        self.similarity_fallback = None
+        if self.backend is None:
+            options = {"model": self.embedding_model} if self.similarity == "embedding" else {}
+            try:
+                self.backend = make_backend(self.similarity, **options).fit(self.match_texts)
+            except BackendUnavailable as e:
+                # e.g. no local embedding model: keep answering with the string matcher
+                self.similarity_fallback = str(e)
+                self.backend = SequenceMatcherSimilarity().fit(self.match_texts)
+
+        if self.candidate_steps != self.normalization:
+            self.candidate_index = None
+        # the degraded tiers build it on first use (see shortlist_index)
+        if self.shortlist_size:
+            self.shortlist_index()
+
+        self.fusion_model = None
+        self.fusion_fallback = None
+        if self.fusion and self.use_similar:
+            try:
+                self.fusion_model = ScoreFusion.for_matcher(self, self.fusion_weights)
+            except BackendUnavailable as e:
+                # no numpy or no fitted weights: keep the fallback chain
+                self.fusion_fallback = str(e)
+
+    def build_keyword_automaton(self):
+        # only categories present in the dataset (every name is a key of basic_answers)
+        self.keyword_automaton = KeywordAutomaton(
+            {c: k for c, k in self.category_keywords.items() if c in self.basic_answers},
+            word_boundary=self.keyword_word_boundary,
+            fold_diacritics=self.keyword_fold_diacritics,
+        )
+
+    def build_index(self, categories):
+        """Precompute normalized question -> item lookups over a compact Corpus."""
+        self.corpus = corpus = Corpus()
+        # normalized question -> item id
+        self.exact_index = {}
+        # normalized category -> category id / {normalized question -> item id}
+        self.category_ids = {}
+        self.category_index = {}
+        # each category occupies a contiguous (start, end) slice of corpus rows
+        self.category_rows = {}
+        self.basic_answers = {}
+        # answers still in the FAQ: answer -> [category name, ...] and
+        # normalized category -> [(category name, answer), ...]; the corpus
+        # keeps the answers of replaced and deleted items too
+        self.answer_categories = {}
+        self.category_answers = {}
+        self.candidate_index = None
+        self.candidate_steps = None
+
+        for category_name, cat_norm, items in categories:
+            # first category / question wins, same as the old linear scan
+            first = cat_norm not in self.category_ids
+            if first:
+                self.category_ids[cat_norm] = corpus.intern(corpus.categories, corpus.category_ids, category_name)
+                self.category_index[cat_norm] = {}
+
+            start = len(corpus)
+            for answer, questions in items:
+                item = corpus.add_item(category_name, answer)
+                self.add_answer(cat_norm, category_name, answer)
+                if [q for q, _ in questions] == ["Basic"]:
+                    self.basic_answers.setdefault(category_name, answer)
+                for q, q_norm in questions:
+                    self.exact_index.setdefault(q_norm, item)
+                    if first:
+                        self.category_index[cat_norm].setdefault(q_norm, item)
+                    if q != "Basic":
+                        corpus.add_row(q_norm, item)
+            if first:
+                self.category_rows[cat_norm] = (start, len(corpus))
+            self.basic_answers.setdefault(category_name, None)
+
+        # changed categories (see put_category) and the compiled rows still in use
+        self.segments = {}
+        self.live_ranges = [(0, len(corpus))]
+        self.patched = False
+
+    # ============================================
+    # INCREMENTAL UPDATES
+    # ============================================
+    def patched_copy(self):
+        """A copy to apply put_category/delete_category to while requests
+        keep reading this matcher.
+
+        The lookup tables and the corpus are copied; compiled backends,
+        Segments and inner per-category tables are shared, as edits replace
+        them rather than change them."""
+        clone = copy.copy(self)
+        clone.corpus = self.corpus.copy()
+        clone.exact_index = dict(self.exact_index)
+        clone.category_ids = dict(self.category_ids)
+        clone.category_index = dict(self.category_index)
+        clone.category_rows = dict(self.category_rows)
+        clone.segments = dict(self.segments)
+        clone.live_ranges = list(self.live_ranges)
+        clone.basic_answers = dict(self.basic_answers)
+        clone.answer_categories = {a: list(names) for a, names in self.answer_categories.items()}
+        clone.category_answers = {c: list(pairs) for c, pairs in self.category_answers.items()}
+        if self.match_texts is self.corpus.row_questions:
+            clone.match_texts = clone.corpus.row_questions
+        else:
+            clone.match_texts = list(self.match_texts)
+        return clone
+
+    def put_category(self, category_name: str, items, keywords=None):
+        """Replace or add one category without rebuilding the matcher.
+
+        items is a list of (answer, [(question, normalized question), ...]),
+        as from iter_categories; keywords, if given, replace the category's
+        keyword set. The work depends on the size of this category, not of
+        the FAQ. Its items and rows are appended to the corpus, and its
+        compiled rows are masked. Its questions are then scored by a
+        Segment. Equal scores between the category and the rest of the FAQ
+        may be broken in another order than after a full rebuild. Score
+        fusion stays off until the index is recompiled."""
+        cat_norm = normalize(category_name)
+        corpus = self.corpus
+        category_index = {}
+        rows = array("i")
+        basic = None
+        self.drop_answers(cat_norm)
+        for answer, questions in items:
+            item = corpus.add_item(category_name, answer)
+            self.add_answer(cat_norm, category_name, answer)
+            if [q for q, _ in questions] == ["Basic"] and basic is None:
+                basic = answer
+            for q, q_norm in questions:
+                category_index.setdefault(q_norm, item)
+                if q != "Basic":
+                    rows.append(len(corpus))
+                    corpus.add_row(q_norm, item)
+
+        texts = [corpus.row_questions[r] for r in rows]
+        if self.match_texts is not corpus.row_questions:
+            texts = [self.text_pipeline(t) for t in texts]
+            self.match_texts.extend(texts)
+        segment = Segment(rows, self.backend.derive(texts))
+
+        is_new = cat_norm not in self.category_ids
+        old_questions = set(self.category_index.get(cat_norm, ()))
+        if not is_new:
+            # the name may be spelled differently now
+            self.basic_answers.pop(corpus.categories[self.category_ids[cat_norm]], None)
+        self.drop_rows(cat_norm)
+        self.category_ids[cat_norm] = corpus.intern(corpus.categories, corpus.category_ids, category_name)
+        self.category_index[cat_norm] = category_index
+        self.segments[cat_norm] = segment
+        self.category_rows[cat_norm] = [segment]
+        self.basic_answers[category_name] = basic
+        for q_norm in old_questions | category_index.keys():
+            self.resolve_exact(q_norm)
+        if keywords is not None:
+            # copied: the table may be shared with other matchers
+            self.category_keywords = dict(self.category_keywords)
+            self.category_keywords[category_name] = set(keywords)
+        if keywords is not None or is_new:
+            self.build_keyword_automaton()
+        self.stop_fusion()
+
+    def delete_category(self, category_name: str) -> bool:
+        """Remove a category and its questions; False if there is none."""
+        cat_norm = normalize(category_name)
+        if cat_norm not in self.category_ids:
+            return False
+        category_name = self.corpus.categories[self.category_ids[cat_norm]]
+        questions = self.category_index.pop(cat_norm)
+        self.drop_rows(cat_norm)
+        self.drop_answers(cat_norm)
+        del self.category_ids[cat_norm]
+        self.basic_answers.pop(category_name, None)
+        self.category_keywords = {c: k for c, k in self.category_keywords.items() if c != category_name}
+        for q_norm in questions:
+            self.resolve_exact(q_norm)
+        self.build_keyword_automaton()
+        self.stop_fusion()
+        return True
+
+    def drop_rows(self, cat_norm: str):
+        """Take a category's rows (a compiled slice or a Segment) out of matching."""
+        self.patched = True
+        rows = self.category_rows.pop(cat_norm, None)
+        self.segments.pop(cat_norm, None)
+        if not isinstance(rows, tuple):
+            return
+        start, end = rows
+        live = []
+        for s, e in self.live_ranges:
+            if e <= start or s >= end:
+                live.append((s, e))
+                continue
+            if s < start:
+                live.append((s, start))
+            if end < e:
+                live.append((end, e))
+        self.live_ranges = live
+
+    def add_answer(self, cat_norm: str, category_name: str, answer: str):
+        self.category_answers.setdefault(cat_norm, []).append((category_name, answer))
+        self.answer_categories.setdefault(answer, []).append(category_name)
+
+    def drop_answers(self, cat_norm: str):
+        """Forget which answers a category held (see answer_categories)."""
+        for category_name, answer in self.category_answers.pop(cat_norm, ()):
+            names = self.answer_categories[answer]
+            names.remove(category_name)
+            if not names:
+                del self.answer_categories[answer]
+
+    def resolve_exact(self, q_norm: str):
+        # the first category holding the question wins, as in build_index
+        for index in self.category_index.values():
+            item = index.get(q_norm)
+            if item is not None:
+                self.exact_index[q_norm] = item
+                return
+        self.exact_index.pop(q_norm, None)
+
+    def stop_fusion(self):
+        if self.fusion_model is not None:
+            self.fusion_model = None
+            self.fusion_fallback = "FAQ changed since the index was compiled; fusion resumes after compaction"
+
+    def all_rows(self):
+        """Every row to match against: one (start, end) slice, or, once the FAQ
+        has been patched, a list of live compiled slices and Segments."""
+        if not self.patched:
+            return 0, len(self.corpus)
+        return self.live_ranges + list(self.segments.values())
+    
+    def normalize(self, text: str) -> str:
+        return normalize(text)
+    
+    def exact_result(self, item: int):
+        category_name, answer = self.corpus.item(item)
+        return {
+            "category": category_name,
+            "answer": answer,
+            "match_type": "exact",
+            "confidence": 1.0
+        }
+
+    def find_exact_match(self, question: str, category: str = None):
+        q_norm = self.normalize(question)
+
+        if not category:
+            item = self.exact_index.get(q_norm)
+            if item is not None:
+                return self.exact_result(item)
+            return None
+
+        cat_norm = self.normalize(category)
+        if cat_norm not in self.category_ids:
+            return {
+                "category": "Unknown",
+                "answer": "Category not found in dataset.",
+                "match_type": "manual",
+                "confidence": 0.0
+            }
+
+        item = self.category_index[cat_norm].get(q_norm)
+        if item is not None:
+            return self.exact_result(item)
+
+        return {
+            "category": self.corpus.categories[self.category_ids[cat_norm]],
+            "answer": "No quick answer found in this category.",
+            "match_type": "manual",
+            "confidence": 0.0
+        }
+
+    def keyword_category(self, q_norm: str):
+        return self.keyword_automaton.best_category(q_norm)
+
+    def similarity_plan(self, q_norm: str):
+        """Return (keyword category or None, (start, end) rows to score).
+
+        None means the keyword category has no questions to score."""
+        keyword_category = self.keyword_category(q_norm)
+        if keyword_category is None:
+            return None, self.all_rows()
+
+        rows = self.category_rows.get(self.normalize(keyword_category))
+        if not rows:
+            return None
+        return keyword_category, rows
+
+    def best_of_parts(self, q_norm: str, parts, limit=None):
+        """best_row() over compiled slices and Segments; equal scores keep the lower row."""
+        best_row, best_score = None, 0
+        for part in parts:
+            row, score = self.best_row(q_norm, part, limit) if isinstance(part, tuple) else part.best(q_norm)
+            if row is not None and (best_row is None or score > best_score
+                                    or (score == best_score and row < best_row)):
+                best_row, best_score = row, score
+        return best_row, best_score
+
+    def shortlist_index(self):
+        """The TrigramIndex over match_texts, built when first needed."""
+        index = self.candidate_index
+        if index is None:
+            index = self.candidate_index = TrigramIndex(self.match_texts)
+            self.candidate_steps = self.normalization
+        return index
+
+    def candidate_rows(self, q_norm: str, rows, limit=None):
+        """Rows the similarity backend should score: the whole slice, or its
+        trigram shortlist of limit (default shortlist_size) rows."""
+        limit = limit or self.shortlist_size
+        if not limit or rows[1] - rows[0] <= limit:
+            return range(*rows)
+        return self.shortlist_index().shortlist(q_norm, *rows, limit=limit)
+
+    def best_row(self, q_norm: str, rows, limit=None, stats=None, deadline=None):
+        """(row, score) of the first best scoring row in the (start, end) slice
+        (or in a list of slices and Segments, see all_rows), scoring at most
+        limit (default shortlist_size) trigram candidates.
+
+        Given a stats dict, the "candidates" and "pruned" counts are added to
+        it instead of being reported to metrics. deadline is passed to the
+        backend (see similarity.py)."""
+        if not isinstance(rows, tuple):
+            return self.best_of_parts(q_norm, rows, limit)
+        limit = limit or self.shortlist_size
+        report = stats is None and self.metrics
+        if report:
+            stats = {}
+        if not limit or rows[1] - rows[0] <= limit:
+            candidates = rows[1] - rows[0]
+            best = self.backend.best_match(q_norm, *rows, stats, deadline)
+        else:
+            shortlist = self.candidate_rows(q_norm, rows, limit)
+            candidates = len(shortlist)
+            best = self.backend.best_of_rows(q_norm, shortlist, stats, deadline)
+
+        if report:
+            self.metrics.observe_candidates(candidates, stats.get("pruned", 0))
+        elif stats is not None:
+            stats["candidates"] = stats.get("candidates", 0) + candidates
+        return best
+
+    def ranked_rows(self, q_norm: str, rows):
+        """[(row, score)] of all candidates scoring above zero, best first."""
+        if not isinstance(rows, tuple):
+            scored = []
+            for part in rows:
+                scored.extend(self.ranked_rows(q_norm, part) if isinstance(part, tuple) else part.ranked(q_norm))
+            scored.sort(key=lambda rs: (-rs[1], rs[0]))
+            return scored
+        candidates = self.candidate_rows(q_norm, rows)
+        scored = [(row, float(score)) for row, score in zip(candidates, self.backend.score_rows(q_norm, candidates))
+                  if score > 0]
+        scored.sort(key=lambda rs: (-rs[1], rs[0]))
+        return scored
+
+    def fused_rows(self, q_norm: str, rows):
+        """[(row, probability)] of the (start, end) slice, most probable first."""
+        start, end = rows
+        probs = next(self.fusion_model.probabilities([q_norm], [self.text_pipeline(q_norm)]))[start:end]
+        return [(start + int(i), float(probs[i])) for i in (-probs).argsort(kind="stable")]
+
+    def similarity_result(self, keyword_category, row, best_score):
+        best_category = keyword_category
+        best_answer = None
+        if row is not None:
+            row_category, best_answer = self.corpus.row(row)
+            best_category = best_category or row_category
+
+        if best_score > self.similarity_threshold:
+            return {
+                "category": best_category,
+                "answer": best_answer,
+                "match_type": "similar",
+                "confidence": round(best_score, 2)
+            }
+
+        if best_category and self.use_keyword_fallback:
+            return {
+                "category": best_category,
+                "answer": self.basic_answers.get(best_category) or "No answer available.",
+                "match_type": "keyword",
+                "confidence": self.keyword_fallback_confidence
+            }
+
+        return None
+
+    def fused_result(self, q_norm: str, probs):
+        """Result for a question from its fused per-row probabilities.
+
+        The most probable stored question answers when it clears
+        fusion_threshold. Otherwise, like the chain's keyword fallback, the
+        Basic answer of the keyword category (or of the most probable row's
+        category) comes back with keyword_fallback_confidence, or the best
+        probability inside that category if higher, so clients that drop
+        zero-confidence answers get the same fallbacks as without fusion."""
+        row = int(probs.argmax()) if len(probs) else None
+        if row is not None and probs[row] >= self.fusion_threshold:
+            category_name, answer = self.corpus.row(row)
+            return {
+                "category": category_name,
+                "answer": answer,
+                "match_type": "similar",
+                "confidence": round(float(probs[row]), 2)
+            }
+
+        if not self.use_keyword_fallback:
+            return None
+        fallback_category = self.keyword_category(q_norm)
+        if not fallback_category and row is not None:
+            fallback_category = self.corpus.row(row)[0]
+        if not fallback_category:
+            return None
+        confidence = max(self.keyword_fallback_confidence,
+                         self.fusion_model.category_best(probs, self.corpus.category_ids[fallback_category]))
+        return {
+            "category": fallback_category,
+            "answer": self.basic_answers.get(fallback_category) or "No answer available.",
+            "match_type": "keyword",
+            "confidence": round(confidence, 2)
+        }
+
+    def fused_results(self, queries):
+        """fused_result() for many normalized questions, scored in vectorized chunks."""
+        metrics = self.metrics
+        start = perf_counter()
+        texts = [self.text_pipeline(q) for q in queries]
+        results = [self.fused_result(q, probs)
+                   for q, probs in zip(queries, self.fusion_model.probabilities(queries, texts))]
+        if metrics:
+            metrics.observe_stage("fusion", perf_counter() - start)
+            for _ in queries:
+                metrics.observe_candidates(len(self.corpus))
+        return results
+
+    def categorize_by_similarity(self, question: str):
+        metrics = self.metrics
+        q_norm = self.normalize(question)
+        if self.fusion_model is not None:
+            return self.fused_results([q_norm])[0]
+
+        start = perf_counter()
+        plan = self.similarity_plan(q_norm)
+        if metrics:
+            metrics.observe_stage("keyword", perf_counter() - start)
+        if plan is None:
+            return None
+
+        keyword_category, rows = plan
+        row, best_score = None, 0
+        if self.use_similar:
+            start = perf_counter()
+            row, best_score = self.best_row(self.text_pipeline(q_norm), rows)
+            if metrics:
+                metrics.observe_stage("similarity", perf_counter() - start)
+        return self.similarity_result(keyword_category, row, best_score)
+
+    def no_match(self):
+        return {
+            "category": "Unknown",
+            "answer": "No quick answer found.",
+            "match_type": "none",
+            "confidence": 0.0
+        }
+
+    # ============================================
+    # DEADLINES
+    # ============================================
+    # A question may come with a deadline (a time.monotonic() value) and a
+    # busy flag, set when the worker is queueing questions. Exact and keyword
+    # lookups always run; the similarity stage takes the most thorough tier
+    # that fits the time left:
+    #   full       every candidate, checking the clock between chunks and
+    #              keeping the best row so far if the deadline passes
+    #              ("truncated")
+    #   shortlist  only the degraded_shortlist best trigram candidates
+    #   keyword    no scoring: the keyword category's Basic answer, if any
+    # A busy worker skips full scans larger than the shortlist, and fusion
+    # gives way to the chain ("chain") when it doesn't fit. Results of any
+    # tier but a complete full one carry "degraded": True.
+
+    @staticmethod
+    def remaining(deadline):
+        return float("inf") if deadline is None else deadline - monotonic()
+
+    def observe_cost(self, name: str, cost: float):
+        """Fold a measurement into the row_cost or fusion_cost moving average."""
+        previous = getattr(self, name)
+        setattr(self, name, cost if previous is None else previous + 0.2 * (cost - previous))
+
+    def mark_degraded(self, result, tier):
+        if tier is None:
+            return result
+        if self.metrics:
+            self.metrics.observe_degraded(tier)
+        result["degraded"] = True
+        return result
+
+    def similarity_within(self, q_norm: str, deadline=None, busy=False):
+        """(result or None, tier) of the similarity stage under a deadline;
+        tier is None when nothing was cut short."""
+        tier = None
+        if self.fusion_model is not None:
+            remaining = self.remaining(deadline)
+            # unmeasured fusion still needs time left to be worth a try
+            if not busy and remaining > 0 and (self.fusion_cost is None or self.fusion_cost <= remaining):
+                start = perf_counter()
+                result = self.fused_results([q_norm])[0]
+                self.observe_cost("fusion_cost", perf_counter() - start)
+                return result, None
+            tier = "chain"
+
+        plan = self.similarity_plan(q_norm)
+        if plan is None:
+            return None, tier
+        keyword_category, rows = plan
+        if not self.use_similar:
+            return self.similarity_result(keyword_category, None, 0), tier
+
+        start = perf_counter()
+        row, best_score, cut = self.best_row_within(self.text_pipeline(q_norm), rows, deadline, busy)
+        if self.metrics:
+            self.metrics.observe_stage("similarity", perf_counter() - start)
+        return self.similarity_result(keyword_category, row, best_score), cut or tier
+
+    def best_row_within(self, q_text: str, rows, deadline, busy):
+        """(row, score, tier) from the most thorough tier that fits the time left."""
+        remaining = self.remaining(deadline)
+        if remaining <= 0:
+            return None, 0, "keyword"
+        parts = [rows] if isinstance(rows, tuple) else rows
+        candidates = self.scan_size(parts)
+        limit = self.degraded_shortlist
+        cost = self.row_cost
+        if candidates <= limit or not busy and (cost is None or candidates * cost <= remaining):
+            return self.scan_within(q_text, parts, deadline)
+        if limit and (cost is None or limit * cost <= remaining):
+            row, score, tier = self.scan_within(q_text, parts, deadline, limit)
+            return row, score, tier or "shortlist"
+        return None, 0, "keyword"
+
+    def scan_within(self, q_text: str, parts, deadline, limit=None):
+        """(row, score, tier) over the rows of parts (or their trigram
+        shortlists of limit rows), stopping at the deadline with the best row
+        so far; tier is then "truncated".
+
+        Backends that don't check the deadline themselves are called on
+        chunks of deadline_chunk rows, with the clock checked in between.
+        Without truncation the row is the one best_of_parts() returns."""
+        # a shortlist already bounds the work per slice
+        chunk = None if limit or self.shortlist_size or self.backend.checks_deadline else self.deadline_chunk
+        stats = {}
+        best_row, best_score = None, 0
+        start = perf_counter()
+        for part in parts:
+            if isinstance(part, tuple) and chunk:
+                pieces = [(s, min(s + chunk, part[1])) for s in range(part[0], part[1], chunk)]
+            else:
+                pieces = [part]
+            for piece in pieces:
+                if deadline is not None and monotonic() >= deadline:
+                    stats["truncated"] = True
+                if stats.get("truncated"):
+                    break
+                if isinstance(piece, tuple):
+                    row, score = self.best_row(q_text, piece, limit, stats, deadline)
+                else:
+                    row, score = piece.best(q_text, stats, deadline)
+                    stats["candidates"] = stats.get("candidates", 0) + len(piece)
+                if row is not None and (best_row is None or score > best_score
+                                        or (score == best_score and row < best_row)):
+                    best_row, best_score = row, score
+
+        scored = stats.get("candidates", 0)
+        if scored and not stats.get("truncated"):
+            self.observe_cost("row_cost", (perf_counter() - start) / scored)
+        if self.metrics:
+            self.metrics.observe_candidates(scored, stats.get("pruned", 0))
+        return best_row, best_score, "truncated" if stats.get("truncated") else None
+
+    def batch_within(self, queries, deadline, busy):
+        """[(result or None, tier)] for normalized questions sharing a deadline.
+
+        The batched path runs when its estimated cost fits the time left;
+        otherwise the questions go through similarity_within() one by one,
+        each with the time the earlier ones left."""
+        if queries and not busy:
+            if self.fusion_model is not None:
+                cost = self.fusion_cost
+                cost = cost * len(queries) if cost is not None else None
+            else:
+                cost = self.row_cost
+                if cost is not None and self.use_similar:
+                    plans = [self.similarity_plan(q) for q in queries]
+                    cost *= sum(self.scan_size(plan[1]) for plan in plans if plan is not None)
+            if cost is not None and cost <= self.remaining(deadline):
+                return [(result, None) for result in self.batch_results(queries)]
+        return [self.similarity_within(q, deadline, busy) for q in queries]
+
+    def scan_size(self, rows):
+        """Stored questions a full scan of rows scores; a configured
+        shortlist caps each compiled slice."""
+        parts = [rows] if isinstance(rows, tuple) else rows
+        return sum(min(p[1] - p[0], self.shortlist_size or p[1] - p[0]) if isinstance(p, tuple) else len(p)
+                   for p in parts)
+
+    def process_question(self, question: str, category: str = None, deadline=None, busy=False):
+        metrics = self.metrics
+        if metrics is None:
+            return self.match_question(question, category, deadline, busy)
+
+        start = perf_counter()
+        result = self.match_question(question, category, deadline, busy)
+        metrics.observe_stage("total", perf_counter() - start)
+        metrics.observe_result(result)
+        return result
+
+    def match_question(self, question: str, category: str = None, deadline=None, busy=False):
+        """Best result for a question; with a deadline or busy set, the
+        similarity stage may take a cheaper tier (see DEADLINES)."""
+        question = question.strip()
+        
+        if category and category.strip():
+            exact_in_category = self.find_exact_match(question, category)
+            if exact_in_category:
+                return exact_in_category
+        else:
+            start = perf_counter()
+            exact = self.find_exact_match(question)
+            if self.metrics:
+                self.metrics.observe_stage("exact", perf_counter() - start)
+            if exact:
+                return exact
+
+            if deadline is not None or busy:
+                sim, tier = self.similarity_within(self.normalize(question), deadline, busy)
+                return self.mark_degraded(sim or self.no_match(), tier)
+
+            sim = self.categorize_by_similarity(question)
+            if sim:
+                return sim
+
+        return self.no_match()
+
+    def top_matches(self, question: str, category: str = None, k: int = 3):
+        """Up to k distinct answers ranked by score, as {category, answer, confidence}.
+
+        An exact hit comes first with confidence 1.0; the rest are the best
+        similarity candidates (from the keyword category, or from the given
+        category), one per answer."""
+        q_norm = self.normalize(question.strip())
+        matches = []
+        seen = set()
+
+        def add(category_name, answer, confidence):
+            if (category_name, answer) not in seen and len(matches) < k:
+                seen.add((category_name, answer))
+                matches.append({"category": category_name, "answer": answer, "confidence": confidence})
+
+        if category and category.strip():
+            cat_norm = self.normalize(category)
+            if cat_norm not in self.category_ids:
+                return []
+            hit = self.category_index[cat_norm].get(q_norm)
+            rows = self.category_rows[cat_norm]
+        else:
+            hit = self.exact_index.get(q_norm)
+            plan = self.similarity_plan(q_norm)
+            rows = plan[1] if plan else (0, 0)
+
+        if hit is not None:
+            add(*self.corpus.item(hit), 1.0)
+        if self.fusion_model is not None:
+            rows = rows if category and category.strip() else (0, len(self.corpus))
+            ranked = self.fused_rows(q_norm, rows)
+        else:
+            ranked = self.ranked_rows(self.text_pipeline(q_norm), rows)
+        for row, score in ranked:
+            if len(matches) >= k:
+                break
+            add(*self.corpus.row(row), round(score, 2))
+        return matches
+
+    def process_questions(self, items, deadline=None, busy=False):
+        """Process a batch of {"question", "category"} dicts, keeping input order.
+
+        Exact lookups run per item; questions that need the similarity stage
+        are de-duplicated and scored in one backend call. Items that fail
+        get {"error": ...} in their slot instead of a result. deadline and
+        busy apply to the whole batch (see batch_within)."""
+        metrics = self.metrics
+        batch_start = perf_counter()
+        results = [None] * len(items)
+        pending = {}
+
+        for i, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get("question"), str):
+                results[i] = {"error": "Question is required"}
+                continue
+            try:
+                question = item["question"].strip()
+                category = item.get("category")
+                if category and category.strip():
+                    results[i] = self.find_exact_match(question, category) or self.no_match()
+                else:
+                    results[i] = self.find_exact_match(question)
+                    if results[i] is None:
+                        pending.setdefault(self.normalize(question), []).append(i)
+            except Exception as e:
+                results[i] = {"error": str(e)}
+
+        if metrics:
+            metrics.observe_stage("exact", perf_counter() - batch_start)
+
+        queries = list(pending)
+        if deadline is None and not busy:
+            found = [(result, None) for result in self.batch_results(queries)]
+        else:
+            found = self.batch_within(queries, deadline, busy)
+        for q, (result, tier) in zip(queries, found):
+            for i in pending[q]:
+                results[i] = self.mark_degraded(dict(result) if result else self.no_match(), tier)
+        return self.finish_batch(results, batch_start)
+
+    def batch_results(self, queries):
+        """Similarity-stage result (or None) for each normalized question, in
+        one fused or backend call where possible."""
+        metrics = self.metrics
+        if self.fusion_model is not None:
+            return self.fused_results(queries)
+
+        start = perf_counter()
+        plans = [self.similarity_plan(q) for q in queries]
+        scored = [(q, plan) for q, plan in zip(queries, plans) if plan is not None]
+        if metrics:
+            metrics.observe_stage("keyword", perf_counter() - start)
+        if self.use_similar:
+            start = perf_counter()
+            texts = [self.text_pipeline(q) for q, _ in scored]
+            if self.shortlist_size:
+                matches = [self.best_row(text, plan[1]) for text, (_, plan) in zip(texts, scored)]
+            else:
+                # compiled slices in one backend call; patched categories one by one
+                sliced = [j for j, (_, plan) in enumerate(scored) if isinstance(plan[1], tuple)]
+                matches = [None] * len(scored)
+                best = self.backend.best_matches([texts[j] for j in sliced], [scored[j][1][1] for j in sliced])
+                for j, match in zip(sliced, best):
+                    matches[j] = match
+                for j, (_, plan) in enumerate(scored):
+                    if matches[j] is None:
+                        matches[j] = self.best_row(texts[j], plan[1])
+                if metrics:
+                    for j in sliced:
+                        first, last = scored[j][1][1]
+                        metrics.observe_candidates(last - first)
+            if metrics:
+                metrics.observe_stage("similarity", perf_counter() - start)
+        else:
+            matches = [(None, 0)] * len(scored)
+        matches = dict(zip((q for q, _ in scored), matches))
+        return [self.similarity_result(plan[0], *matches[q]) if plan is not None else None
+                for q, plan in zip(queries, plans)]
+
+    def finish_batch(self, results, batch_start):
+        """Record batch metrics and return the results."""
+        metrics = self.metrics
+        if metrics:
+            # batch stages are timed once per call, not per item
+            metrics.observe_stage("batch", perf_counter() - batch_start)
+            for result in results:
+                if "error" not in result:
+                    metrics.observe_result(result)
+        return results
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from bulk_score import parse_record
+from faq_changes import load_current
+from faq_index import INDEX_PATH, matcher_options
+
+# ============================================
+# FAQ-SCORE: STREAMING JSONL SCORING
+# ============================================
+# A generator pipeline, one small batch in memory at a time:
+#
+#   parse      input line -> (line number, record)
+#   normalize  record -> (line number, record, matcher item)
+#   match      batches of items -> matcher.process_questions
+#   serialize  -> JSONL output line, written and flushed per batch
+#
+# Every output line carries the input "line" number, so --resume can pick
+# up after the last line that made it to disk.
+
+
+def parse(lines, skip=0):
+    for line_no, line in enumerate(lines, 1):
+        if line_no <= skip or not line.strip():
+            continue
+        yield line_no, parse_record(line)
+
+
+def normalize(parsed):
+    for line_no, record in parsed:
+        item = None
+        if "error" not in record:
+            question = record.get("question")
+            category = record.get("category")
+            item = {
+                "question": question.strip() if isinstance(question, str) else question,
+                "category": category.strip() if isinstance(category, str) and category.strip() else None,
+            }
+        yield line_no, record, item
+
+
+def match(matcher, normalized, batch_size):
+    normalized = iter(normalized)
+    while True:
+        batch = list(islice(normalized, batch_size))
+        if not batch:
+            return
+        results = matcher.process_questions([item for _, _, item in batch])
+        for (line_no, record, item), result in zip(batch, results):
+            yield line_no, record, {"error": record["error"]} if item is None else result
+
+
+def serialize(matched):
+    for line_no, record, result in matched:
+        out = {"line": line_no, **record}
+        # an input field called "line" must not replace the number --resume reads
+        out["line"] = line_no
+        if "error" in result:
+            out["error"] = result["error"]
+        else:
+            out["result"] = result
+        yield line_no, json.dumps(out, ensure_ascii=False)
+
+
+# ============================================
+# RESUME
+# ============================================
+def resume_point(path):
+    """Input line number of the last complete line in an existing output file.
+
+    A partially written last line (from a crash) is truncated away."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        # read backwards until the last two newlines are in the buffer
+        tail, pos = b"", end
+        while pos > 0 and tail.count(b"\n") < 2:
+            step = min(65536, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+
+        complete = tail[:tail.rfind(b"\n") + 1]
+        if len(complete) < len(tail):
+            f.truncate(pos + len(complete))
+        lines = complete.splitlines()
+        if not lines:
+            return 0
+        return json.loads(lines[-1])["line"]
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="faq-score", description="Stream questions (JSONL) through the FAQ matcher and write JSONL results")
+    parser.add_argument("input", nargs="?", default="-", help='JSONL with a "question" field per line (default: stdin)')
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--skip", type=int, default=0, help="skip the first N input lines")
+    parser.add_argument("--resume", action="store_true",
+                        help="append to --output, continuing after the last input line it contains")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--index", default=INDEX_PATH, help="compiled index to load")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines (0 = off)")
+    args = parser.parse_args(argv)
+
+    skip = args.skip
+    if args.resume:
+        if args.output == "-":
+            parser.error("--resume needs --output")
+        skip = max(skip, resume_point(args.output))
+        print(f"Resuming after input line {skip}", file=sys.stderr)
+
+    matcher = load_current(args.index, **matcher_options())
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w", encoding="utf-8")
+
+    start = last_report = time.perf_counter()
+    count = line_no = 0
+    pending = 0
+    try:
+        pipeline = serialize(match(matcher, normalize(parse(source, skip)), args.batch_size))
+        for line_no, line in pipeline:
+            output.write(line + "\n")
+            count += 1
+            pending += 1
+            # results of a batch arrive together; flush once per batch
+            if pending >= args.batch_size:
+                output.flush()
+                pending = 0
+            now = time.perf_counter()
+            if args.progress and now - last_report >= args.progress:
+                last_report = now
+                print(f"line {line_no}: {count} scored, {count / (now - start):.0f} q/s",
+                      file=sys.stderr, flush=True)
+    finally:
+        output.flush()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    seconds = time.perf_counter() - start
+    print(f"Scored {count} questions in {seconds:.1f}s ({count / seconds if seconds else 0:.0f} q/s), "
+          f"last input line {line_no or skip}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+from time import monotonic
+
+from lazy_import import LazyModule
+
+# msgpack is optional; without it frames are compact JSON
+msgpack = LazyModule("msgpack")
+
+DEFAULT_SOCKET_PATH = os.environ.get("FAQ_SOCKET", "/tmp/faq_matcher.sock")
+
+# ============================================
+# FRAMING
+# ============================================
+# Every message is one frame:
+#
+#   uint32 big-endian   payload length
+#   1 byte              codec: b"m" msgpack, b"j" JSON (UTF-8)
+#   payload             one encoded object
+#
+# Requests are {"id": ..., "question": str, "category": str?, "top_k": int?},
+# {"id": ..., "questions": [{"question", "category"}, ...]} or
+# {"id": ..., "op": "health"}; question requests may add "deadline_ms". Each request gets exactly one reply carrying
+# the same id, in the order the requests were sent, so a client may write
+# many frames before reading (pipelining). Replies use the request's codec
+# and have the same fields as the HTTP API's JSON.
+
+HEADER = struct.Struct(">IB")
+MSGPACK, JSON = ord("m"), ord("j")
+MAX_FRAME = 4 * 1024 * 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def default_codec():
+    return MSGPACK if msgpack else JSON
+
+
+def encode_frame(message, codec=JSON) -> bytes:
+    if codec == MSGPACK:
+        payload = msgpack.packb(message, use_bin_type=True)
+    else:
+        payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(payload), codec) + payload
+
+
+def decode_payload(codec, payload):
+    try:
+        if codec == MSGPACK:
+            if not msgpack:
+                raise ProtocolError("msgpack frames are not supported here (install msgpack)")
+            return msgpack.unpackb(payload, raw=False)
+        if codec == JSON:
+            return json.loads(payload)
+    except ProtocolError:
+        raise
+    except Exception as e:
+        raise ProtocolError(f"bad payload: {e}")
+    raise ProtocolError(f"unknown codec {codec!r}")
+
+
+def read_frames(buffer: bytearray):
+    """Yield (codec, message) for every complete frame and drop them from buffer.
+
+    Raises ProtocolError on an oversized or undecodable frame."""
+    offset = 0
+    try:
+        while len(buffer) - offset >= HEADER.size:
+            length, codec = HEADER.unpack_from(buffer, offset)
+            if length > MAX_FRAME:
+                raise ProtocolError(f"frame of {length} bytes is over the {MAX_FRAME} byte limit")
+            end = offset + HEADER.size + length
+            if len(buffer) < end:
+                break
+            payload = bytes(buffer[offset + HEADER.size:end])
+            offset = end
+            yield codec, decode_payload(codec, payload)
+    finally:
+        del buffer[:offset]
+
+
+# ============================================
+# SERVER
+# ============================================
+def handle_message(message):
+    """Reply to one decoded request, using the same answer path as the HTTP API."""
+    import faq_api
+
+    arrived = monotonic()
+    if not isinstance(message, dict):
+        return {"id": None, "success": False, "error": "Request must be an object"}
+    reply = {"id": message.get("id")}
+    try:
+        if message.get("op") == "health":
+            reply.update(faq_api.health_payload())
+            return reply
+        try:
+            deadline = faq_api.request_deadline(message.get("deadline_ms"), arrived=arrived)
+        except ValueError as e:
+            return dict(reply, success=False, error=str(e))
+        if "questions" in message:
+            if not isinstance(message["questions"], list):
+                return dict(reply, success=False, error="A list of questions is required")
+            results = faq_api.answer_questions(message["questions"], deadline)
+            reply.update(success=True, results=[faq_api.result_payload(r) for r in results])
+        elif isinstance(message.get("question"), str):
+            try:
+                top_k = faq_api.parse_top_k(message.get("top_k"))
+            except ValueError as e:
+                return dict(reply, success=False, error=str(e))
+            result = faq_api.answer_question(message["question"], message.get("category"), top_k, deadline)
+            reply.update(faq_api.result_payload(result))
+        else:
+            reply.update(success=False, error="Question is required")
+    except Exception as e:
+        reply.update(success=False, error=str(e))
+    return reply
+
+
+class FrameHandler(socketserver.BaseRequestHandler):
+    """Serves one persistent connection.
+
+    All complete frames in a read are answered together and their replies
+    written with one send, so pipelined requests cost one round of syscalls."""
+
+    recv_size = 64 * 1024
+
+    def handle(self):
+        buffer = bytearray()
+        while True:
+            chunk = self.request.recv(self.recv_size)
+            if not chunk:
+                return
+            buffer += chunk
+            replies = []
+            try:
+                for codec, message in read_frames(buffer):
+                    replies.append(encode_frame(handle_message(message), codec))
+            except ProtocolError as e:
+                # the stream can't be resynchronized after a bad frame
+                replies.append(encode_frame({"id": None, "success": False, "error": str(e)}, JSON))
+                self.request.sendall(b"".join(replies))
+                return
+            if replies:
+                self.request.sendall(b"".join(replies))
+
+
+class FAQSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        self.owner = os.getpid()
+        # replace a socket file left behind by a previous run, never a regular file
+        try:
+            if stat.S_ISSOCK(os.stat(self.server_address).st_mode):
+                os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+        super().server_bind()
+
+    def server_activate(self):
+        super().server_activate()
+        # pre-forked workers share this listener; whoever loses the race for
+        # a connection gets BlockingIOError and goes back to waiting
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        conn, addr = self.socket.accept()
+        conn.setblocking(True)
+        return conn, addr
+
+    def server_close(self):
+        super().server_close()
+        if os.getpid() != self.owner:
+            return
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def create_server(path=DEFAULT_SOCKET_PATH):
+    return FAQSocketServer(path, FrameHandler)
+
+
+def serve_in_background(server):
+    thread = threading.Thread(target=server.serve_forever, name="faq-socket", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============================================
+# CLIENT
+# ============================================
+class FAQSocketClient:
+    """Persistent connection to the socket server.
+
+    ask() and ask_many() are one round trip each; pipeline() writes every
+    request before reading the replies. Not thread-safe: use one client per
+    thread."""
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, codec=None, timeout=30.0):
+        self.path = path
+        self.codec = default_codec() if codec is None else codec
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.buffer = bytearray()
+        self.ids = itertools.count()
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, **fields):
+        return dict(fields, id=next(self.ids))
+
+    def question(self, question, category=None, top_k=None, deadline_ms=None):
+        request = self.request(question=question)
+        if category is not None:
+            request["category"] = category
+        if top_k is not None:
+            request["top_k"] = top_k
+        if deadline_ms is not None:
+            request["deadline_ms"] = deadline_ms
+        return request
+
+    def send(self, requests):
+        self.sock.sendall(b"".join(encode_frame(r, self.codec) for r in requests))
+
+    def receive(self, count):
+        replies = []
+        while len(replies) < count:
+            replies.extend(message for _, message in read_frames(self.buffer))
+            if len(replies) >= count:
+                break
+            chunk = self.sock.recv(64 * 1024)
+            if not chunk:
+                raise ConnectionError("FAQ socket server closed the connection")
+            self.buffer += chunk
+        return replies
+
+    def pipeline(self, requests):
+        """Send all requests, then return their replies in order."""
+        requests = list(requests)
+        self.send(requests)
+        replies = self.receive(len(requests))
+        for request, reply in zip(requests, replies):
+            if reply.get("id") != request["id"]:
+                raise ProtocolError(reply.get("error") or f"reply {reply.get('id')} for request {request['id']}")
+        return replies
+
+    def ask(self, question, category=None, top_k=None, deadline_ms=None):
+        return self.pipeline([self.question(question, category, top_k, deadline_ms)])[0]
+
+    def ask_many(self, items, deadline_ms=None):
+        """One batched request; items are {"question", "category"} dicts."""
+        request = self.request(questions=list(items))
+        if deadline_ms is not None:
+            request["deadline_ms"] = deadline_ms
+        return self.pipeline([request])[0]
+
+    def health(self):
+        return self.pipeline([self.request(op="health")])[0]
+
+
+# ============================================
+# STANDALONE SERVER
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the FAQ matcher on a Unix domain socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="socket path (FAQ_SOCKET)")
+    args = parser.parse_args(argv)
+
+    import faq_api
+    faq_api.get_matcher()
+    faq_api.get_reloader().start()
+    server = create_server(args.socket)
+    print(f"FAQ matcher listening on {args.socket} ({'msgpack and JSON' if msgpack else 'JSON'} frames)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        faq_api.get_reloader().stop()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import json
+import os
+
+from lazy_import import LazyModule
+from similarity import BackendUnavailable, TfidfSimilarity
+
+# fusion needs numpy; without it the matcher keeps the fallback chain
+np = LazyModule("numpy")
+
+FUSION_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fusion_weights.json")
+
+# ============================================
+# HYBRID SCORE FUSION
+# ============================================
+# Instead of exact -> keyword -> similarity -> keyword fallback, every stored
+# question gets a feature vector in one vectorized pass:
+#
+#   lexical          character TF-IDF cosine with the query
+#   lexical_margin   lexical minus the best lexical score of the query (<= 0)
+#   keyword_share    share of the query's keyword hits that name the row's category
+#   semantic         sentence-embedding cosine (only with an embedding backend)
+#   semantic_margin  semantic minus the best semantic score of the query
+#
+# A logistic model fitted on labelled questions (see calibrate.py) turns the
+# features into P(row's answer is correct), which is the reported confidence.
+# (A 0/1 "row is the automaton's pick" feature was dropped: nearly every
+# query hits a single category, so it duplicated keyword_share and the fit
+# split one weight between the two.)
+
+LEXICAL_FEATURES = ("lexical", "lexical_margin", "keyword_share")
+SEMANTIC_FEATURES = LEXICAL_FEATURES + ("semantic", "semantic_margin")
+
+
+def feature_set(semantic: bool) -> str:
+    return "semantic" if semantic else "lexical"
+
+
+def sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+def fit_logistic(X, y, l2=1.0, iterations=50, tol=1e-8):
+    """(weights, bias) of an L2-regularized logistic regression, fitted with IRLS.
+
+    X is (samples x features), y holds 0/1 labels. The bias is not penalized."""
+    X = np.hstack([np.asarray(X, dtype=np.float64), np.ones((len(X), 1))])
+    y = np.asarray(y, dtype=np.float64)
+    penalty = np.full(X.shape[1], float(l2))
+    penalty[-1] = 0.0
+    w = np.zeros(X.shape[1])
+    for _ in range(iterations):
+        p = sigmoid(X @ w)
+        gradient = X.T @ (p - y) + penalty * w
+        hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < tol:
+            break
+    return w[:-1], float(w[-1])
+
+
+def fit_fusion(features, labels, l2=1.0):
+    """(weights, bias) of the fusion model from (queries x rows x features) and 0/1 labels.
+
+    A row-level logistic regression ranks the rows; a second one-feature fit
+    (Platt scaling) on each query's top logit then calibrates the winning
+    row's probability, which is what the matcher reports. The scaling is
+    folded into the returned weights."""
+    weights, bias = fit_logistic(features.reshape(-1, features.shape[-1]), labels.ravel(), l2=l2)
+    logits = features @ weights + bias
+    top = logits.argmax(axis=1)
+    picked = np.arange(len(top))
+    # top logits are often almost separable; the penalty keeps the slope finite
+    scale, shift = fit_logistic(logits[picked, top][:, None], labels[picked, top], l2=l2)
+    return weights * scale[0], bias * scale[0] + shift
+
+
+def load_weights(path=FUSION_WEIGHTS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ScoreFusion:
+    """Scores every stored question of a matcher with the fitted fusion model."""
+
+    # queries scored together; a chunk holds (queries x rows x features) floats
+    chunk_size = 32
+
+    def __init__(self, lexical, row_category, category_ids, keyword_automaton,
+                 semantic=None, weights=None, bias=0.0):
+        self.lexical = lexical
+        self.semantic = semantic
+        self.features = SEMANTIC_FEATURES if semantic is not None else LEXICAL_FEATURES
+        self.row_category = row_category
+        self.category_ids = category_ids
+        self.keyword_automaton = keyword_automaton
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.bias = bias
+
+    @classmethod
+    def for_matcher(cls, matcher, weights_path=FUSION_WEIGHTS_PATH, fitted=True):
+        """Fusion over a configured matcher's corpus, backends and keyword automaton.
+
+        Raises BackendUnavailable without numpy, or (with fitted=True) when
+        the weights file has no model for the available signals."""
+        if not np:
+            raise BackendUnavailable("score fusion needs numpy")
+
+        backend = matcher.backend
+        if backend.name == "tfidf":
+            lexical = backend
+        elif not matcher.normalization and "tfidf" in matcher.prebuilt_backends:
+            lexical = matcher.prebuilt_backends["tfidf"]
+        else:
+            lexical = TfidfSimilarity().fit(matcher.match_texts)
+        semantic = backend if backend.name == "embedding" else None
+
+        corpus = matcher.corpus
+        item_category = np.asarray(corpus.item_category, dtype=np.int32)
+        row_category = item_category[np.asarray(corpus.row_item, dtype=np.int32)]
+        fusion = cls(lexical, row_category, corpus.category_ids, matcher.keyword_automaton, semantic)
+
+        if fitted:
+            try:
+                model = load_weights(weights_path)[feature_set(semantic is not None)]
+            except (OSError, ValueError, KeyError):
+                raise BackendUnavailable(
+                    f"no fitted {feature_set(semantic is not None)} fusion weights in {weights_path} "
+                    f"(run calibrate.py)")
+            if tuple(model["features"]) != fusion.features:
+                raise BackendUnavailable(f"fusion weights in {weights_path} are for other features")
+            fusion.weights = np.asarray(model["weights"], dtype=np.float64)
+            fusion.bias = float(model["bias"])
+        return fusion
+
+    def __len__(self):
+        return len(self.row_category)
+
+    def keyword_share(self, q_norm: str):
+        """Share of the query's keyword hits per category id."""
+        share = np.zeros(len(self.category_ids) or 1, dtype=np.float64)
+        hits = self.keyword_automaton.match(q_norm)
+        total = sum(hits.values())
+        for category_name, count in hits.items():
+            share[self.category_ids[category_name]] = count / total
+        return share
+
+    def signals(self, queries, texts):
+        """(queries x rows x features) matrix for one chunk of queries.
+
+        queries are normalize()d texts for the keyword automaton, texts the
+        same queries after the matcher's text pipeline."""
+        n_rows = len(self.row_category)
+        out = np.zeros((len(queries), n_rows, len(self.features)), dtype=np.float64)
+        if not n_rows or not queries:
+            return out
+
+        lexical = self.lexical.matrix @ self.lexical.vectorize_many(texts)
+        if hasattr(lexical, "toarray"):
+            lexical = lexical.toarray()
+        lexical = np.asarray(lexical).T
+        column = {name: i for i, name in enumerate(self.features)}
+        out[:, :, column["lexical"]] = lexical
+        out[:, :, column["lexical_margin"]] = lexical - lexical.max(axis=1, keepdims=True)
+
+        for j, q_norm in enumerate(queries):
+            out[j, :, column["keyword_share"]] = self.keyword_share(q_norm)[self.row_category]
+
+        if self.semantic is not None:
+            semantic = (self.semantic.matrix @ self.semantic.embed(texts).T).T
+            out[:, :, column["semantic"]] = semantic
+            out[:, :, column["semantic_margin"]] = semantic - semantic.max(axis=1, keepdims=True)
+        return out
+
+    def probabilities(self, queries, texts):
+        """Yield, per query, P(correct) of every stored question as a float array."""
+        for b in range(0, len(queries), self.chunk_size):
+            features = self.signals(queries[b:b + self.chunk_size], texts[b:b + self.chunk_size])
+            yield from sigmoid(features @ self.weights + self.bias)
+
+    def category_best(self, probs, category_id: int):
+        """Highest probability among the rows of a category (0.0 if it has none)."""
+        in_category = probs[self.row_category == category_id]
+        return float(in_category.max()) if len(in_category) else 0.0
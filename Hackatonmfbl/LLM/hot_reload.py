@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+
+from faq_index import CompiledIndex, IndexFormatError, build_index, data_keywords, dataset_version
+
+try:
+    import fcntl
+except ImportError:  # Windows: no rebuild lock, every watcher may compile
+    fcntl = None
+
+
+# ============================================
+# HOT RELOAD
+# ============================================
+def _index_version(path):
+    try:
+        return CompiledIndex(path).meta["dataset_version"]
+    except (OSError, ValueError, IndexFormatError):
+        return None
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ModelReloader:
+    """Watches the FAQ JSON, compiled index and change log and keeps the matcher current.
+
+    A changed JSON file is compiled into a new index first (using the keyword
+    tables of the running matcher), then the index is loaded with `load` -
+    which must build the matcher completely before publishing it, so requests
+    never see a half-built state. Every process runs its own watcher; the
+    first to see a JSON change compiles the index under a lock file, the
+    others find it already current and just map the new file. Records added
+    to the change log are applied with `apply_changes`; a compaction they
+    trigger is compiled and loaded in the same check."""
+
+    def __init__(self, load, get_matcher, index_path, data_path, interval=2.0,
+                 changes_path=None, apply_changes=None):
+        self.load = load
+        self.get_matcher = get_matcher
+        self.index_path = index_path
+        self.data_path = data_path
+        self.interval = interval
+        # FAQ change log (see faq_changes.py): new records are applied to the
+        # running matcher with apply_changes() instead of reloading
+        self.changes_path = changes_path
+        self.apply_changes = apply_changes
+        self.changes_stat = _stat(changes_path) if changes_path else None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.index_stat = _stat(index_path)
+        self.data_stat = _stat(data_path)
+        self.reloads = 0
+        self.last_reload = None
+        self.last_error = None
+
+    def check(self, force=False):
+        """Rebuild / reload if either file changed (or always, with force)."""
+        with self.lock:
+            try:
+                self.refresh(force)
+                if self.apply_changes is not None:
+                    changes_stat = _stat(self.changes_path)
+                    if force or changes_stat != self.changes_stat:
+                        self.apply_changes()
+                        self.changes_stat = changes_stat
+                        # applying may have compacted the log into the JSON
+                        self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # keep serving the previous matcher
+                self.last_error = str(e)
+                return False
+        return True
+
+    def refresh(self, force=False):
+        """Compile a changed JSON and load a changed index."""
+        data_stat = _stat(self.data_path)
+        if force or data_stat != self.data_stat:
+            self.rebuild_index()
+            self.data_stat = data_stat
+
+        index_stat = _stat(self.index_path)
+        if force or index_stat != self.index_stat:
+            self.load(self.index_path)
+            self.index_stat = index_stat
+            self.reloads += 1
+            self.last_reload = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    def rebuild_index(self):
+        with open(self.data_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        category_keywords = data_keywords(data, self.get_matcher().category_keywords)
+        with open(f"{self.index_path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # another worker may have compiled this very dataset while we waited
+            if _index_version(self.index_path) != dataset_version(data, category_keywords):
+                build_index(data, category_keywords, self.index_path)
+
+    def reload_in_background(self, force=True):
+        threading.Thread(target=self.check, kwargs={"force": force}, daemon=True).start()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start polling; call once per process (after fork for pre-forked servers)."""
+        if self.interval <= 0 or (self.thread and self.thread.is_alive()):
+            return
+        # stats seen by the parent before fork still describe the loaded matcher
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="faq-reloader", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def status(self):
+        return {
+            "watching": bool(self.thread and self.thread.is_alive()),
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# modules CLI tools, tests and workers import; none of them may load data
+# or heavy optional packages at import time
+MODULES = ("faq_matcher", "faq_index", "modelForQuestions", "faqmodel", "faq_score", "bulk_score")
+HEAVY = ("numpy", "scipy", "sentence_transformers")
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {base!r})
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+loaded = None
+if {load}:
+    from faq_index import load_matcher
+    start = time.perf_counter()
+    load_matcher()
+    loaded = time.perf_counter() - start
+print(json.dumps({{"import": imported, "load": loaded, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+# ============================================
+# IMPORT-TIME BUDGET
+# ============================================
+def probe(module, load=False, repeat=5):
+    """Best-of-`repeat` import (and optional index load) time in a fresh interpreter.
+
+    Runs from the filesystem root, so imports that read CWD-relative files fail."""
+    best = None
+    for _ in range(repeat):
+        code = PROBE.format(base=BASE_DIR, module=module, load=load, heavy=HEAVY)
+        out = subprocess.run([sys.executable, "-c", code], cwd=os.path.abspath(os.sep),
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        if best is None or result["import"] < best["import"]:
+            best = result
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that matcher modules import quickly and without side effects")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="maximum import time per module")
+    parser.add_argument("--load-budget-ms", type=float, default=250.0,
+                        help="maximum time to load the compiled index with default options")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in MODULES:
+        result = probe(module, load=module == "faq_index", repeat=args.repeat)
+        import_ms = result["import"] * 1000
+        problems = []
+        if import_ms > args.budget_ms:
+            problems.append(f"over {args.budget_ms:.0f} ms")
+        if result["heavy"]:
+            problems.append("imports " + ", ".join(result["heavy"]))
+        line = f"{module:>18}  import {import_ms:7.1f} ms"
+        if result["load"] is not None:
+            load_ms = result["load"] * 1000
+            line += f"  load_matcher {load_ms:7.1f} ms"
+            if load_ms > args.load_budget_ms:
+                problems.append(f"load over {args.load_budget_ms:.0f} ms")
+        print(line + (f"  FAIL: {'; '.join(problems)}" if problems else "  ok"))
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+from collections import Counter, deque
+
+# č/ć/š/ž/đ -> c/c/s/z/d, one character each so match positions don't move
+DIACRITICS = str.maketrans("čćšžđČĆŠŽĐ", "ccszdCCSZD")
+
+
+def fold_diacritics(text: str) -> str:
+    return text.translate(DIACRITICS)
+
+
+# ============================================
+# AHO-CORASICK KEYWORD AUTOMATON
+# ============================================
+class KeywordAutomaton:
+    """All category keyword tables compiled into one Aho-Corasick automaton.
+
+    match() makes a single pass over the text and returns a Counter of
+    category -> keyword hits, so the cost depends on the question length,
+    not on the number of keywords. With word_boundary=True a keyword only
+    counts as a whole word; with fold_diacritics=True "potrosacki" and
+    "potrošački" are the same keyword."""
+
+    def __init__(self, category_keywords, word_boundary=False, fold_diacritics=False):
+        self.word_boundary = word_boundary
+        self.fold = fold_diacritics
+        self.categories = list(category_keywords)
+        # per state: transitions, failure link, (category id, keyword length) outputs
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for cat_id, keywords in enumerate(category_keywords.values()):
+            for keyword in keywords:
+                if keyword:
+                    self.add(self.prepare(keyword), cat_id)
+        self.build_links()
+
+    def prepare(self, text: str) -> str:
+        return fold_diacritics(text) if self.fold else text
+
+    def add(self, keyword: str, cat_id: int):
+        state = 0
+        for ch in keyword:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        entry = (cat_id, len(keyword))
+        if entry not in self.output[state]:
+            self.output[state].append(entry)
+
+    def build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def match(self, text: str) -> Counter:
+        text = self.prepare(text)
+        hits = Counter()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for cat_id, length in output[state]:
+                if self.word_boundary and not self.is_word(text, end - length, end):
+                    continue
+                hits[self.categories[cat_id]] += 1
+        return hits
+
+    @staticmethod
+    def is_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def best_category(self, text: str):
+        """Category with the most hits; ties go to the one listed first."""
+        hits = self.match(text)
+        if not hits:
+            return None
+        return max(self.categories, key=lambda c: hits.get(c, 0))
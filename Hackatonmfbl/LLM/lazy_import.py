@@ -0,0 +1,42 @@
+import importlib
+
+
+class LazyModule:
+    """A module that is imported on first use instead of at import time.
+
+    `np = LazyModule("numpy")` costs nothing until np.something is touched;
+    bool(np) tells whether the module can be imported at all, so optional
+    dependencies are checked with `if not np:`. After the import the module's
+    names are copied onto the proxy, so later lookups are plain attribute
+    reads."""
+
+    def __init__(self, name):
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_error = None
+
+    def _lazy_load(self):
+        if self._lazy_module is None and self._lazy_error is None:
+            try:
+                self._lazy_module = importlib.import_module(self._lazy_name)
+            except ImportError as e:
+                self._lazy_error = e
+            else:
+                self.__dict__.update(vars(self._lazy_module))
+        return self._lazy_module
+
+    def __bool__(self):
+        return self._lazy_load() is not None
+
+    def __getattr__(self, attr):
+        # only called for names not copied onto the proxy yet
+        if attr.startswith("_lazy_"):
+            raise AttributeError(attr)
+        module = self._lazy_load()
+        if module is None:
+            raise self._lazy_error
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
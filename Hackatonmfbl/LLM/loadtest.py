@@ -0,0 +1,162 @@
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+from benchmark import make_queries, typo
+from faq_index import DATA_PATH
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_questions(count, seed):
+    """count perturbed FAQ questions (a benchmark variant plus a typo each), so
+    the answer cache rarely sees a question twice and requests reach the matcher."""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rng = random.Random(seed)
+    return [typo(q["question"], rng) for q in make_queries(data, count, rng)]
+
+
+# ============================================
+# CLIENT
+# ============================================
+# Each client process keeps one keep-alive connection open and sends
+# requests back to back until the deadline.
+
+def client(args):
+    url, path, deadline, questions, i = args
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    latencies = []
+    errors = 0
+
+    while time.time() < deadline:
+        body = json.dumps({"question": questions[i % len(questions)]})
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    conn.close()
+    return latencies, errors
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_load(url, concurrency, duration, questions, path="/api/process-question"):
+    deadline = time.time() + duration
+    # each client starts at its own offset into the shared question list
+    step = len(questions) // concurrency
+    with multiprocessing.Pool(concurrency) as pool:
+        results = pool.map(client, [(url, path, deadline, questions, k * step) for k in range(concurrency)])
+
+    latencies = [lat for lats, _ in results for lat in lats]
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+# ============================================
+# SERVER CONTROL
+# ============================================
+def wait_healthy(url, timeout=30):
+    parsed = urlparse(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(port, workers, threads, extra_args=()):
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "serve.py"),
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--threads", str(threads), *extra_args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=35)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def print_row(label, stats):
+    print(f"{label:>10} {stats['requests']:>9} {stats['errors']:>7} "
+          f"{stats['rps']:>9.1f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the FAQ Matcher API")
+    parser.add_argument("--url", default="http://127.0.0.1:5001",
+                        help="server to test (ignored with --workers)")
+    parser.add_argument("--workers", default=None,
+                        help="comma separated worker counts, e.g. 1,2,4 - starts serve.py for each")
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker for --workers")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel client connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--port", type=int, default=5101, help="port for servers started by --workers")
+    parser.add_argument("--questions", type=int, default=20000,
+                        help="distinct perturbed FAQ questions the clients cycle through")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    questions = make_questions(args.questions, args.seed)
+
+    print(f"{'workers':>10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    if not args.workers:
+        print_row("-", run_load(args.url, args.concurrency, args.duration, questions))
+        return 0
+
+    url = f"http://127.0.0.1:{args.port}"
+    for workers in [int(w) for w in args.workers.split(",")]:
+        proc = start_server(args.port, workers, args.threads)
+        try:
+            if not wait_healthy(url):
+                print(f"{workers:>10} server did not start", file=sys.stderr)
+                return 1
+            print_row(workers, run_load(url, args.concurrency, args.duration, questions))
+        finally:
+            stop_server(proc)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
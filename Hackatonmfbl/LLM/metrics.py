@@ -0,0 +1,176 @@
+import bisect
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+# ============================================
+# PROMETHEUS-STYLE METRICS
+# ============================================
+# Minimal in-process counters and histograms rendered in the Prometheus text
+# format. Every worker process keeps its own values.
+
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+CANDIDATE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 1000, 10000)
+CONFIDENCE_BUCKETS = (0.0, 0.25, 0.5, 0.55, 0.6, 0.7, 0.8, 0.9, 0.99, 1.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class CounterMetric:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = Counter()
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(labels)} {value}")
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class MatcherMetrics:
+    """Hot-path instrumentation hooks for FAQMatcher plus request-level timers."""
+
+    def __init__(self):
+        self.requests = CounterMetric("faq_requests_total", "HTTP requests by endpoint")
+        self.request_seconds = HistogramMetric(
+            "faq_request_seconds", "Request handling time by endpoint and phase", LATENCY_BUCKETS)
+        self.stage_seconds = HistogramMetric(
+            "faq_stage_seconds", "Time spent per matcher stage", LATENCY_BUCKETS)
+        self.candidates = HistogramMetric(
+            "faq_candidates_scored", "Stored questions scored by the similarity stage", CANDIDATE_BUCKETS)
+        self.pruned = CounterMetric(
+            "faq_candidates_pruned_total", "Candidates skipped by the similarity upper bounds")
+        self.matches = CounterMetric("faq_matches_total", "Results by match_type")
+        self.confidence = HistogramMetric(
+            "faq_confidence", "Result confidence by match_type", CONFIDENCE_BUCKETS)
+        self.degraded = CounterMetric(
+            "faq_degraded_total", "Results cut short by a deadline or queue depth, by tier")
+
+    def observe_stage(self, stage, seconds):
+        self.stage_seconds.observe(seconds, stage=stage)
+
+    def observe_candidates(self, count, pruned=0):
+        self.candidates.observe(count)
+        if pruned:
+            self.pruned.inc(pruned)
+
+    def observe_result(self, result):
+        match_type = result["match_type"]
+        self.matches.inc(match_type=match_type)
+        self.confidence.observe(result["confidence"], match_type=match_type)
+
+    def observe_degraded(self, tier):
+        self.degraded.inc(tier=tier)
+
+    def observe_request(self, endpoint, phase, seconds):
+        self.request_seconds.observe(seconds, endpoint=endpoint, phase=phase)
+        if phase == "total":
+            self.requests.inc(endpoint=endpoint)
+
+    def render(self, extra_lines=()):
+        lines = []
+        for metric in (self.requests, self.request_seconds, self.stage_seconds,
+                       self.candidates, self.pruned, self.matches, self.confidence, self.degraded):
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+# ============================================
+# SAMPLING PROFILER
+# ============================================
+class SamplingProfiler:
+    """Samples the stacks of all threads every `interval` seconds.
+
+    Can be started and stopped at runtime; stacks are aggregated in the
+    collapsed "frame;frame;frame count" format used by flame graph tools."""
+
+    def __init__(self):
+        self.samples = Counter()
+        self.interval = 0.005
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.started_at = None
+
+    @property
+    def running(self):
+        return bool(self.thread and self.thread.is_alive())
+
+    def start(self, interval=None):
+        if interval:
+            self.interval = interval
+        if self.running:
+            return
+        self.samples.clear()
+        self.stop_event.clear()
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self.run, name="faq-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = ";".join(f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})"
+                                 for f in traceback.extract_stack(frame))
+                self.samples[stack] += 1
+
+    def report(self, limit=50):
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "samples": sum(self.samples.values()),
+            "stacks": [f"{stack} {count}" for stack, count in self.samples.most_common(limit)],
+        }
@@ -0,0 +1,222 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    question        TEXT    NOT NULL,
+    category        TEXT    NOT NULL,
+    dataset_version TEXT    NOT NULL,
+    result          TEXT    NOT NULL,
+    confirmed       INTEGER NOT NULL DEFAULT 0,
+    hits            INTEGER NOT NULL DEFAULT 0,
+    updated_at      REAL    NOT NULL,
+    PRIMARY KEY (question, category, dataset_version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_hits ON results (dataset_version, confirmed DESC, hits DESC);
+"""
+
+
+# ============================================
+# PERSISTENT RESULT STORE
+# ============================================
+class ResultStore:
+    """Matcher results kept in SQLite across restarts.
+
+    Rows are keyed by the answer cache key (normalized question, normalized
+    category) and the dataset version they were computed against. Confirmed
+    rows hold an answer an operator chose; they are never overwritten by a
+    computed result. The database runs in WAL mode so every worker process
+    can read and write the same file. Each thread (and forked process) opens
+    its own connection.
+
+    Lookups and computed writes are best effort: a database error is counted
+    and the caller simply computes the answer."""
+
+    def __init__(self, path, flush_every=256):
+        self.path = path
+        self.flush_every = flush_every
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.pending_hits = {}
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.last_error = None
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            # a connection must not cross a fork; the child opens its own
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def failed(self, error):
+        with self.lock:
+            self.errors += 1
+            self.last_error = str(error)
+
+    # ----------------------------------------
+    # lookups
+    # ----------------------------------------
+    def get(self, key, version):
+        """Stored result for a cache key under a dataset version, or None."""
+        if key is None:
+            return None
+        try:
+            row = self.connection().execute(
+                "SELECT result FROM results WHERE question = ? AND category = ? AND dataset_version = ?",
+                (key[0], key[1], version)).fetchone()
+        except sqlite3.Error as e:
+            self.failed(e)
+            return None
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.touch(key, version)
+        return json.loads(row[0])
+
+    def touch(self, key, version):
+        """Count one more request for a key; counts are written in batches."""
+        if key is None:
+            return
+        with self.lock:
+            self.pending_hits[key + (version,)] = self.pending_hits.get(key + (version,), 0) + 1
+            self.pending += 1
+            if self.pending < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending_hits, self.pending = self.pending_hits, {}, 0
+        if not pending:
+            return
+        try:
+            self.connection().executemany(
+                "UPDATE results SET hits = hits + ? WHERE question = ? AND category = ? AND dataset_version = ?",
+                [(count,) + key for key, count in pending.items()])
+        except sqlite3.Error as e:
+            self.failed(e)
+
+    def most_frequent(self, version, limit):
+        """[(key, result)] for a dataset version, confirmed answers first, then by hits."""
+        if limit <= 0:
+            return []
+        self.flush()
+        try:
+            rows = self.connection().execute(
+                "SELECT question, category, result FROM results WHERE dataset_version = ? "
+                "ORDER BY confirmed DESC, hits DESC LIMIT ?", (version, limit)).fetchall()
+        except sqlite3.Error as e:
+            self.failed(e)
+            return []
+        return [((question, category), json.loads(result)) for question, category, result in rows]
+
+    # ----------------------------------------
+    # writes
+    # ----------------------------------------
+    def put(self, key, version, result):
+        """Store a computed result; a confirmed answer for the same key is kept."""
+        if key is None or "error" in result:
+            return
+        try:
+            self.connection().execute(
+                "INSERT INTO results (question, category, dataset_version, result, confirmed, hits, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, 1, ?) "
+                "ON CONFLICT (question, category, dataset_version) DO UPDATE SET "
+                "result = excluded.result, updated_at = excluded.updated_at WHERE confirmed = 0",
+                (key[0], key[1], version, json.dumps(result, ensure_ascii=False), time.time()))
+        except sqlite3.Error as e:
+            self.failed(e)
+            return
+        with self.lock:
+            self.writes += 1
+
+    def confirm(self, key, version, result):
+        """Store an operator-confirmed answer. Raises sqlite3.Error."""
+        self.connection().execute(
+            "INSERT INTO results (question, category, dataset_version, result, confirmed, hits, updated_at) "
+            "VALUES (?, ?, ?, ?, 1, 0, ?) "
+            "ON CONFLICT (question, category, dataset_version) DO UPDATE SET "
+            "result = excluded.result, confirmed = 1, updated_at = excluded.updated_at",
+            (key[0], key[1], version, json.dumps(result, ensure_ascii=False), time.time()))
+
+    def forget(self, key, version):
+        """Drop the stored result for a key (confirmed or not); True if there was one."""
+        cursor = self.connection().execute(
+            "DELETE FROM results WHERE question = ? AND category = ? AND dataset_version = ?",
+            (key[0], key[1], version))
+        return cursor.rowcount > 0
+
+    def invalidate(self, version, answers=None, previous=None, keep=None):
+        """Drop rows computed against any other dataset version.
+
+        Confirmed answers whose text is still in `answers` (a container of
+        the new dataset's answers) move to the new version, keeping their
+        hit counts; the rest are dropped with the computed rows. Computed
+        rows of dataset version `previous` whose answer is still in
+        `answers` move as well when keep(key, result) is true, so an FAQ
+        edit only costs the results it may have changed. Returns
+        (carried, dropped)."""
+        self.flush()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = conn.execute(
+                "SELECT question, category, result, hits FROM results "
+                "WHERE dataset_version != ? AND confirmed = 1", (version,)).fetchall()
+            carried = [(question, category, version, result, hits, time.time())
+                       for question, category, result, hits in stale
+                       if answers is not None and json.loads(result).get("answer") in answers]
+            conn.executemany(
+                "INSERT INTO results (question, category, dataset_version, result, confirmed, hits, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (question, category, dataset_version) DO UPDATE SET "
+                "result = excluded.result, confirmed = 1, hits = hits + excluded.hits, "
+                "updated_at = excluded.updated_at", carried)
+            computed = []
+            if previous is not None and previous != version and keep is not None:
+                for question, category, result, hits in conn.execute(
+                        "SELECT question, category, result, hits FROM results "
+                        "WHERE dataset_version = ? AND confirmed = 0", (previous,)).fetchall():
+                    decoded = json.loads(result)
+                    if answers is not None and decoded.get("answer") in answers and keep((question, category), decoded):
+                        computed.append((question, category, version, result, hits, time.time()))
+            conn.executemany(
+                "INSERT INTO results (question, category, dataset_version, result, confirmed, hits, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?) "
+                "ON CONFLICT (question, category, dataset_version) DO UPDATE SET "
+                "hits = hits + excluded.hits", computed)
+            dropped = conn.execute("DELETE FROM results WHERE dataset_version != ?", (version,)).rowcount
+        carried = len(carried) + len(computed)
+        return carried, dropped - carried
+
+    def stats(self):
+        try:
+            rows, confirmed = self.connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(confirmed), 0) FROM results").fetchone()
+        except sqlite3.Error as e:
+            self.failed(e)
+            rows = confirmed = None
+        with self.lock:
+            return {
+                "path": self.path,
+                "rows": rows,
+                "confirmed": confirmed,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "errors": self.errors,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,112 @@
+import argparse
+import gc
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ============================================
+# PRODUCTION SERVER (gunicorn, pre-forked workers)
+# ============================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the FAQ Matcher API with multiple workers")
+    parser.add_argument("--host", default=os.environ.get("FAQ_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FAQ_PORT", "5001")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("FAQ_WORKERS", os.cpu_count() or 1)),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("FAQ_THREADS", "4")),
+                        help="threads per worker")
+    parser.add_argument("--timeout", type=int, default=30,
+                        help="seconds before a stuck worker is killed and restarted")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds workers get to finish in-flight requests on shutdown")
+    parser.add_argument("--socket", default=os.environ.get("FAQ_SOCKET"),
+                        help="also serve the framed protocol of faq_socket.py on this Unix socket")
+    return parser.parse_args(argv)
+
+
+def create_server(args):
+    from gunicorn.app.base import BaseApplication
+
+    class FAQServer(BaseApplication):
+        def __init__(self, app, options):
+            self.application = app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    def on_exit(server):
+        if socket_server is not None:
+            socket_server.server_close()
+        server.log.info("FAQ Matcher API stopped")
+
+    def post_fork(server, worker):
+        # threads don't survive fork: every worker watches the files itself
+        faq_api.get_reloader().start()
+        if socket_server is not None:
+            # the master bound the socket; all workers accept on it
+            faq_socket.serve_in_background(socket_server)
+
+    def worker_int(worker):
+        worker.log.info("Worker %s interrupted, finishing in-flight requests", worker.pid)
+
+    # loading the index here (in the master, before fork) loads it once;
+    # workers inherit it copy-on-write
+    import faq_api
+    import faq_socket
+    faq_api.get_matcher()
+    socket_server = faq_socket.create_server(args.socket) if args.socket else None
+
+    # move everything loaded so far out of the GC's generations so collections
+    # in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "preload_app": True,
+        "on_exit": on_exit,
+        "post_fork": post_fork,
+        "worker_int": worker_int,
+    }
+    return FAQServer(faq_api.app, options)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, BASE_DIR)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("Production server needs gunicorn: pip install gunicorn", file=sys.stderr)
+        return 1
+
+    server = create_server(args)
+
+    print("=" * 50)
+    print("FAQ Matcher API Server (production)")
+    print("=" * 50)
+    print(f"Listening on http://{args.host}:{args.port}")
+    if args.socket:
+        print(f"Listening on unix:{args.socket}")
+    print(f"Workers: {args.workers}, threads per worker: {args.threads}")
+    print("Stop with SIGTERM / Ctrl+C - in-flight requests are drained first")
+    print("=" * 50)
+    server.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
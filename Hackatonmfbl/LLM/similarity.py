@@ -0,0 +1,427 @@
+import math
+import os
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from time import monotonic
+
+from lazy_import import LazyModule
+
+# imported on first use: the default difflib backend needs neither
+np = LazyModule("numpy")
+sparse = LazyModule("scipy.sparse")
+
+
+# ============================================
+# SIMILARITY BACKENDS
+# ============================================
+# Every backend is fitted once on the normalized stored questions and then
+# scores a normalized query against the corpus or a contiguous slice of it
+# (one category).  best_match returns (row, score) of the first best row, or
+# (None, 0.0) when nothing scores above zero - the same rules as the old
+# "score > best_score" loop. score_rows scores an arbitrary list of rows,
+# e.g. a shortlist from the trigram candidate index. derive(texts) returns a
+# backend over other texts whose scores compare with this one's (used for
+# FAQ changes applied without recompiling, see FAQMatcher.put_category).
+# A backend with checks_deadline stops scoring once the time.monotonic()
+# deadline passed to best_match/best_of_rows is reached and sets
+# stats["truncated"]; the vectorized ones ignore it and are called on short
+# chunks instead (see FAQMatcher.scan_within).
+
+
+class BackendUnavailable(ImportError):
+    """An optional backend can't run here (missing package or model files)."""
+
+
+class SequenceMatcherSimilarity:
+    """difflib ratio() with exact pruning.
+
+    ratio() is 2*M/T, and both the length bound (M <= shorter length, what
+    real_quick_ratio computes) and the character-count bound (M <= shared
+    characters, what quick_ratio computes) are upper bounds of it. Rows are
+    visited best length bound first: a row whose bound cannot beat the
+    current best is skipped, and once the length bound drops below the best
+    score every remaining row is, so the search stops. The result is the
+    same (row, score) the exhaustive scan returns."""
+
+    name = "sequence"
+    checks_deadline = True
+
+    def fit(self, questions):
+        self.questions = questions if isinstance(questions, list) else list(questions)
+        self.lengths = array("i", map(len, self.questions))
+
+        # character counts of every row in one flat (rows x alphabet) array
+        self.alphabet = {}
+        for q in self.questions:
+            for ch in q:
+                self.alphabet.setdefault(ch, len(self.alphabet))
+        width = len(self.alphabet)
+        typecode = "H" if max(self.lengths, default=0) < 1 << 16 else "I"
+        self.char_counts = array(typecode, bytes(array(typecode).itemsize * width * len(self.questions)))
+        for row, q in enumerate(self.questions):
+            base = row * width
+            for ch, n in Counter(q).items():
+                self.char_counts[base + self.alphabet[ch]] = n
+        return self
+
+    def derive(self, texts):
+        # ratio() needs nothing fitted on the corpus
+        return SequenceMatcherSimilarity().fit(texts)
+
+    def to_arrays(self):
+        """Return (row lengths, alphabet as a string, flat char counts) for storage."""
+        return self.lengths, "".join(sorted(self.alphabet, key=self.alphabet.get)), self.char_counts
+
+    @classmethod
+    def from_arrays(cls, questions, lengths, alphabet, char_counts):
+        """Rebuild a fitted backend from to_arrays() output without copying the arrays."""
+        backend = cls()
+        backend.questions = questions if isinstance(questions, list) else list(questions)
+        backend.lengths = lengths
+        backend.alphabet = {ch: col for col, ch in enumerate(alphabet)}
+        backend.char_counts = char_counts
+        return backend
+
+    def scores(self, query: str, start: int = 0, end: int = None):
+        return [SequenceMatcher(None, query, q).ratio() for q in self.questions[start:end]]
+
+    def score_rows(self, query: str, rows):
+        questions = self.questions
+        return [SequenceMatcher(None, query, questions[r]).ratio() for r in rows]
+
+    def best_match(self, query: str, start: int = 0, end: int = None, stats=None, deadline=None):
+        end = len(self.questions) if end is None else end
+        return self.best_of_rows(query, range(start, end), stats, deadline)
+
+    def best_of_rows(self, query: str, rows, stats=None, deadline=None):
+        """First best (row, score) among rows; stats, if given, gets "scored"/"pruned" counts.
+
+        Past the deadline the best row scored so far is returned; rows are
+        visited most promising first, so it is usually the final one."""
+        la = len(query)
+        lengths = self.lengths
+        # same float expression as SequenceMatcher.ratio() (two empty strings
+        # score 1.0), so bounds and scores compare exactly
+        order = sorted(
+            ((2.0 * min(la, lengths[r]) / (la + lengths[r]) if la + lengths[r] else 1.0, r) for r in rows),
+            key=lambda br: (-br[0], br[1]),
+        )
+
+        alphabet, width, char_counts = self.alphabet, len(self.alphabet), self.char_counts
+        # characters no stored question contains can't be shared
+        query_counts = [(alphabet[ch], n) for ch, n in Counter(query).items() if ch in alphabet]
+        best_row, best_score = None, 0
+        scored = pruned = 0
+        for i, (bound, row) in enumerate(order):
+            if bound == 0 or bound < best_score:
+                # sorted by bound: nothing after this can win either
+                pruned += len(order) - i
+                break
+            if bound == best_score and row > best_row:
+                pruned += 1
+                continue
+
+            base = row * width
+            shared = sum(min(n, char_counts[base + col]) for col, n in query_counts)
+            bound = 2.0 * shared / (la + lengths[row]) if la + lengths[row] else 1.0
+            if bound == 0 or bound < best_score or (bound == best_score and row > best_row):
+                pruned += 1
+                continue
+
+            if deadline is not None and monotonic() >= deadline:
+                if stats is not None:
+                    stats["truncated"] = True
+                break
+            scored += 1
+            score = SequenceMatcher(None, query, self.questions[row]).ratio()
+            if score > best_score or (score == best_score and score and row < best_row):
+                best_row, best_score = row, score
+
+        if stats is not None:
+            stats["scored"] = stats.get("scored", 0) + scored
+            stats["pruned"] = stats.get("pruned", 0) + pruned
+        return best_row, best_score
+
+    def best_matches(self, queries, slices):
+        return [self.best_match(q, *rows) for q, rows in zip(queries, slices)]
+
+
+class TfidfSimilarity:
+    """Character n-gram TF-IDF vectors, scored with one matrix-vector product."""
+
+    name = "tfidf"
+    checks_deadline = False
+    # queries scored together per matrix product in best_matches
+    batch_size = 256
+
+    def __init__(self, ngram_range=(2, 4)):
+        if not np:
+            raise BackendUnavailable("numpy is required for the tfidf similarity backend")
+        self.ngram_range = ngram_range
+
+    def ngrams(self, text: str):
+        # n-grams inside word boundaries, like sklearn's "char_wb" analyzer
+        low, high = self.ngram_range
+        grams = []
+        for word in text.split():
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                if len(padded) < n:
+                    break
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return grams
+
+    def fit(self, questions):
+        questions = list(questions)
+        self.vocabulary = {}
+        doc_counts = []
+        df = Counter()
+
+        for q in questions:
+            counts = Counter(self.ngrams(q))
+            doc_counts.append(counts)
+            df.update(counts.keys())
+            for gram in counts:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+        n_docs = len(questions)
+        self.idf = np.ones(len(self.vocabulary), dtype=np.float64)
+        for gram, col in self.vocabulary.items():
+            self.idf[col] = math.log((1 + n_docs) / (1 + df[gram])) + 1.0
+
+        rows, cols, values = [], [], []
+        for row, counts in enumerate(doc_counts):
+            cols_row = [self.vocabulary[g] for g in counts]
+            weights = np.array([counts[g] for g in counts], dtype=np.float64) * self.idf[cols_row]
+            norm = np.linalg.norm(weights)
+            if norm:
+                weights /= norm
+            rows.extend([row] * len(cols_row))
+            cols.extend(cols_row)
+            values.extend(weights.tolist())
+
+        shape = (n_docs, len(self.vocabulary))
+        if sparse:
+            self.matrix = sparse.csr_matrix((values, (rows, cols)), shape=shape, dtype=np.float64)
+        else:
+            self.matrix = np.zeros(shape, dtype=np.float64)
+            self.matrix[rows, cols] = values
+        return self
+
+    def derive(self, texts):
+        """Vectors of other texts in this vocabulary and idf (n-grams it lacks are dropped)."""
+        backend = TfidfSimilarity(self.ngram_range)
+        backend.vocabulary = self.vocabulary
+        backend.idf = self.idf
+        vectors = self.vectorize_many(texts)
+        backend.matrix = vectors.T.tocsr() if sparse else np.ascontiguousarray(vectors.T)
+        return backend
+
+    def to_arrays(self):
+        """Return (grams by column, idf, CSR data, indices, indptr) for storage."""
+        grams = sorted(self.vocabulary, key=self.vocabulary.get)
+        if sparse:
+            data, indices, indptr = self.matrix.data, self.matrix.indices, self.matrix.indptr
+        else:
+            rows, indices = np.nonzero(self.matrix)
+            data = self.matrix[rows, indices]
+            indptr = np.searchsorted(rows, np.arange(self.matrix.shape[0] + 1))
+        return grams, self.idf, data, indices.astype(np.int32), indptr.astype(np.int32)
+
+    @classmethod
+    def from_arrays(cls, grams, idf, data, indices, indptr, ngram_range=(2, 4)):
+        """Rebuild a fitted backend from to_arrays() output without copying the arrays."""
+        backend = cls(tuple(ngram_range))
+        backend.vocabulary = {gram: col for col, gram in enumerate(grams)}
+        backend.idf = idf
+        shape = (len(indptr) - 1, len(grams))
+        if sparse:
+            backend.matrix = sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+        else:
+            backend.matrix = np.zeros(shape, dtype=np.float64)
+            for row in range(shape[0]):
+                backend.matrix[row, indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+        return backend
+
+    def weights(self, query: str):
+        """Return (columns, l2-normalized tf-idf weights) of a query."""
+        cols, values = [], []
+        for gram, count in Counter(self.ngrams(query)).items():
+            col = self.vocabulary.get(gram)
+            if col is not None:
+                cols.append(col)
+                values.append(count * self.idf[col])
+        values = np.array(values, dtype=np.float64)
+        norm = np.linalg.norm(values)
+        return cols, values / norm if norm else values
+
+    def vectorize(self, query: str):
+        vec = np.zeros(len(self.vocabulary), dtype=np.float64)
+        cols, values = self.weights(query)
+        vec[cols] = values
+        return vec
+
+    def vectorize_many(self, queries):
+        """Stack query vectors as the columns of a (vocabulary x queries) matrix."""
+        rows, cols, values = [], [], []
+        for col, query in enumerate(queries):
+            q_cols, q_values = self.weights(query)
+            rows.extend(q_cols)
+            cols.extend([col] * len(q_cols))
+            values.extend(q_values.tolist())
+
+        shape = (len(self.vocabulary), len(queries))
+        if sparse:
+            return sparse.csc_matrix((values, (rows, cols)), shape=shape, dtype=np.float64)
+        matrix = np.zeros(shape, dtype=np.float64)
+        matrix[rows, cols] = values
+        return matrix
+
+    def scores(self, query: str, start: int = 0, end: int = None):
+        return self.matrix[start:end] @ self.vectorize(query)
+
+    def score_rows(self, query: str, rows):
+        if not len(rows):
+            return []
+        return self.matrix[list(rows)] @ self.vectorize(query)
+
+    @staticmethod
+    def best_in(scores, start: int):
+        if not len(scores):
+            return None, 0.0
+        offset = int(np.argmax(scores))
+        if scores[offset] <= 0:
+            return None, 0.0
+        return start + offset, float(scores[offset])
+
+    def best_match(self, query: str, start: int = 0, end: int = None, stats=None, deadline=None):
+        return self.best_in(self.scores(query, start, end), start)
+
+    def best_of_rows(self, query: str, rows, stats=None, deadline=None):
+        best_row, best_score = None, 0
+        for row, score in zip(rows, self.score_rows(query, rows)):
+            if score > best_score:
+                best_row, best_score = row, float(score)
+        return best_row, best_score
+
+    def best_matches(self, queries, slices):
+        """Score many queries with one sparse matrix product per batch."""
+        queries, slices = list(queries), list(slices)
+        results = []
+        for b in range(0, len(queries), self.batch_size):
+            scores = self.matrix @ self.vectorize_many(queries[b:b + self.batch_size])
+            if sparse and sparse.issparse(scores):
+                scores = scores.toarray()
+            for j, (start, end) in enumerate(slices[b:b + self.batch_size]):
+                results.append(self.best_in(scores[start:end, j], start))
+        return results
+
+
+# ============================================
+# SEMANTIC EMBEDDINGS
+# ============================================
+_encoders = {}
+
+
+def load_encoder(model: str):
+    """Sentence-embedding function texts -> (n, dim) array for a local model directory.
+
+    Only local files are used (no downloads) and inference runs on the CPU.
+    Encoders are cached per path, so reloading the FAQ doesn't reload the model."""
+    if not model:
+        raise BackendUnavailable("no embedding model configured (set FAQ_EMBEDDING_MODEL)")
+    if model in _encoders:
+        return _encoders[model]
+    if not os.path.isdir(model):
+        raise BackendUnavailable(f"embedding model not found at {model}")
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        raise BackendUnavailable("the embedding backend needs sentence-transformers")
+
+    st_model = SentenceTransformer(model, device="cpu")
+
+    def encode(texts):
+        return st_model.encode(texts, batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+
+    _encoders[model] = encode
+    return encode
+
+
+class EmbeddingSimilarity:
+    """Cosine similarity of sentence embeddings.
+
+    Stored questions are embedded once into an L2-normalized float32 matrix;
+    a query costs one model call plus a matrix-vector product, and
+    best_matches embeds and scores a whole batch at once."""
+
+    name = "embedding"
+    checks_deadline = False
+    batch_size = 256
+
+    def __init__(self, model=None, encoder=None):
+        if not np:
+            raise BackendUnavailable("numpy is required for the embedding similarity backend")
+        self.model = model
+        self.encoder = encoder or load_encoder(model)
+
+    def embed(self, texts):
+        texts = list(texts)
+        vectors = np.asarray(self.encoder(texts), dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def fit(self, questions):
+        self.matrix = self.embed(questions)
+        return self
+
+    @classmethod
+    def from_vectors(cls, vectors, model=None, encoder=None):
+        """Use already computed, normalized question vectors (e.g. from the compiled index)."""
+        backend = cls(model, encoder)
+        backend.matrix = vectors
+        return backend
+
+    def derive(self, texts):
+        texts = list(texts)
+        vectors = self.embed(texts) if texts else np.zeros((0, self.matrix.shape[1]), dtype=np.float32)
+        return EmbeddingSimilarity.from_vectors(vectors, self.model, self.encoder)
+
+    def scores(self, query: str, start: int = 0, end: int = None):
+        return self.matrix[start:end] @ self.embed([query])[0]
+
+    def score_rows(self, query: str, rows):
+        if not len(rows):
+            return []
+        return self.matrix[list(rows)] @ self.embed([query])[0]
+
+    best_in = staticmethod(TfidfSimilarity.best_in)
+
+    def best_match(self, query: str, start: int = 0, end: int = None, stats=None, deadline=None):
+        return self.best_in(self.scores(query, start, end), start)
+
+    best_of_rows = TfidfSimilarity.best_of_rows
+
+    def best_matches(self, queries, slices):
+        queries, slices = list(queries), list(slices)
+        results = []
+        for b in range(0, len(queries), self.batch_size):
+            scores = self.matrix @ self.embed(queries[b:b + self.batch_size]).T
+            for j, (start, end) in enumerate(slices[b:b + self.batch_size]):
+                results.append(self.best_in(scores[start:end, j], start))
+        return results
+
+
+BACKENDS = {
+    SequenceMatcherSimilarity.name: SequenceMatcherSimilarity,
+    TfidfSimilarity.name: TfidfSimilarity,
+    EmbeddingSimilarity.name: EmbeddingSimilarity,
+}
+
+
+def make_backend(name: str, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown similarity backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**options)
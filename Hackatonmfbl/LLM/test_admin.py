@@ -0,0 +1,53 @@
+"""Admin endpoints refuse requests unless FAQ_ADMIN_TOKEN is set and matches."""
+import pytest
+
+import faq_api
+
+
+@pytest.fixture
+def client():
+    return faq_api.app.test_client()
+
+
+def test_admin_disabled_without_token(monkeypatch, client, asgi_call):
+    monkeypatch.setattr(faq_api, "ADMIN_TOKEN", "")
+    response = client.get("/admin/profiler")
+    assert response.status_code == 403
+    assert response.get_json()["success"] is False
+    assert asgi_call("GET", "/admin/profiler")[0] == 403
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/faq", json={"op": "delete_category", "category": "x"}).status_code == 403
+
+
+def test_admin_wrong_token(monkeypatch, client, asgi_call):
+    monkeypatch.setattr(faq_api, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/profiler").status_code == 401
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "s3cre"}).status_code == 401
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": "čš"}).status_code == 401
+    assert asgi_call("GET", "/admin/profiler", headers={"X-Admin-Token": "nope"})[0] == 401
+
+
+def test_admin_right_token(monkeypatch, client, asgi_call):
+    monkeypatch.setattr(faq_api, "ADMIN_TOKEN", "s3cret")
+    response = client.get("/admin/profiler", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.get_json()["success"] is True
+    assert asgi_call("GET", "/admin/profiler", headers={"X-Admin-Token": "s3cret"})[0] == 200
+
+
+def test_asgi_faq_edit_runs_off_the_event_loop(monkeypatch, asgi_call, faq_edits):
+    import threading
+
+    monkeypatch.setattr(faq_api, "ADMIN_TOKEN", "s3cret")
+    threads = []
+    edit_faq = faq_api.edit_faq
+    monkeypatch.setattr(faq_api, "edit_faq", lambda body: threads.append(threading.current_thread()) or edit_faq(body))
+    monkeypatch.setattr(faq_api, "compact_faq", lambda: threads.append(threading.current_thread()) or {"folded": 0})
+
+    status, payload = asgi_call("POST", "/admin/faq", {"op": "upsert_category", "category": "Nova kategorija"},
+                                {"X-Admin-Token": "s3cret"})
+    assert status == 200 and payload["dataset_version"].endswith("+1")
+    status, payload = asgi_call("POST", "/admin/faq", {"op": "nope", "category": "x"}, {"X-Admin-Token": "s3cret"})
+    assert status == 400
+    assert asgi_call("POST", "/admin/faq/compact", {}, {"X-Admin-Token": "s3cret"})[0] == 200
+    assert len(threads) == 3 and threading.main_thread() not in threads
@@ -0,0 +1,101 @@
+"""Request coalescing in the ASGI app."""
+import asyncio
+import json
+import threading
+import time
+from time import monotonic
+
+import pytest
+
+import faq_api
+import faq_asgi
+
+
+def test_deadline_class():
+    now = monotonic()
+    assert faq_asgi.deadline_class(None) is None
+    assert faq_asgi.deadline_class(now + 1.05) == faq_asgi.deadline_class(now + 1.15)
+    assert faq_asgi.deadline_class(now + 1.0) != faq_asgi.deadline_class(now + 0.05)
+    assert faq_asgi.deadline_class(now - 1) == faq_asgi.deadline_class(now)
+
+
+@pytest.fixture
+def slow_matching(monkeypatch):
+    monkeypatch.setattr(faq_asgi, "EXECUTOR", "thread")
+    monkeypatch.setattr(faq_asgi, "_coalescer", None)
+    calls = []
+
+    def process_question(question, category, top_k=None, deadline=None, busy=False, version=None):
+        calls.append((deadline, busy))
+        time.sleep(0.2)
+        return {"category": "c", "answer": "a", "match_type": "exact", "confidence": 1.0}
+
+    monkeypatch.setattr(faq_asgi, "_process_question", process_question)
+    yield calls
+    faq_asgi._coalescer.shutdown()
+
+
+def ask_together(requests):
+    async def ask(body, headers):
+        messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/api/process-question", "query_string": b"",
+                 "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}
+        await faq_asgi.app(scope, receive, send)
+        return sent[0]["status"]
+
+    async def main():
+        return await asyncio.gather(*(ask(body, headers) for body, headers in requests))
+
+    return asyncio.run(main())
+
+
+def test_only_similar_deadlines_coalesce(slow_matching):
+    faq_api.get_matcher()
+    body = {"question": "kako da otvorim racun"}
+    roomy, tight = {"X-Deadline-Ms": "5000"}, {"X-Deadline-Ms": "300"}
+    assert ask_together([(body, roomy), (body, roomy), (body, tight), (body, {})]) == [200] * 4
+    # the two roomy requests share one computation
+    assert len(slow_matching) == 3
+    assert faq_asgi.get_coalescer().coalesced == 1
+
+
+def test_health_and_metrics_run_off_the_event_loop(monkeypatch):
+    # the payloads query the result store and read the change log
+    monkeypatch.setattr(faq_asgi, "EXECUTOR", "thread")
+    monkeypatch.setattr(faq_asgi, "_coalescer", None)
+    threads = []
+
+    def payload(value):
+        def build():
+            threads.append(threading.get_ident())
+            return value
+        return build
+
+    monkeypatch.setattr(faq_api, "health_payload", payload({"status": "ok"}))
+    monkeypatch.setattr(faq_api, "metrics_text", payload(""))
+
+    async def get(path):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []}
+        await faq_asgi.app(scope, None, send)
+        return sent[0]["status"], threading.get_ident()
+
+    try:
+        for path in ("/health", "/metrics"):
+            status, loop_thread = asyncio.run(get(path))
+            assert status == 200
+            assert threads.pop() != loop_thread
+    finally:
+        faq_asgi.get_coalescer().shutdown()
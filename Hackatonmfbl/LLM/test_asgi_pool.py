@@ -0,0 +1,49 @@
+"""FAQ_ASGI_EXECUTOR=process workers follow edits and reloads made in the server process."""
+import json
+
+import pytest
+
+import faq_asgi
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    monkeypatch.setattr(faq_asgi, "EXECUTOR", "process")
+    monkeypatch.setattr(faq_asgi, "EXECUTOR_WORKERS", 1)
+    monkeypatch.setattr(faq_asgi, "_coalescer", None)
+    yield
+    if faq_asgi._coalescer is not None:
+        faq_asgi._coalescer.shutdown()
+
+
+def first_item(faq_api):
+    with open(faq_api.get_faq_changes().data_path, encoding="utf-8") as f:
+        category = json.load(f)["categories"][0]
+    return category["category"], category["items"][0]
+
+
+def test_pool_worker_sees_edits(faq_edits, process_pool, asgi_call):
+    name, item = first_item(faq_edits)
+    question = item["questions"][0]
+    # the worker forks with the unedited matcher
+    status, payload = asgi_call("POST", "/api/process-question", {"question": question})
+    assert status == 200 and payload["answer"] == item["answer"]
+
+    faq_edits.edit_faq({"op": "upsert_item", "category": name, "previous_answer": item["answer"],
+                        "answer": "Izmijenjen odgovor."})
+    status, payload = asgi_call("POST", "/api/process-question", {"question": question})
+    assert payload["answer"] == "Izmijenjen odgovor."
+    status, payload = asgi_call("POST", "/api/process-questions", {"questions": [{"question": question}]})
+    assert payload["results"][0]["answer"] == "Izmijenjen odgovor."
+
+
+def test_sync_matcher_reloads_on_new_base(faq_edits, monkeypatch):
+    current = faq_edits.get_matcher()
+    reloads = []
+    monkeypatch.setattr(faq_edits, "reload_model", lambda: reloads.append(1))
+
+    faq_edits.sync_matcher(current.dataset_version)
+    faq_edits.sync_matcher(current.dataset_version + "+0")
+    assert reloads == []
+    faq_edits.sync_matcher("0123456789abcdef+2")
+    assert reloads == [1]
@@ -0,0 +1,153 @@
+"""FAQ edits through the change log: answers that are replaced or deleted stop being valid."""
+import io
+import json
+
+import pytest
+
+
+def categories(faq_api):
+    with open(faq_api.get_faq_changes().data_path, encoding="utf-8") as f:
+        return json.load(f)["categories"]
+
+
+@pytest.fixture
+def store(faq_edits, tmp_path, monkeypatch):
+    monkeypatch.setattr(faq_edits, "RESULT_STORE_PATH", str(tmp_path / "results.sqlite3"))
+    return faq_edits.get_result_store()
+
+
+def test_answer_set_follows_edits(faq_edits):
+    category = categories(faq_edits)[0]
+    name, old = category["category"], category["items"][0]["answer"]
+    assert name in faq_edits.get_matcher().answer_categories[old]
+
+    faq_edits.edit_faq({"op": "upsert_item", "category": name, "previous_answer": old, "answer": "Novi odgovor."})
+    answers = faq_edits.get_matcher().answer_categories
+    assert old not in answers
+    assert answers["Novi odgovor."] == [name]
+
+    faq_edits.edit_faq({"op": "delete_category", "category": name})
+    assert "Novi odgovor." not in faq_edits.get_matcher().answer_categories
+
+
+def test_confirm_rejects_removed_answers(faq_edits, store):
+    category = categories(faq_edits)[0]
+    name, answer = category["category"], category["items"][0]["answer"]
+    body = {"question": "pitanje operatera", "answer": answer}
+    assert faq_edits.confirm_answer(body)["result"]["match_type"] == "confirmed"
+
+    faq_edits.edit_faq({"op": "delete_item", "category": name, "answer": answer})
+    with pytest.raises(ValueError):
+        faq_edits.confirm_answer(body)
+    # the pinned answer was not carried into the edited dataset
+    version = faq_edits.get_matcher().dataset_version
+    assert store.most_frequent(version, 10) == []
+    assert faq_edits.answer_question("pitanje operatera")["match_type"] != "confirmed"
+
+
+def test_confirmed_answer_survives_unrelated_edit(faq_edits, store):
+    first, second = categories(faq_edits)[:2]
+    answer = first["items"][0]["answer"]
+    faq_edits.confirm_answer({"question": "pitanje operatera", "answer": answer})
+
+    faq_edits.edit_faq({"op": "add_keyword", "category": second["category"], "keyword": "novakljucnarijec"})
+    result = faq_edits.answer_question("pitanje operatera")
+    assert result["match_type"] == "confirmed" and result["answer"] == answer
+
+
+def test_scoring_tools_replay_the_change_log(faq_edits, monkeypatch):
+    import bulk_score
+    import faq_score
+    from faq_changes import load_current
+
+    category = categories(faq_edits)[0]
+    item = category["items"][0]
+    faq_edits.edit_faq({"op": "upsert_item", "category": category["category"],
+                        "previous_answer": item["answer"], "answer": "Izmijenjen odgovor."})
+    changes_path = faq_edits.get_faq_changes().path
+
+    matcher = load_current(faq_edits.INDEX_PATH, changes_path, **faq_edits.matcher_options())
+    assert matcher.dataset_version == faq_edits.get_matcher().dataset_version
+    assert matcher.process_question(item["questions"][0])["answer"] == "Izmijenjen odgovor."
+
+    # both tools go through load_current with the default change log
+    loads = []
+    monkeypatch.setattr(bulk_score, "_matcher", None)
+    monkeypatch.setattr(bulk_score, "load_current", lambda path, **options: loads.append(path) or matcher)
+    bulk_score.init_worker(faq_edits.INDEX_PATH, {})
+    assert bulk_score._matcher is matcher
+    monkeypatch.setattr(faq_score, "load_current", lambda path, **options: loads.append(path) or matcher)
+    monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps({"question": item["questions"][0]}) + "\n"))
+    out = io.StringIO()
+    monkeypatch.setattr("sys.stdout", out)
+    assert faq_score.main(["--progress", "0"]) == 0
+    assert json.loads(out.getvalue())["result"]["answer"] == "Izmijenjen odgovor."
+    assert loads == [faq_edits.INDEX_PATH, faq_edits.INDEX_PATH]
+
+
+def test_edit_keeps_unaffected_stored_results(faq_edits, store):
+    first, second = categories(faq_edits)[:2]
+    kept, edited = first["items"][0]["questions"][0], second["items"][0]["questions"][0]
+    faq_edits.answer_question(kept)
+    faq_edits.answer_question(edited)
+    before = faq_edits.get_matcher().dataset_version
+    assert len(store.most_frequent(before, 10)) == 2
+
+    faq_edits.edit_faq({"op": "add_question", "category": second["category"],
+                        "answer": second["items"][0]["answer"], "question": "sasvim novo pitanje"})
+    after = faq_edits.get_matcher().dataset_version
+    assert after != before
+    stored = dict(store.most_frequent(after, 10))
+    assert list(stored) == [faq_edits.question_key(kept)]
+    assert stored[faq_edits.question_key(kept)]["category"] == first["category"]
+
+
+def test_asgi_confirm_runs_off_the_event_loop(faq_edits, store, monkeypatch, asgi_call):
+    import threading
+
+    monkeypatch.setattr(faq_edits, "ADMIN_TOKEN", "s3cret")
+    threads = []
+    confirm_answer = faq_edits.confirm_answer
+    monkeypatch.setattr(faq_edits, "confirm_answer",
+                        lambda body, method: threads.append(threading.current_thread()) or confirm_answer(body, method))
+    answer = categories(faq_edits)[0]["items"][0]["answer"]
+    status, payload = asgi_call("POST", "/admin/confirmed-answers", {"question": "pitanje", "answer": answer},
+                                {"X-Admin-Token": "s3cret"})
+    assert status == 200 and payload["result"]["match_type"] == "confirmed"
+    assert asgi_call("POST", "/admin/confirmed-answers", {"question": "pitanje", "answer": "nema"},
+                     {"X-Admin-Token": "s3cret"})[0] == 400
+    assert threads and threading.main_thread() not in threads
+
+
+def test_edits_after_compaction_without_watcher(faq_edits):
+    assert not faq_edits.get_reloader().status()["watching"]
+    category = categories(faq_edits)[0]
+    item = category["items"][0]
+    edit = {"op": "add_question", "category": category["category"], "answer": item["answer"]}
+
+    faq_edits.edit_faq(dict(edit, question="prvo novo pitanje o kreditu"))
+    compacted = faq_edits.compact_faq()
+    assert compacted["folded"] == 1 and "+" not in compacted["dataset_version"]
+    assert faq_edits.get_matcher().dataset_version == compacted["dataset_version"]
+
+    second = faq_edits.edit_faq(dict(edit, question="drugo novo pitanje o kreditu"))
+    assert second["dataset_version"] == compacted["dataset_version"] + "+1"
+    for question in ("prvo novo pitanje o kreditu", "drugo novo pitanje o kreditu"):
+        assert faq_edits.answer_question(question)["match_type"] == "exact"
+    assert faq_edits.health_payload()["changes"]["applied"] == 1
+
+
+def test_compact_every_reloads_in_the_same_check(faq_edits, monkeypatch):
+    monkeypatch.setattr(faq_edits, "COMPACT_EVERY", 2)
+    category = categories(faq_edits)[0]
+    changes = faq_edits.get_faq_changes()
+    for word in ("prvakljucnarijec", "drugakljucnarijec"):
+        changes.edit("add_keyword", {"category": category["category"], "keyword": word})
+    base = faq_edits.get_matcher().base_version
+
+    assert faq_edits.get_reloader().check()
+    current = faq_edits.get_matcher()
+    assert current.base_version != base and current.patch_seq == 0
+    assert changes.status()["pending"] == 0
+    result = faq_edits.edit_faq({"op": "add_keyword", "category": category["category"], "keyword": "trecarijec"})
+    assert result["dataset_version"] == current.base_version + "+1"
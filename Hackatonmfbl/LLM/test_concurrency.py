@@ -0,0 +1,83 @@
+"""FAQ edits publish a new matcher instead of changing the one requests are reading."""
+import json
+import sys
+import threading
+
+import pytest
+
+import faq_api
+
+
+@pytest.fixture
+def frequent_switches():
+    # switch threads often so readers catch a writer mid-edit
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_published_matcher_is_never_changed(faq_edits):
+    before = faq_edits.get_matcher()
+    name = next(iter(before.category_answers.values()))[0][0]
+    question = next(iter(before.category_index[before.normalize(name)]))
+    version, answer = before.dataset_version, before.process_question(question, name)
+
+    faq_edits.edit_faq({"op": "delete_category", "category": name})
+    after = faq_edits.get_matcher()
+    assert after is not before
+    assert after.process_question(question, name)["category"] == "Unknown"
+    # a request still holding the old matcher keeps a consistent view
+    assert before.dataset_version == version
+    assert before.process_question(question, name) == answer
+
+
+def test_edits_while_answering(faq_edits, frequent_switches, monkeypatch):
+    monkeypatch.setattr("faq_changes.os.fsync", lambda fd: None)
+    with open(faq_edits.get_faq_changes().data_path, encoding="utf-8") as f:
+        categories = json.load(f)["categories"]
+    # a category with a few items, deleted and put back over and over
+    category = min((c for c in categories if len(c["items"]) > 1), key=lambda c: len(c["items"]))
+    name = category["category"]
+    questions = [q for c in categories for item in c["items"] for q in item["questions"] if q != "Basic"]
+    questions += ["koje su vase radno vrijeme i adresa poslovnice", "kako da otvorim racun"]
+    items = [{"question": q} for q in questions[:20]]
+
+    stop = threading.Event()
+    errors = []
+
+    def write():
+        changes = faq_edits.get_faq_changes()
+        try:
+            for _ in range(60):
+                # logged first, then applied in one go like the file watcher does
+                changes.edit("delete_category", {"category": name})
+                changes.edit("upsert_category", {"category": name})
+                for item in category["items"]:
+                    changes.edit("upsert_item", dict(item, category=name))
+                faq_edits.apply_changes()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stop.set()
+
+    def read():
+        try:
+            while not stop.is_set():
+                for question in questions:
+                    current = faq_api.get_matcher()
+                    current.process_question(question)
+                    current.process_question(question, name)
+                    current.top_matches(question, None, 3)
+                faq_api.get_matcher().process_questions(items)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert faq_edits.get_matcher().patch_seq == 60 * (2 + len(category["items"]))
@@ -0,0 +1,66 @@
+"""Deadline tiers of the similarity stage (see FAQMatcher DEADLINES)."""
+from time import monotonic
+
+import pytest
+
+from faq_index import load_matcher, matcher_options
+
+# not a stored question and no category keyword, so the similarity stage
+# scores every row
+QUESTION = "koje su vase radno vrijeme i adresa poslovnice"
+
+
+@pytest.fixture
+def matcher():
+    return load_matcher(**dict(matcher_options(), similarity="sequence", fusion=False, degraded_shortlist=32))
+
+
+def tier(matcher, deadline=None, busy=False):
+    return matcher.similarity_within(matcher.normalize(QUESTION), deadline, busy)[1]
+
+
+def test_full_scan_with_time_left(matcher):
+    full = matcher.process_question(QUESTION)
+    assert tier(matcher, monotonic() + 100) is None
+    assert matcher.process_question(QUESTION, deadline=monotonic() + 100) == full
+    assert "degraded" not in full
+
+
+def test_expired_deadline_falls_back_to_keywords(matcher):
+    assert tier(matcher, monotonic() - 1) == "keyword"
+    assert matcher.process_question(QUESTION, deadline=monotonic() - 1)["degraded"] is True
+
+
+def test_trigram_index_is_built_on_first_shortlist(matcher):
+    assert matcher.candidate_index is None
+    tier(matcher, monotonic() + 100)
+    assert matcher.candidate_index is None
+    matcher.row_cost = 2.0 / len(matcher.corpus)
+    assert tier(matcher, monotonic() + 1) == "shortlist"
+    assert matcher.candidate_index is not None
+
+
+def test_short_deadline_scores_a_shortlist(matcher):
+    rows = len(matcher.corpus)
+    assert rows > matcher.degraded_shortlist
+    # a full scan would take 2 s, the shortlist fits into the second left
+    matcher.row_cost = 2.0 / rows
+    assert tier(matcher, monotonic() + 1) == "shortlist"
+    matcher.row_cost = 2.0 / rows
+    assert tier(matcher, busy=True) == "shortlist"
+    matcher.row_cost = 1.0
+    assert tier(matcher, monotonic() + 1) == "keyword"
+
+
+def test_expired_deadline_skips_unmeasured_fusion():
+    matcher = load_matcher(**dict(matcher_options(), fusion=True))
+    if matcher.fusion_model is None:
+        pytest.skip(f"fusion unavailable: {matcher.fusion_fallback}")
+    assert matcher.fusion_cost is None
+
+    def fused_results(queries):
+        raise AssertionError("fusion ran past the deadline")
+
+    matcher.fused_results = fused_results
+    assert tier(matcher, monotonic() - 1) in ("chain", "keyword")
+    assert matcher.process_question(QUESTION, deadline=monotonic() - 1)["degraded"] is True
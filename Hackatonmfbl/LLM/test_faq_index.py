@@ -0,0 +1,72 @@
+"""The compiled index loads back into the same matcher the FAQ JSON builds."""
+import json
+
+import pytest
+
+from faq_index import DATA_PATH, INDEX_PATH, build_index, data_keywords, dataset_version, load_matcher
+from faq_matcher import FAQMatcher
+from faqmodel import CATEGORY_KEYWORDS
+from similarity import SequenceMatcherSimilarity, np
+
+CORPUS_FIELDS = ("categories", "answers", "category_ids", "answer_ids",
+                 "item_category", "item_answer", "row_questions", "row_item")
+TABLES = ("exact_index", "category_ids", "category_index", "category_rows", "basic_answers",
+          "answer_categories", "category_answers", "category_keywords")
+
+
+@pytest.fixture(scope="module")
+def source():
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data, data_keywords(data, CATEGORY_KEYWORDS)
+
+
+@pytest.fixture(scope="module")
+def compiled(source, tmp_path_factory):
+    data, keywords = source
+    path = tmp_path_factory.mktemp("index") / "faq_matcher_index.bin"
+    meta = build_index(data, keywords, str(path), embedding_model="")
+    return meta, str(path)
+
+
+def assert_same_matcher(loaded, built):
+    for field in CORPUS_FIELDS:
+        assert getattr(loaded.corpus, field) == getattr(built.corpus, field), field
+    for table in TABLES:
+        assert getattr(loaded, table) == getattr(built, table), table
+
+
+def test_round_trip(source, compiled):
+    data, keywords = source
+    meta, path = compiled
+    loaded = load_matcher(path, fusion=False)
+    built = FAQMatcher(data, keywords, fusion=False)
+
+    assert_same_matcher(loaded, built)
+    assert loaded.dataset_version == meta["dataset_version"] == dataset_version(data, keywords)
+    assert meta["questions"] == sum(len(item["questions"]) for c in data["categories"] for item in c["items"])
+
+    fitted = SequenceMatcherSimilarity().fit(built.corpus.row_questions)
+    assert loaded.backend.to_arrays() == fitted.to_arrays()
+
+    for category in data["categories"]:
+        for item in category["items"]:
+            for question in item["questions"]:
+                if question != "Basic":
+                    assert loaded.process_question(question) == built.process_question(question), question
+
+
+def test_tfidf_round_trip(source, compiled):
+    if not np:
+        pytest.skip("TF-IDF needs numpy")
+    data, keywords = source
+    _, path = compiled
+    loaded = load_matcher(path, similarity="tfidf", fusion=False).backend
+    built = FAQMatcher(data, keywords, similarity="tfidf", fusion=False).backend
+    for stored, fitted in zip(loaded.to_arrays(), built.to_arrays()):
+        assert np.array_equal(np.asarray(stored), np.asarray(fitted))
+
+
+def test_shipped_index_is_current(source):
+    data, keywords = source
+    assert_same_matcher(load_matcher(INDEX_PATH, fusion=False), FAQMatcher(data, keywords, fusion=False))
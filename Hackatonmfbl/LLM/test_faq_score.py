@@ -0,0 +1,16 @@
+"""faq_score output lines and --resume."""
+import json
+
+import faq_score
+
+
+def test_line_number_wins_over_input_field(tmp_path):
+    matched = [(7, {"question": "q", "line": 99}, {"answer": "a"}), (8, {"question": "r"}, {"error": "bad"})]
+    lines = [line for _, line in faq_score.serialize(matched)]
+    assert [json.loads(line)["line"] for line in lines] == [7, 8]
+    assert json.loads(lines[0])["result"] == {"answer": "a"}
+
+    output = tmp_path / "scored.jsonl"
+    output.write_text("\n".join(lines) + "\n" + '{"line": 9, "quest', encoding="utf-8")
+    assert faq_score.resume_point(str(output)) == 8
+    assert output.read_text(encoding="utf-8").endswith("\n")
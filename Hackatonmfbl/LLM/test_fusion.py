@@ -0,0 +1,40 @@
+"""FAQ_FUSION=1 answers next to the keyword -> similarity -> fallback chain."""
+import pytest
+
+from faq_index import load_matcher, matcher_options
+from fusion import load_weights
+
+
+@pytest.fixture(scope="module")
+def matchers():
+    fused = load_matcher(**dict(matcher_options(), fusion=True))
+    if fused.fusion_model is None:
+        pytest.skip(f"fusion unavailable: {fused.fusion_fallback}")
+    return fused, load_matcher(**dict(matcher_options(), fusion=False))
+
+
+@pytest.mark.parametrize("question", [
+    "Kolika je rata kredita?",       # no keyword hit, low fused probability
+    "Kakvo će vrijeme biti sutra?",  # out of scope
+])
+def test_fallback_keeps_the_chain_confidence(matchers, question):
+    fused, chain = matchers
+    result = fused.process_question(question)
+    assert result["match_type"] == "keyword"
+    assert result["confidence"] >= chain.keyword_fallback_confidence
+    assert result["answer"] == (fused.basic_answers.get(result["category"]) or "No answer available.")
+
+
+def test_fallback_off_answers_nothing(matchers):
+    fused, _ = matchers
+    fused.use_keyword_fallback = False
+    try:
+        assert fused.process_question("Kakvo će vrijeme biti sutra?")["match_type"] == "none"
+    finally:
+        fused.use_keyword_fallback = True
+
+
+def test_fitted_features_are_not_duplicated():
+    for name, model in load_weights().items():
+        assert len(set(model["features"])) == len(model["features"]) == len(model["weights"]), name
+        assert len(set(model["weights"])) == len(model["weights"]), name
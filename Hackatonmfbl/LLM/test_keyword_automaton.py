@@ -0,0 +1,57 @@
+"""KeywordAutomaton counts the same hits as scanning for every keyword."""
+import random
+from collections import Counter
+
+import pytest
+
+from faqmodel import CATEGORY_KEYWORDS
+from keyword_automaton import KeywordAutomaton, fold_diacritics
+
+
+def naive_hits(category_keywords, text, word_boundary=False, fold=False):
+    """Occurrences (overlapping ones too) of every distinct keyword, per category."""
+    prepare = fold_diacritics if fold else str
+    text = prepare(text)
+    hits = Counter()
+    for category, keywords in category_keywords.items():
+        for keyword in {prepare(k) for k in keywords if k}:
+            for start in range(len(text) - len(keyword) + 1):
+                if not text.startswith(keyword, start):
+                    continue
+                if word_boundary and not KeywordAutomaton.is_word(text, start, start + len(keyword)):
+                    continue
+                hits[category] += 1
+    return hits
+
+
+def random_text(rng, alphabet, longest):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, longest)))
+
+
+@pytest.mark.parametrize("word_boundary", [False, True])
+@pytest.mark.parametrize("fold", [False, True])
+def test_random_keywords(word_boundary, fold):
+    # nested, overlapping and shared keywords over a tiny alphabet
+    rng = random.Random(0)
+    for _ in range(500):
+        tables = {f"c{i}": {random_text(rng, "abšs", 4) for _ in range(rng.randint(0, 4))}
+                  for i in range(rng.randint(1, 4))}
+        automaton = KeywordAutomaton(tables, word_boundary=word_boundary, fold_diacritics=fold)
+        for _ in range(5):
+            text = random_text(rng, "abšs .", 20)
+            hits = automaton.match(text)
+            assert hits == naive_hits(tables, text, word_boundary, fold), (tables, text)
+            expected = max(tables, key=lambda c: hits.get(c, 0)) if hits else None
+            assert automaton.best_category(text) == expected
+
+
+@pytest.mark.parametrize("word_boundary", [False, True])
+@pytest.mark.parametrize("fold", [False, True])
+def test_faq_keywords(word_boundary, fold):
+    automaton = KeywordAutomaton(CATEGORY_KEYWORDS, word_boundary=word_boundary, fold_diacritics=fold)
+    for text in ("kako da renoviram kuću uz stambeni kredit",
+                 "potrošački ili potrosacki kredit, prekoračenje na tekuci racun",
+                 "poljoprivrednike i poljoprivredna gazdinstva",
+                 "nestambeni prostor",
+                 ""):
+        assert automaton.match(text) == naive_hits(CATEGORY_KEYWORDS, text, word_boundary, fold), text
@@ -0,0 +1,56 @@
+"""Similarity backends: exact pruning and optional backends."""
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+import similarity
+
+
+def test_tfidf_without_numpy(monkeypatch):
+    monkeypatch.setattr(similarity, "np", None)
+    with pytest.raises(similarity.BackendUnavailable):
+        similarity.TfidfSimilarity()
+
+
+def exhaustive_best(query, questions, rows):
+    """The plain first-best scan that SequenceMatcherSimilarity prunes."""
+    best_row, best_score = None, 0
+    for row in rows:
+        score = SequenceMatcher(None, query, questions[row]).ratio()
+        if score > best_score:
+            best_row, best_score = row, score
+    return best_row, best_score
+
+
+def random_text(rng, alphabet, longest=8):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, longest)))
+
+
+def test_pruning_matches_the_exhaustive_scan():
+    # a tiny alphabet makes ties and equal bounds common; queries may use
+    # characters no stored question has
+    rng = random.Random(0)
+    for _ in range(3000):
+        questions = [random_text(rng, "abc d") for _ in range(rng.randint(1, 12))]
+        backend = similarity.SequenceMatcherSimilarity().fit(questions)
+        query = random_text(rng, "abc dxyz")
+        start, end = sorted(rng.sample(range(len(questions) + 1), 2))
+        stats = {}
+        assert backend.best_match(query, start, end, stats) == exhaustive_best(query, questions, range(start, end))
+        assert stats["scored"] + stats["pruned"] == end - start
+
+        rows = sorted(rng.sample(range(len(questions)), rng.randint(1, len(questions))))
+        assert backend.best_of_rows(query, rows) == exhaustive_best(query, questions, rows)
+
+
+def test_pruning_matches_the_exhaustive_scan_on_the_faq():
+    from faq_index import load_matcher
+
+    matcher = load_matcher()
+    questions = matcher.corpus.row_questions
+    backend = similarity.SequenceMatcherSimilarity().fit(questions)
+    rng = random.Random(1)
+    for question in rng.sample(questions, 40):
+        query = question[:rng.randint(1, len(question))] + random_text(rng, "aeiou ")
+        assert backend.best_match(query) == exhaustive_best(query, questions, range(len(questions)))
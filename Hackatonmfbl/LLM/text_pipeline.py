@@ -0,0 +1,78 @@
+import re
+
+from keyword_automaton import fold_diacritics
+
+# ============================================
+# SIMILARITY TEXT PIPELINE
+# ============================================
+# Extra normalization for the similarity stage, on top of normalize()
+# (lowercase, collapsed whitespace). Steps always run in this order,
+# whatever order they are configured in:
+#
+#   fold       č/ć/š/ž/đ -> c/c/s/z/d
+#   punct      punctuation -> spaces
+#   stopwords  drop function words ("da", "li", "je", "za", ...)
+#   stem       strip common Bosnian/Serbian/Croatian inflection endings
+
+STEPS = ("fold", "punct", "stopwords", "stem")
+
+STOP_WORDS = {
+    "a", "ali", "bi", "bih", "da", "do", "i", "ili", "iz", "je", "jer", "li", "me", "mi",
+    "na", "ne", "o", "od", "pa", "po", "s", "sa", "se", "su", "te", "ti", "to", "u", "uz", "za",
+}
+STOP_WORDS |= {fold_diacritics(w) for w in STOP_WORDS}
+
+# longest first; a word keeps at least MIN_STEM characters
+SUFFIXES = sorted(
+    ["ovima", "evima", "ama", "ima", "om", "em", "og", "ih", "im", "oj", "ski", "cki",
+     "iti", "ati", "eti", "uje", "ju", "a", "e", "i", "o", "u"],
+    key=len,
+    reverse=True,
+)
+MIN_STEM = 4
+
+PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def parse_steps(value):
+    """Steps from "fold,punct,..." or an iterable; raises ValueError for unknown names."""
+    if isinstance(value, str):
+        value = [step.strip() for step in value.split(",") if step.strip()]
+    steps = set(value)
+    unknown = steps - set(STEPS)
+    if unknown:
+        raise ValueError(f"Unknown normalization steps {sorted(unknown)}, expected some of {list(STEPS)}")
+    return tuple(step for step in STEPS if step in steps)
+
+
+def stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+class TextPipeline:
+    """Applies the configured steps to already normalize()d text."""
+
+    def __init__(self, steps=()):
+        self.steps = parse_steps(steps)
+
+    def __bool__(self):
+        return bool(self.steps)
+
+    def __call__(self, text: str) -> str:
+        if not self.steps:
+            return text
+        steps = self.steps
+        if "fold" in steps:
+            text = fold_diacritics(text)
+        if "punct" in steps:
+            text = PUNCTUATION.sub(" ", text)
+        words = text.split()
+        if "stopwords" in steps:
+            words = [w for w in words if w not in STOP_WORDS]
+        if "stem" in steps:
+            words = [stem(w) for w in words]
+        # a question made only of stop words keeps its original text
+        return " ".join(words) or " ".join(text.split())
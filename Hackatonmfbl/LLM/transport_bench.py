@@ -0,0 +1,142 @@
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from faq_socket import JSON, MSGPACK, FAQSocketClient, msgpack
+from loadtest import QUESTIONS, percentile, start_server, stop_server, wait_healthy
+
+
+# ============================================
+# PER-CALL OVERHEAD: HTTP vs UNIX SOCKET
+# ============================================
+# One client sends the same few questions back to back. After the first round
+# they are answer-cache hits, so the time per question is almost entirely
+# transport: connection handling, framing or HTTP parsing, and encoding.
+
+def timed(calls, rounds, per_call):
+    """Per-question latencies of `rounds` calls that each answer `per_call` questions."""
+    latencies = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        calls(i)
+        latencies.append((time.perf_counter() - start) / per_call)
+    return latencies
+
+
+def http_calls(url, depth):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+
+    def post(path, body):
+        conn.request("POST", path, json.dumps(body), headers)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200 or not payload.get("success"):
+            raise RuntimeError(f"HTTP {response.status}: {payload}")
+
+    def single(i):
+        post("/api/process-question", {"question": QUESTIONS[i % len(QUESTIONS)]})
+
+    def batch(i):
+        post("/api/process-questions",
+             {"questions": [{"question": QUESTIONS[(i + j) % len(QUESTIONS)]} for j in range(depth)]})
+
+    return conn, single, batch
+
+
+def socket_calls(path, codec, depth):
+    client = FAQSocketClient(path, codec)
+
+    def check(reply):
+        if not reply.get("success"):
+            raise RuntimeError(f"socket: {reply}")
+
+    def single(i):
+        check(client.ask(QUESTIONS[i % len(QUESTIONS)]))
+
+    def pipelined(i):
+        for reply in client.pipeline(client.question(QUESTIONS[(i + j) % len(QUESTIONS)]) for j in range(depth)):
+            check(reply)
+
+    def batch(i):
+        check(client.ask_many([{"question": QUESTIONS[(i + j) % len(QUESTIONS)]} for j in range(depth)]))
+
+    return client, single, pipelined, batch
+
+
+def run(url, socket_path, rounds, depth):
+    """{label: per-question latencies} for every transport and call pattern."""
+    results = {}
+    conn, single, batch = http_calls(url, depth)
+    timed(single, len(QUESTIONS), 1)  # warm the answer cache and the connection
+    results["http"] = timed(single, rounds, 1)
+    results[f"http batch x{depth}"] = timed(batch, max(1, rounds // depth), depth)
+    conn.close()
+
+    codecs = [("json", JSON)] + ([("msgpack", MSGPACK)] if msgpack else [])
+    for name, codec in codecs:
+        client, single, pipelined, batch = socket_calls(socket_path, codec, depth)
+        timed(single, len(QUESTIONS), 1)
+        results[f"unix {name}"] = timed(single, rounds, 1)
+        results[f"unix {name} pipeline x{depth}"] = timed(pipelined, max(1, rounds // depth), depth)
+        results[f"unix {name} batch x{depth}"] = timed(batch, max(1, rounds // depth), depth)
+        client.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare per-question overhead of the HTTP API and the Unix socket protocol")
+    parser.add_argument("--url", default=None,
+                        help="running server to test (with --socket); default: start serve.py")
+    parser.add_argument("--socket", default=None, help="socket path of the running server")
+    parser.add_argument("--rounds", type=int, default=2000, help="calls per single-question pattern")
+    parser.add_argument("--depth", type=int, default=16, help="questions per pipeline / batch")
+    parser.add_argument("--port", type=int, default=5102, help="port for the server started here")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    proc = None
+    url, socket_path = args.url, args.socket
+    if url is None or socket_path is None:
+        url = f"http://127.0.0.1:{args.port}"
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="faq-bench-"), "faq.sock")
+        proc = start_server(args.port, 1, 4, ["--socket", socket_path])
+    try:
+        if not wait_healthy(url):
+            print("server did not start", file=sys.stderr)
+            return 1
+        deadline = time.time() + 10
+        while not os.path.exists(socket_path) and time.time() < deadline:
+            time.sleep(0.1)
+        results = run(url, socket_path, args.rounds, args.depth)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    summary = {
+        label: {
+            "mean_us": sum(lats) / len(lats) * 1e6,
+            "p50_us": percentile(lats, 50) * 1e6,
+            "p99_us": percentile(lats, 99) * 1e6,
+        }
+        for label, lats in results.items()
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"{'per question':>26} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for label, stats in summary.items():
+        print(f"{label:>26} {stats['mean_us']:>9.1f} {stats['p50_us']:>9.1f} {stats['p99_us']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())